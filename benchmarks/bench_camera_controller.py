@@ -0,0 +1,107 @@
+"""CPU use and gaze sample rate per magnifier state, with and without adaptive camera control.
+
+Runs the capture thread of the gaze worker against a synthetic camera (or a
+recorded clip with --video) and a stand-in for the gaze inference that
+busy-waits --cost-ms per frame, scaled with the frame's pixel count relative
+to the source resolution. A scripted sequence of magnifier states is played
+through CameraController; for every state the process CPU use (percent of one
+core) and the samples per second are reported, once with the controller
+enabled and once with it disabled (always the active mode).
+
+Run: python benchmarks/bench_camera_controller.py [--seconds 4] [--cost-ms 8] [--video clip.mp4]
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from camera import (ACTIVE, GESTURE, HIDDEN, WAITING, CameraController, CameraMode,  # noqa: E402
+                    FileSource, SyntheticSource)
+from gaze_worker import _FrameGrabber  # noqa: E402
+
+SCRIPT = [ACTIVE, WAITING, HIDDEN, GESTURE, ACTIVE]
+
+
+class _Inference(threading.Thread):
+    """Takes frames from the grabber and burns cost_ms per frame of the reference size."""
+
+    def __init__(self, grabber, cost_ms, reference_pixels):
+        super().__init__(daemon=True)
+        self.grabber = grabber
+        self.cost = cost_ms / 1000.0
+        self.reference_pixels = reference_pixels
+        self.samples = 0
+        self._running = True
+
+    def run(self):
+        while self._running:
+            frame, _ = self.grabber.take()
+            if frame is None:
+                continue
+            end = time.perf_counter() + self.cost * frame.shape[0] * frame.shape[1] / self.reference_pixels
+            while time.perf_counter() < end:
+                pass
+            self.samples += 1
+
+    def stop(self):
+        self._running = False
+
+
+def run(source, adaptive, seconds, cost_ms, idle_after):
+    grabber = _FrameGrabber(source)
+    inference = _Inference(grabber, cost_ms, source.mode.width * source.mode.height)
+    controller = CameraController(source, active_mode=source.mode._replace(fps=30.0), idle_after=idle_after,
+                                  sample_counter=lambda: inference.samples)
+    controller.set_enabled(adaptive)
+    grabber.start()
+    inference.start()
+    results = []
+    try:
+        for state in SCRIPT:
+            start = time.perf_counter()
+            # let the hysteresis run out, then measure the settled state
+            while time.perf_counter() - start < idle_after + 0.5:
+                controller.update(state)
+                time.sleep(0.05)
+            controller.measure(min_interval=0)
+            time.sleep(seconds)
+            controller.update(state)
+            cpu, rate = controller.measure(min_interval=0)
+            mode = source.mode
+            results.append((state, f"{mode.width}x{mode.height}@{mode.fps:.0f}", cpu, rate))
+    finally:
+        inference.stop()
+        grabber.stop()
+        inference.join()
+        grabber.join()
+    return results, controller.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=4.0, help="measured time per state")
+    parser.add_argument("--cost-ms", type=float, default=8.0, help="inference time per frame at the source size")
+    parser.add_argument("--idle-after", type=float, default=1.0)
+    parser.add_argument("--video", default=None, help="recorded webcam clip instead of synthetic frames")
+    args = parser.parse_args()
+
+    def make_source():
+        if args.video:
+            return FileSource(args.video, mode=None)
+        return SyntheticSource(CameraMode(640, 480, 30.0))
+
+    print(f"{'control':>9} {'state':>8} {'mode':>14} {'CPU %':>7} {'samples/s':>10}")
+    for adaptive in (False, True):
+        results, stats = run(make_source(), adaptive, args.seconds, args.cost_ms, args.idle_after)
+        for state, mode, cpu, rate in results:
+            print(f"{'adaptive' if adaptive else 'fixed':>9} {state:>8} {mode:>14} {cpu:7.1f} {rate:10.1f}")
+        source = stats["source"]
+        print(f"{'':>9} frames read {source['frames_read']}, skipped {source['frames_skipped']}, "
+              f"mode changes {source['mode_changes']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Throughput of MagnificationEngine without Qt or a display.
+
+For each window size and zoom factor, renders a random gaze trace against one
+synthetic screen frame and reports frames per second for:
+- render() point by point into the persistent buffer, what the magnifier does
+  per update,
+- the same with every frame copied into one array, as offline rendering needs,
+- render_batch(), all points in one vectorized resize or remap.
+
+It also reports the largest difference (in levels) between the batch and the
+per-point frames and fails if it exceeds the bound render_batch() documents:
+0 for the lens shapes and nearest neighbour, 1 for the rectangle otherwise.
+
+Run: python benchmarks/bench_engine.py [--points 200] [--sizes 400x300 800x600] [--scales 2 4] [--interpolation cubic]
+"""
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from engine import LensConfig, MagnificationEngine  # noqa: E402
+from lens_shapes import LENS_SHAPES, RECTANGLE  # noqa: E402
+
+INTERPOLATIONS = {"nearest": cv2.INTER_NEAREST, "linear": cv2.INTER_LINEAR,
+                  "cubic": cv2.INTER_CUBIC, "lanczos": cv2.INTER_LANCZOS4}
+
+
+def synthetic_screen(width, height, seed=0):
+    """Text-like dark blocks on a light background."""
+    rng = np.random.default_rng(seed)
+    frame = np.full((height, width, 4), 235, dtype=np.uint8)
+    for _ in range(width * height // 4000):
+        x, y = rng.integers(0, width - 60), rng.integers(0, height - 12)
+        frame[y:y + 8, x:x + rng.integers(10, 60), :3] = rng.integers(0, 90)
+    return frame
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--points", type=int, default=200)
+    parser.add_argument("--screen", default="1920x1080")
+    parser.add_argument("--sizes", nargs="+", default=["400x300", "800x600", "1600x1000"])
+    parser.add_argument("--scales", type=float, nargs="+", default=[2.0, 4.0, 8.0])
+    parser.add_argument("--shape", default=LENS_SHAPES[0], choices=LENS_SHAPES)
+    parser.add_argument("--interpolation", default="linear", choices=sorted(INTERPOLATIONS))
+    args = parser.parse_args()
+    args.interpolation = INTERPOLATIONS[args.interpolation]
+
+    sw, sh = (int(v) for v in args.screen.split("x"))
+    frame = synthetic_screen(sw, sh)
+    engine = MagnificationEngine.for_frame(frame)
+    rng = np.random.default_rng(1)
+    points = list(zip(rng.integers(0, sw, args.points).tolist(), rng.integers(0, sh, args.points).tolist()))
+
+    print(f"{'window':>10} {'zoom':>5} {'render fps':>11} {'render+keep':>12} {'batch fps':>10} {'max diff':>9}")
+    failed = False
+    for size in args.sizes:
+        w, h = (int(v) for v in size.split("x"))
+        for scale in args.scales:
+            config = LensConfig(w, h, scale, args.shape, args.interpolation, False)
+            engine.render(*points[0], config)  # warm-up, allocates the output buffer
+            t0 = time.perf_counter()
+            for x, y in points:
+                engine.render(x, y, config)
+            render_fps = len(points) / (time.perf_counter() - t0)
+
+            # offline use keeps every frame, so compare the batch with copying each render out
+            kept = np.empty((len(points), h, w, 4), dtype=np.uint8)
+            t0 = time.perf_counter()
+            for i, (x, y) in enumerate(points):
+                kept[i] = engine.render(x, y, config)[0]
+            keep_fps = len(points) / (time.perf_counter() - t0)
+
+            engine.render_batch(frame, points[:1], config)  # warm-up
+            t0 = time.perf_counter()
+            batch = engine.render_batch(frame, points, config)
+            batch_fps = len(points) / (time.perf_counter() - t0)
+
+            diff = int(cv2.absdiff(batch.reshape(-1, w, 4), kept.reshape(-1, w, 4)).max())
+            bound = 0 if args.shape != RECTANGLE or args.interpolation == cv2.INTER_NEAREST else 1
+            failed |= diff > bound
+            print(f"{size:>10} {scale:5.1f} {render_fps:11.1f} {keep_fps:12.1f} {batch_fps:10.1f} "
+                  f"{diff:9d}{'  FAIL' if diff > bound else ''}")
+    if failed:
+        sys.exit("render_batch() differs from render() by more than the documented bound")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Per-event cost on the calling thread: EVENTS.emit against a synchronous print.
+
+Times emit() while recording is off, for an event below the level, and while
+recording (the background writer formats and writes to a temporary file in the
+meantime), and print() of a similar line to a line-buffered file, which is what
+the console output costs in the worst case. Also reports how many events the
+writer got to disk and how many were dropped at the chosen rate.
+
+Run: python benchmarks/bench_event_log.py [--events 20000] [--rate 0]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from event_log import DEBUG, EventLog  # noqa: E402
+
+
+def per_event_us(fn, events, rate):
+    interval = 1.0 / rate if rate > 0 else 0.0
+    spent = 0.0
+    for i in range(events):
+        t0 = time.perf_counter()
+        fn(i)
+        spent += time.perf_counter() - t0
+        if interval:
+            time.sleep(interval)
+    return spent / events * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--rate", type=float, default=0, help="events per second, 0 = as fast as possible")
+    parser.add_argument("--capacity", type=int, default=8192)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        log = EventLog(capacity=args.capacity)
+        off_us = per_event_us(lambda i: log.emit("gaze", DEBUG, x=i, y=i), args.events, 0)
+        log.start(directory)
+        filtered_us = per_event_us(lambda i: log.emit("gaze", DEBUG, x=i, y=i), args.events, 0)
+        log.level = DEBUG
+        on_us = per_event_us(lambda i: log.emit("gaze", DEBUG, x=i, y=i), args.events, args.rate)
+        log.stop()
+        stats = log.stats()
+
+        with open(os.path.join(directory, "print.txt"), "w", buffering=1) as f:
+            print_us = per_event_us(lambda i: print(f"Gaze: ({i:.0f}, {i:.0f}) {time.time()}", file=f),
+                                    args.events, args.rate)
+
+    print(f"{'emit, not recording':<26} {off_us:8.2f} us/event")
+    print(f"{'emit, below level':<26} {filtered_us:8.2f} us/event")
+    print(f"{'emit, recording':<26} {on_us:8.2f} us/event")
+    print(f"{'print, line buffered':<26} {print_us:8.2f} us/event")
+    print(f"written {stats['written']} of {stats['emitted']}, dropped {stats['dropped']}, files {stats['files']}")
+
+
+if __name__ == "__main__":
+    main()
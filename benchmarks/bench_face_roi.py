@@ -0,0 +1,84 @@
+"""Face-ROI tracking vs. full-frame feature extraction on a recorded clip.
+
+Runs two GazeEstimator instances with the same calibrated model over every
+frame: one on the full frame, one behind FaceRoiTracker. Reports the
+extract_features time of both paths and how far the ROI predictions are from
+the full-frame predictions (screen px). Needs eyetrax and a model file.
+
+Run: python benchmarks/bench_face_roi.py --video clip.mp4 --model gaze_model.pkl [--downscale 320]
+"""
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from face_roi import FaceRoiTracker  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--video", required=True, help="recorded webcam clip")
+    parser.add_argument("--model", required=True, help="gaze model saved by the app (gaze_model.pkl)")
+    parser.add_argument("--downscale", type=int, default=None, help="downscale ROI crops wider than this")
+    parser.add_argument("--padding", type=float, default=0.5)
+    parser.add_argument("--refresh", type=int, default=90, help="frames between full-frame refreshes")
+    args = parser.parse_args()
+
+    from eyetrax import GazeEstimator
+
+    full = GazeEstimator()
+    full.load_model(args.model)
+    roi_estimator = GazeEstimator()
+    roi_estimator.load_model(args.model)
+    roi = FaceRoiTracker(roi_estimator, padding=args.padding, refresh_interval=args.refresh,
+                         downscale_width=args.downscale)
+
+    cap = cv2.VideoCapture(args.video)
+    full_ms, roi_ms, errors = [], [], []
+    both_missing = only_full = only_roi = 0
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        t0 = time.perf_counter()
+        f_full, _ = full.extract_features(frame)
+        t1 = time.perf_counter()
+        f_roi, _ = roi.extract_features(frame)
+        t2 = time.perf_counter()
+        full_ms.append((t1 - t0) * 1000)
+        roi_ms.append((t2 - t1) * 1000)
+
+        if f_full is None and f_roi is None:
+            both_missing += 1
+        elif f_roi is None:
+            only_full += 1
+        elif f_full is None:
+            only_roi += 1
+        else:
+            p_full = np.asarray(full.predict([f_full])[0])
+            p_roi = np.asarray(roi.predict([f_roi])[0])
+            errors.append(float(np.linalg.norm(p_full - p_roi)))
+    cap.release()
+
+    if not full_ms:
+        raise SystemExit("No frames read from " + args.video)
+    full_ms, roi_ms = np.array(full_ms), np.array(roi_ms)
+    print(f"frames: {len(full_ms)}  tracker: {roi.stats()}")
+    print(f"{'path':<10} {'mean ms':>8} {'p50 ms':>8} {'p95 ms':>8}")
+    for name, values in (("full", full_ms), ("roi", roi_ms)):
+        print(f"{name:<10} {values.mean():8.2f} {np.percentile(values, 50):8.2f} {np.percentile(values, 95):8.2f}")
+    print(f"speed-up: {full_ms.mean() / roi_ms.mean():.2f}x")
+    if errors:
+        errors = np.array(errors)
+        print(f"gaze difference roi vs full (px): mean {errors.mean():.1f}  p95 {np.percentile(errors, 95):.1f}"
+              f"  max {errors.max():.1f}")
+    print(f"face found only on full frame: {only_full}, only in ROI: {only_roi}, neither: {both_missing}")
+
+
+if __name__ == "__main__":
+    main()
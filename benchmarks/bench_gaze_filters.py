@@ -0,0 +1,77 @@
+"""Per-sample cost and lag of the gaze filters in gaze_filters.py.
+
+Cost:  time per update() call and per sample in filter_batch().
+Lag:   delay (in samples) behind a noise-free ramp at constant speed.
+Noise: remaining jitter (px std) while fixating a point with noisy gaze.
+
+Run: python benchmarks/bench_gaze_filters.py [--samples 20000]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gaze_filters import FILTERS  # noqa: E402
+
+RATE = 30.0  # gaze samples per second
+
+
+def update_cost_us(cls, xs, ys, ts):
+    f = cls()
+    update = f.update
+    t0 = time.perf_counter()
+    for x, y, t in zip(xs, ys, ts):
+        update(x, y, t)
+    return (time.perf_counter() - t0) / len(xs) * 1e6
+
+
+def batch_cost_us(cls, xs, ys, ts):
+    t0 = time.perf_counter()
+    cls().filter_batch(xs, ys, ts)
+    return (time.perf_counter() - t0) / len(xs) * 1e6
+
+
+def ramp_lag(cls, speed=300.0, n=300):
+    ts = np.arange(n) / RATE
+    xs = 100 + speed * ts
+    ys = np.full(n, 500.0)
+    out = cls().filter_batch(xs, ys, ts)
+    # steady state: look at the second half of the ramp
+    lag_px = np.mean(xs[n // 2:] - out[n // 2:, 0])
+    return lag_px / (speed / RATE)
+
+
+def fixation_jitter(cls, noise=30.0, n=2000):
+    rng = np.random.default_rng(0)
+    ts = np.arange(n) / RATE
+    xs = 960 + rng.normal(0, noise, n)
+    ys = 540 + rng.normal(0, noise, n)
+    out = cls().filter_batch(xs, ys, ts)
+    return float(np.std(out[50:, 0]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--samples", type=int, default=20000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(1)
+    xs = rng.uniform(0, 1920, args.samples)
+    ys = rng.uniform(0, 1080, args.samples)
+    ts = np.arange(args.samples) / RATE
+    # update() gets Python floats, like it does from the gaze worker
+    xl, yl, tl = xs.tolist(), ys.tolist(), ts.tolist()
+
+    print(f"{'filter':<16} {'update us':>10} {'batch us':>9} {'lag samples':>12} {'jitter px':>10}")
+    for name, cls in FILTERS.items():
+        print(f"{name:<16} {update_cost_us(cls, xl, yl, tl):10.2f} {batch_cost_us(cls, xs, ys, ts):9.3f} "
+              f"{ramp_lag(cls):12.2f} {fixation_jitter(cls):10.2f}")
+    print("(raw input jitter: 30.00 px)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""Throughput of InferencePool with 0..N worker processes.
+
+Feeds the same frames through in-process inference (0 processes) and through
+InferencePool with 1, 2, ... processes and reports frames/s and the latency
+from submit to ordered result. Without --model, a synthetic estimator burns a
+fixed amount of single-threaded CPU per frame (roughly one FaceMesh run), so
+the scaling can be checked without eyetrax or a calibration.
+
+Run: python benchmarks/bench_inference_pool.py [--processes 1 2 4] [--frames 600]
+     python benchmarks/bench_inference_pool.py --video clip.mp4 --model gaze_model.pkl
+     python benchmarks/bench_inference_pool.py --fps 120   # camera-paced, reports dropped frames
+"""
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from inference_pool import InferencePool, load_gaze_estimator  # noqa: E402
+
+
+class SyntheticEstimator:
+    """Blurs a downscaled copy of the frame `passes` times and returns its channel means."""
+
+    def __init__(self, passes):
+        cv2.setNumThreads(1)  # one core per process, like MediaPipe's CPU graph
+        self.passes = passes
+
+    def extract_features(self, frame):
+        img = cv2.resize(frame, (320, 240))
+        for _ in range(self.passes):
+            img = cv2.GaussianBlur(img, (9, 9), 0)
+        return img.reshape(-1, 3).mean(axis=0), False
+
+    def predict(self, features):
+        return [(f[0] * 7.0, f[1] * 4.0) for f in features]
+
+
+def make_synthetic_estimator(passes):
+    return SyntheticEstimator(passes)
+
+
+def load_frames(args):
+    if args.video:
+        cap = cv2.VideoCapture(args.video)
+        frames = []
+        while len(frames) < args.frames:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frames.append(frame)
+        if not frames:
+            raise SystemExit(f"Cannot read {args.video}")
+        return frames
+    rng = np.random.default_rng(0)
+    return [rng.integers(0, 255, (480, 640, 3), dtype=np.uint8) for _ in range(8)]
+
+
+def run_in_process(estimator, frames, count, fps):
+    latencies = []
+    dropped = 0
+    start = time.perf_counter()
+    for i in range(count):
+        frame_time = start + i / fps if fps else time.perf_counter()
+        if fps and time.perf_counter() < frame_time:
+            time.sleep(frame_time - time.perf_counter())
+        if fps and time.perf_counter() - frame_time > 1 / fps:
+            dropped += 1  # a newer frame is already there, the app would skip this one
+            continue
+        features, blink = estimator.extract_features(frames[i % len(frames)])
+        if features is not None and not blink:
+            estimator.predict([features])
+        latencies.append(time.perf_counter() - frame_time)
+    return time.perf_counter() - start, latencies, dropped
+
+
+def run_pool(processes, factory, factory_args, frames, count, fps):
+    pool = InferencePool(processes, frames[0].shape, factory, factory_args)
+    if not pool.wait_ready(timeout=120):
+        pool.close()
+        raise SystemExit("Inference processes did not start")
+    latencies = []
+    dropped = 0
+    last_seq = -1
+    submitted = 0
+    start = time.perf_counter()
+    while submitted + dropped < count or pool.in_flight:
+        if submitted + dropped < count:
+            i = submitted + dropped
+            frame_time = start + i / fps if fps else time.perf_counter()
+            if fps and time.perf_counter() < frame_time:
+                # camera has not delivered frame i yet
+                pass
+            elif pool.submit(frames[i % len(frames)], frame_time):
+                submitted += 1
+                continue
+            elif fps:
+                dropped += 1
+                continue
+        for result in pool.collect(timeout=0.001):
+            assert result.seq > last_seq, "results out of order"
+            last_seq = result.seq
+            latencies.append(time.perf_counter() - result.frame_time)
+    elapsed = time.perf_counter() - start
+    pool.close()
+    return elapsed, latencies, dropped
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--processes", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--frames", type=int, default=600)
+    parser.add_argument("--fps", type=float, default=0, help="pace frames like a camera (0 = as fast as possible)")
+    parser.add_argument("--video", help="recorded webcam clip instead of noise frames")
+    parser.add_argument("--model", help="gaze model (gaze_model.pkl) to run the real GazeEstimator")
+    parser.add_argument("--passes", type=int, default=12, help="blur passes of the synthetic estimator")
+    args = parser.parse_args()
+
+    frames = load_frames(args)
+    if args.model:
+        factory, factory_args = load_gaze_estimator, (args.model,)
+    else:
+        factory, factory_args = make_synthetic_estimator, (args.passes,)
+
+    print(f"{len(frames)} distinct frames {frames[0].shape}, {args.frames} per run, cpu count {os.cpu_count()}")
+    print(f"{'processes':>9} {'frames/s':>9} {'speedup':>8} {'p50 ms':>8} {'p95 ms':>8} {'dropped':>8}")
+    baseline = None
+    for processes in [0] + args.processes:
+        if processes == 0:
+            elapsed, latencies, dropped = run_in_process(factory(*factory_args), frames, args.frames, args.fps)
+        else:
+            elapsed, latencies, dropped = run_pool(processes, factory, factory_args, frames, args.frames, args.fps)
+        throughput = len(latencies) / elapsed
+        baseline = baseline or throughput
+        ms = np.array(latencies) * 1000
+        print(f"{processes:>9} {throughput:9.1f} {throughput / baseline:7.2f}x "
+              f"{np.percentile(ms, 50):8.1f} {np.percentile(ms, 95):8.1f} {dropped:8d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Per-frame cost of the remap lens shapes against the rectangular resize path.
+
+For each window size and zoom factor: the time of cv2.resize from the
+(window / zoom) region, as the rectangular lens does, and of cv2.remap with a
+cached table from a window-sized region for each shape in lens_shapes.py.
+Also reports how long building a table takes (paid once per shape, window
+size and zoom thanks to the LRU cache) and the cost of a cache hit.
+
+Run: python benchmarks/bench_lens_shapes.py [--frames 100] [--sizes 800x600 1600x1000]
+"""
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lens_shapes import LENS_SHAPES, RECTANGLE, RemapCache, build_remap, render_shape  # noqa: E402
+
+
+def per_frame_ms(fn, frames):
+    fn()  # warm-up
+    t0 = time.perf_counter()
+    for _ in range(frames):
+        fn()
+    return (time.perf_counter() - t0) / frames * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=100)
+    parser.add_argument("--sizes", nargs="+", default=["800x600", "1600x1000", "3000x2000"])
+    parser.add_argument("--scales", type=float, nargs="+", default=[2.0, 4.0, 8.0])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    shapes = [s for s in LENS_SHAPES if s != RECTANGLE]
+    print(f"{'window':>10} {'zoom':>5} {'resize ms':>10} " + " ".join(f"{s + ' ms':>18}" for s in shapes)
+          + f" {'build ms':>9} {'lookup us':>10}")
+    for size in args.sizes:
+        w, h = (int(v) for v in size.split("x"))
+        region = rng.integers(0, 255, (h, w, 4), dtype=np.uint8)
+        out = np.empty((h, w, 4), dtype=np.uint8)
+        for scale in args.scales:
+            small = np.ascontiguousarray(region[:int(h / scale), :int(w / scale)])
+            resize_ms = per_frame_ms(
+                lambda: cv2.resize(small, (w, h), dst=out, interpolation=cv2.INTER_LINEAR), args.frames)
+
+            cache = RemapCache()
+            remap_ms = []
+            for shape in shapes:
+                maps = cache.get(shape, w, h, scale)
+                remap_ms.append(per_frame_ms(lambda: render_shape(region, maps, dst=out), args.frames))
+
+            t0 = time.perf_counter()
+            map_x, map_y = build_remap(shapes[-1], w, h, scale)
+            cv2.convertMaps(map_x, map_y, cv2.CV_16SC2)
+            build_ms = (time.perf_counter() - t0) * 1000
+            t0 = time.perf_counter()
+            for _ in range(1000):
+                cache.get(shapes[0], w, h, scale)
+            lookup_us = (time.perf_counter() - t0) * 1000
+
+            print(f"{size:>10} {scale:5.0f} {resize_ms:10.2f} " + " ".join(f"{ms:18.2f}" for ms in remap_ms)
+                  + f" {build_ms:9.1f} {lookup_us:10.2f}")
+
+
+if __name__ == "__main__":
+    main()
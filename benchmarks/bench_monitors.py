@@ -0,0 +1,93 @@
+"""Cost of monitor lookup and region grabs as the number of monitors grows.
+
+Lays out 1..N synthetic monitors in a grid and times, per call:
+- monitor_at: MonitorIndex's grid lookup against a linear scan over all
+  monitors, as a per-sample lookup without the index would do,
+- clamp_region for lens regions around random gaze points,
+- grab_composed for a region inside one monitor (a single grab) and for one
+  straddling the corner of four monitors (four grabs composed into a buffer).
+
+The grabs come from replay.StaticScreenSource, so they measure the copy and
+compose work, not the platform's screen capture.
+
+Run: python benchmarks/bench_monitors.py [--counts 1 2 4 9 16] [--calls 2000]
+"""
+import argparse
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from monitors import MonitorIndex, grab_composed  # noqa: E402
+from replay import StaticScreenSource  # noqa: E402
+
+
+def grid_layout(count, width, height):
+    cols = math.ceil(math.sqrt(count))
+    return [{"left": (k % cols) * width, "top": (k // cols) * height, "width": width, "height": height}
+            for k in range(count)]
+
+
+def linear_monitor_at(monitors, x, y):
+    best, best_d = 0, None
+    for k, m in enumerate(monitors):
+        dx = max(m["left"] - x, 0, x - (m["left"] + m["width"]))
+        dy = max(m["top"] - y, 0, y - (m["top"] + m["height"]))
+        d = dx * dx + dy * dy
+        if best_d is None or d < best_d:
+            best, best_d = k, d
+    return best
+
+
+def per_call_us(fn, args):
+    fn(*args[0])  # warm-up
+    t0 = time.perf_counter()
+    for a in args:
+        fn(*a)
+    return (time.perf_counter() - t0) / len(args) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--counts", type=int, nargs="+", default=[1, 2, 4, 9, 16])
+    parser.add_argument("--monitor-size", default="800x600")
+    parser.add_argument("--lens-size", default="400x300")
+    parser.add_argument("--calls", type=int, default=2000)
+    args = parser.parse_args()
+
+    mw, mh = (int(v) for v in args.monitor_size.split("x"))
+    lw, lh = (int(v) for v in args.lens_size.split("x"))
+    rng = np.random.default_rng(0)
+    print(f"{'monitors':>8} {'index us':>9} {'linear us':>10} {'clamp us':>9} {'grab 1 us':>10} {'grab 4 us':>10}")
+    for count in args.counts:
+        monitors = grid_layout(count, mw, mh)
+        index = MonitorIndex(monitors)
+        b = index.bounds
+        points = [(int(x), int(y)) for x, y in zip(rng.integers(b["left"], b["left"] + b["width"], args.calls),
+                                                   rng.integers(b["top"], b["top"] + b["height"], args.calls))]
+        index_us = per_call_us(index.monitor_at, points)
+        linear_us = per_call_us(lambda x, y: linear_monitor_at(monitors, x, y), points)
+        regions = [({"left": x - lw // 2, "top": y - lh // 2, "width": lw, "height": lh}, x, y) for x, y in points]
+        clamp_us = per_call_us(index.clamp_region, regions)
+
+        desktop = np.zeros((b["height"], b["width"], 4), dtype=np.uint8)
+        sct = StaticScreenSource([desktop])
+        out = np.empty((lh, lw, 4), dtype=np.uint8)
+        inside = {"left": 0, "top": 0, "width": lw, "height": lh}
+        calls = [(sct, index, inside, out)] * (args.calls // 10)
+        single_us = per_call_us(grab_composed, calls)
+        if count >= 4:
+            corner = {"left": mw - lw // 2, "top": mh - lh // 2, "width": lw, "height": lh}
+            straddle_us = per_call_us(grab_composed, [(sct, index, corner, out)] * (args.calls // 10))
+            straddle = f"{straddle_us:10.1f}"
+        else:
+            straddle = f"{'-':>10}"
+        print(f"{count:8d} {index_us:9.2f} {linear_us:10.2f} {clamp_us:9.2f} {single_us:10.1f} {straddle}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Micro-benchmark of the capture-to-display path of Magnifier.
+
+Compares the old per-frame path (np.array copy, BGR slice, fresh resize
+output, new QImage + QPixmap) with the reusable BGRA pipeline.
+
+Run: python benchmarks/bench_output_pipeline.py [--frames 300]
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import cv2
+import numpy as np
+from mss.screenshot import ScreenShot
+from PyQt5.QtGui import QImage, QPixmap
+from PyQt5.QtWidgets import QApplication
+
+
+def fake_shot(width, height):
+    rng = np.random.default_rng(0)
+    data = bytearray(rng.integers(0, 255, width * height * 4, dtype=np.uint8).tobytes())
+    return ScreenShot(data, {"left": 0, "top": 0, "width": width, "height": height})
+
+
+def old_path(shot, out_w, out_h):
+    src = np.array(shot)[:, :, :3]
+    magnified = cv2.resize(src, (out_w, out_h), interpolation=cv2.INTER_LINEAR)
+    h, w, _ = magnified.shape
+    q_img = QImage(magnified.data, w, h, 3 * w, QImage.Format_BGR888)
+    return QPixmap.fromImage(q_img)
+
+
+class NewPath:
+    def __init__(self, out_w, out_h):
+        self.out_w, self.out_h = out_w, out_h
+        self.out = np.empty((out_h, out_w, 4), dtype=np.uint8)
+        self.image = QImage(self.out.data, out_w, out_h, 4 * out_w, QImage.Format_RGB32)
+
+    def __call__(self, shot):
+        src = np.frombuffer(shot.raw, dtype=np.uint8).reshape(shot.height, shot.width, 4)
+        cv2.resize(src, (self.out_w, self.out_h), dst=self.out, interpolation=cv2.INTER_LINEAR)
+        return self.image
+
+
+def measure(fn, frames):
+    fn()  # warm up
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    for _ in range(frames):
+        fn()
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed / frames * 1000.0, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=300)
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)  # noqa: F841 - QPixmap needs a GUI application
+    # peak = largest amount of NumPy/Python memory alive at once while rendering;
+    # Qt's own QPixmap allocations are not visible to tracemalloc and come on top for the old path
+    print(f"{'window':>10} {'scale':>5} | {'old ms':>7} {'old peak KiB':>12} | {'new ms':>7} {'new peak KiB':>12}")
+    for out_w, out_h in ((800, 600), (1600, 1200)):
+        for scale in (2.0, 4.0, 12.0):
+            shot = fake_shot(int(out_w / scale), int(out_h / scale))
+            new = NewPath(out_w, out_h)
+            old_ms, old_peak = measure(lambda: old_path(shot, out_w, out_h), args.frames)
+            new_ms, new_peak = measure(lambda: new(shot), args.frames)
+            print(f"{out_w:>5}x{out_h:<4} {scale:>5.0f} | {old_ms:7.3f} {old_peak / 1024:12.1f} | "
+                  f"{new_ms:7.3f} {new_peak / 1024:12.1f}")
+
+
+if __name__ == "__main__":
+    main()
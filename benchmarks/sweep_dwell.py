@@ -0,0 +1,88 @@
+"""Sweep dwell settings over a recorded gaze trace with the offline fixation detectors.
+
+Reports how many dwells each (radius or velocity threshold, hold time) pair
+would trigger and how long the lens would be shown, plus the sweep time.
+The trace is smoothed with the app's default gaze filter first, since the
+magnifier feeds smoothed gaze into the detector.
+
+Trace: CSV with 'x,y' per sample (as written for replay.py, NaN rows are
+blinks and skipped) or 'x,y,t' with t in seconds. Without --trace a scripted
+gaze path is used.
+
+Run: python benchmarks/sweep_dwell.py --trace trace.csv [--rate 30] [--csv grid.csv]
+     python benchmarks/sweep_dwell.py --detector ivt --velocities 200 3000 40
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fixation import sweep_dispersion, sweep_velocity  # noqa: E402
+from gaze_filters import FILTERS, create_filter  # noqa: E402
+
+
+def load_trace(args):
+    if args.trace:
+        data = np.genfromtxt(args.trace, delimiter=",", dtype=np.float64, filling_values=np.nan)
+        data = data.reshape(len(data), -1)
+        t = data[:, 2] if data.shape[1] > 2 else np.arange(len(data)) / args.rate
+        x, y = data[:, 0], data[:, 1]
+    else:
+        from replay import scripted_gaze
+        xy = scripted_gaze(args.samples, 1920, 1080)
+        x, y = xy[:, 0], xy[:, 1]
+        t = np.arange(len(x)) / args.rate
+    keep = ~(np.isnan(x) | np.isnan(y))
+    return t[keep], x[keep], y[keep]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--trace", help="gaze trace CSV (x,y or x,y,t)")
+    parser.add_argument("--rate", type=float, default=30.0, help="samples per second if the trace has no t")
+    parser.add_argument("--samples", type=int, default=18000, help="length of the scripted trace")
+    parser.add_argument("--filter", default=next(iter(FILTERS)), choices=list(FILTERS))
+    parser.add_argument("--detector", choices=["idt", "ivt"], default="idt")
+    parser.add_argument("--radii", type=float, nargs=3, default=[10, 300, 60], metavar=("MIN", "MAX", "N"))
+    parser.add_argument("--velocities", type=float, nargs=3, default=[100, 3000, 60], metavar=("MIN", "MAX", "N"))
+    parser.add_argument("--holds", type=float, nargs=3, default=[0.1, 2.0, 50], metavar=("MIN", "MAX", "N"))
+    parser.add_argument("--csv", help="write the whole grid here")
+    args = parser.parse_args()
+
+    t, x, y = load_trace(args)
+    smoothed = create_filter(args.filter).filter_batch(x, y, t)
+    x, y = smoothed[:, 0], smoothed[:, 1]
+
+    lo, hi, n = args.radii if args.detector == "idt" else args.velocities
+    params = np.linspace(lo, hi, int(n))
+    holds = np.linspace(args.holds[0], args.holds[1], int(args.holds[2]))
+    sweep = sweep_dispersion if args.detector == "idt" else sweep_velocity
+
+    t0 = time.perf_counter()
+    counts, dwell_time = sweep(t, x, y, params, holds)
+    elapsed = time.perf_counter() - t0
+
+    duration = t[-1] - t[0]
+    label = "radius px" if args.detector == "idt" else "velocity px/s"
+    print(f"{len(t)} samples ({duration:.0f} s), {len(params) * len(holds)} settings in {elapsed:.2f} s")
+    print(f"{label:>14} {'hold s':>7} {'dwells/min':>11} {'shown %':>8}")
+    # a coarse view of the grid: every few rows/columns
+    for i in range(0, len(params), max(1, len(params) // 6)):
+        for j in range(0, len(holds), max(1, len(holds) // 4)):
+            print(f"{params[i]:14.0f} {holds[j]:7.2f} {counts[i, j] * 60 / duration:11.1f} "
+                  f"{100 * dwell_time[i, j] / duration:8.1f}")
+
+    if args.csv:
+        with open(args.csv, "w") as fh:
+            fh.write(f"{label},hold_s,dwells,dwell_time_s\n")
+            for i, p in enumerate(params):
+                for j, h in enumerate(holds):
+                    fh.write(f"{p},{h},{counts[i, j]},{dwell_time[i, j]:.3f}\n")
+
+
+if __name__ == "__main__":
+    main()
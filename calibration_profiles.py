@@ -0,0 +1,133 @@
+"""Stored calibrations, so the 9-point calibration only runs when nothing fits.
+
+A profile is a pickled eyetrax model plus a JSON file with metadata. Profiles are
+keyed by camera, camera resolution and screen geometry, since a model calibrated
+for one of them does not predict screen coordinates for another.
+"""
+import copy
+import hashlib
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+PROFILE_VERSION = 1
+
+
+def default_profile_dir():
+    if sys.platform == 'win32':
+        base = os.environ.get('APPDATA', os.path.expanduser('~'))
+    elif sys.platform == 'darwin':
+        base = os.path.expanduser('~/Library/Application Support')
+    else:
+        base = os.environ.get('XDG_CONFIG_HOME', os.path.expanduser('~/.config'))
+    return os.path.join(base, 'GazeMagnifier', 'profiles')
+
+
+def profile_key(camera_id, camera_size, screen_geometry):
+    """Short stable id for a (camera, resolution, screen) combination."""
+    raw = json.dumps([str(camera_id), list(camera_size), list(screen_geometry)])
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()[:16]
+
+
+class CalibrationProfileStore:
+    def __init__(self, directory=None):
+        self.directory = directory or default_profile_dir()
+
+    def _paths(self, key):
+        return (os.path.join(self.directory, key + '.pkl'),
+                os.path.join(self.directory, key + '.json'))
+
+    def model_path(self, key):
+        """Pickled model file of the profile, e.g. for estimators in other processes."""
+        return self._paths(key)[0]
+
+    def load(self, key, estimator):
+        """Load the model for key into estimator. Returns the metadata dict, or None if
+        there is no usable profile."""
+        model_path, meta_path = self._paths(key)
+        if not (os.path.exists(model_path) and os.path.exists(meta_path)):
+            return None
+        t0 = time.perf_counter()
+        try:
+            with open(meta_path) as fh:
+                meta = json.load(fh)
+            if meta.get('version') != PROFILE_VERSION or meta.get('key') != key:
+                return None
+            estimator.load_model(model_path)
+        except Exception as e:
+            print(f"Ignoring broken calibration profile {key}: {e}")
+            return None
+        meta['load_ms'] = (time.perf_counter() - t0) * 1000
+        error = meta.get('validation_error_px')
+        print(f"Loaded calibration profile {key} in {meta['load_ms']:.1f} ms (created {meta.get('created')}, "
+              f"validation error {'n/a' if error is None else f'{error:.0f} px'})")
+        return meta
+
+    def save(self, key, estimator, **metadata):
+        """Store estimator's model under key, with metadata (camera, screen, errors, ...)."""
+        os.makedirs(self.directory, exist_ok=True)
+        model_path, meta_path = self._paths(key)
+        t0 = time.perf_counter()
+        estimator.save_model(model_path)
+        meta = {
+            'version': PROFILE_VERSION,
+            'key': key,
+            'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        }
+        meta.update(metadata)
+        meta['save_ms'] = (time.perf_counter() - t0) * 1000
+        with open(meta_path, 'w') as fh:
+            json.dump(meta, fh, indent=2)
+        print(f"Saved calibration profile {key} in {meta['save_ms']:.1f} ms")
+        return meta
+
+    def delete(self, key):
+        for path in self._paths(key):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def run_calibration(estimator, calibrate, camera_index=0):
+    """Run the given eyetrax calibration function and return (samples, validation error).
+
+    The validation error is a leave-one-point-out estimate: for every calibration
+    target the model is refitted without that target's samples and the mean
+    distance (px) of its predictions for them is taken. Returns (0, None) when the
+    calibration was cancelled.
+    """
+    captured = {}
+    train = estimator.train
+
+    def capture_train(X, y, variable_scaling=None):
+        captured['X'], captured['y'] = X, y
+        train(X, y, variable_scaling)
+
+    estimator.train = capture_train
+    try:
+        calibrate(estimator, camera_index)
+    finally:
+        del estimator.train
+
+    if 'X' not in captured:
+        return 0, None
+    return len(captured['X']), leave_one_point_out_error(estimator.model, captured['X'], captured['y'])
+
+
+def leave_one_point_out_error(model, X, y):
+    X = np.asarray(X)
+    y = np.asarray(y, dtype=np.float64)
+    targets = np.unique(y, axis=0)
+    if len(targets) < 3:
+        return None
+    errors = []
+    for target in targets:
+        held_out = np.all(y == target, axis=1)
+        fold = copy.deepcopy(model)
+        fold.train(X[~held_out], y[~held_out])
+        pred = np.asarray(fold.predict(X[held_out]))
+        errors.append(np.linalg.norm(pred - y[held_out], axis=1))
+    return float(np.mean(np.concatenate(errors)))
@@ -0,0 +1,338 @@
+"""Camera sources and the adaptive camera controller.
+
+The gaze worker reads frames from a camera source. All sources have the part
+of cv2.VideoCapture's interface the app uses (read, get, set, release) plus
+request_mode(), which asks for a resolution and frame rate:
+
+- OpenCVSource: a webcam (or anything cv2.VideoCapture opens). The mode is
+  negotiated with cap.set and read back, since drivers may pick something
+  else or ignore the request.
+- FileSource: a recorded video, scaled to the requested resolution and
+  played at the requested frame rate.
+- SyntheticSource: generated frames at the requested resolution and rate.
+
+When the delivered frame rate is above the requested one (the driver ignored
+the request), read() skips frames, so the gaze inference still only runs at
+the requested rate. Skipped frames are only grabbed, not decoded, where the
+source allows it. request_mode() may be called from any thread; the change
+is applied on the thread that reads, before its next frame, because a
+VideoCapture must not be reconfigured while another thread reads from it.
+
+CameraController picks the mode from the magnifier state: full rate while
+the lens is shown or a long-blink gesture may be in progress, a lower rate
+while waiting for a dwell, and a low resolution and rate while the magnifier
+is hidden. Switching up happens at once, switching down only after the lower
+state has lasted idle_after seconds. It also measures process CPU use and the
+gaze sample rate per state.
+"""
+import threading
+import time
+from collections import namedtuple
+
+import cv2
+import numpy as np
+
+CameraMode = namedtuple("CameraMode", ["width", "height", "fps"])
+
+# Magnifier states, from the most to the least demanding
+GESTURE = "gesture"  # eyes closed, a long-blink zoom gesture may be under way
+ACTIVE = "active"  # lens shown
+WAITING = "waiting"  # dwell mode, lens hidden until a dwell
+HIDDEN = "hidden"  # magnifier hidden by the user
+STATES = [GESTURE, ACTIVE, WAITING, HIDDEN]
+
+
+class CameraSource:
+    """Base class: mode handling and frame skipping around _read()/_configure()."""
+
+    def __init__(self):
+        self.mode = None  # mode currently in effect (as far as the source can tell)
+        self._pending = None
+        self._lock = threading.Lock()
+        self._last_delivered = None
+        self._last_arrival = None  # when the source last gave a frame, read or skipped
+        self._interval = 0.0  # time between the last two frames of the source
+        self.frames_read = 0
+        self.frames_skipped = 0
+        self.mode_changes = 0
+
+    def request_mode(self, mode):
+        with self._lock:
+            self._pending = mode
+
+    def read(self):
+        with self._lock:
+            pending, self._pending = self._pending, None
+        if pending is not None and pending != self.mode:
+            self.mode = self._configure(pending)
+            self.mode_changes += 1
+        while True:
+            fps = self.mode.fps if self.mode is not None else 0
+            if fps > 0 and self._last_delivered is not None and self._last_arrival is not None:
+                # decide before fetching, so a skipped frame is never decoded; the next frame
+                # is expected one source interval after the last one
+                arrival = max(time.perf_counter(), self._last_arrival + self._interval)
+                # 10 % tolerance, so frames arriving a little early at the requested rate are not skipped
+                if arrival - self._last_delivered < 0.9 / fps:
+                    if not self._skip():
+                        return False, None
+                    self.frames_read += 1
+                    self.frames_skipped += 1
+                    self._arrived()
+                    continue
+            ret, frame = self._read()
+            if not ret:
+                return ret, frame
+            self.frames_read += 1
+            self._arrived()
+            self._last_delivered = self._last_arrival
+            return ret, frame
+
+    def _arrived(self):
+        now = time.perf_counter()
+        if self._last_arrival is not None:
+            self._interval = now - self._last_arrival
+        self._last_arrival = now
+
+    def _read(self):
+        raise NotImplementedError
+
+    def _skip(self):
+        """Drop the next frame, return whether there was one."""
+        return self._read()[0]
+
+    def _configure(self, mode):
+        """Apply mode, return the mode actually in effect (fps is what read() throttles to)."""
+        return mode
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FRAME_WIDTH and self.mode is not None:
+            return float(self.mode.width)
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT and self.mode is not None:
+            return float(self.mode.height)
+        if prop == cv2.CAP_PROP_FPS and self.mode is not None:
+            return float(self.mode.fps)
+        return 0.0
+
+    def set(self, prop, value):
+        return False
+
+    def getBackendName(self):
+        return type(self).__name__
+
+    def release(self):
+        pass
+
+    def stats(self):
+        return {"mode": tuple(self.mode) if self.mode else None, "frames_read": self.frames_read,
+                "frames_skipped": self.frames_skipped, "mode_changes": self.mode_changes}
+
+
+class OpenCVSource(CameraSource):
+    def __init__(self, index):
+        super().__init__()
+        self.cap = cv2.VideoCapture(index)
+        self.mode = self._current_mode()
+
+    def _current_mode(self):
+        return CameraMode(int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+                          self.cap.get(cv2.CAP_PROP_FPS))
+
+    def _configure(self, mode):
+        if (mode.width, mode.height) != (self.mode.width, self.mode.height):
+            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, mode.width)
+            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, mode.height)
+        self.cap.set(cv2.CAP_PROP_FPS, mode.fps)
+        actual = self._current_mode()
+        # throttle in read() to the requested rate if the driver delivers more (or does not say)
+        fps = mode.fps if actual.fps <= 0 or actual.fps > mode.fps else actual.fps
+        return actual._replace(fps=fps)
+
+    def _read(self):
+        return self.cap.read()
+
+    def _skip(self):
+        return self.cap.grab()  # no decode
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def get(self, prop):
+        return self.cap.get(prop)
+
+    def set(self, prop, value):
+        return self.cap.set(prop, value)
+
+    def getBackendName(self):
+        return self.cap.getBackendName()
+
+    def release(self):
+        self.cap.release()
+
+
+class _PacedSource(CameraSource):
+    """Delivers frames no faster than the mode's frame rate, like a camera would (unpaced if it is 0)."""
+
+    def __init__(self, mode):
+        super().__init__()
+        self.mode = mode
+        self._next_time = None
+
+    def _pace(self):
+        if self.mode.fps <= 0:
+            return
+        now = time.perf_counter()
+        if self._next_time is not None and now < self._next_time:
+            time.sleep(self._next_time - now)
+            now = self._next_time
+        self._next_time = now + 1.0 / self.mode.fps
+
+
+class FileSource(_PacedSource):
+    """A video file played at the requested mode; loops by default."""
+
+    def __init__(self, path, mode=None, loop=True):
+        self.cap = cv2.VideoCapture(path)
+        if not self.cap.isOpened():
+            raise IOError(f"Cannot open video {path}")
+        native = CameraMode(int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+                            self.cap.get(cv2.CAP_PROP_FPS) or 30.0)
+        super().__init__(mode or native)
+        self.native = native
+        self.loop = loop
+
+    def _read(self):
+        ret, frame = self.cap.read()
+        if not ret and self.loop:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self.cap.read()
+        if not ret:
+            return ret, frame
+        if (frame.shape[1], frame.shape[0]) != (self.mode.width, self.mode.height):
+            frame = cv2.resize(frame, (self.mode.width, self.mode.height), interpolation=cv2.INTER_AREA)
+        self._pace()
+        return True, frame
+
+    def release(self):
+        self.cap.release()
+
+
+class SyntheticSource(_PacedSource):
+    """Reproducible noise frames at the requested mode, optionally only `frames` of them."""
+
+    def __init__(self, mode=CameraMode(640, 480, 30.0), frames=None, seed=0):
+        super().__init__(mode)
+        self.remaining = frames
+        self._rng = np.random.default_rng(seed)
+        self._frames = []
+
+    def _configure(self, mode):
+        if (mode.width, mode.height) != (self.mode.width, self.mode.height):
+            self._frames = []
+        return mode
+
+    def _read(self):
+        if self.remaining is not None:
+            if self.remaining <= 0:
+                return False, None
+            self.remaining -= 1
+        if not self._frames:
+            # a few distinct frames per resolution are enough
+            self._frames = [self._rng.integers(0, 255, (self.mode.height, self.mode.width, 3), dtype=np.uint8)
+                            for _ in range(4)]
+        self._pace()
+        return True, self._frames[self.frames_read % len(self._frames)]
+
+
+class CameraController:
+    """Requests a camera mode per magnifier state and measures what that costs."""
+
+    def __init__(self, source, active_mode=None, waiting_fps=15.0, hidden_mode=CameraMode(320, 240, 5.0),
+                 idle_after=3.0, sample_counter=None):
+        """active_mode defaults to the source's current resolution at 60 fps (the driver may deliver less).
+        sample_counter() returns the number of gaze samples so far, for the sample rate."""
+        self.source = source
+        base = source.mode or CameraMode(640, 480, 30.0)
+        active_mode = active_mode or base._replace(fps=60.0)
+        self.modes = {
+            GESTURE: active_mode,
+            ACTIVE: active_mode,
+            WAITING: active_mode._replace(fps=waiting_fps),
+            HIDDEN: hidden_mode,
+        }
+        self.idle_after = idle_after
+        self.sample_counter = sample_counter
+        self.enabled = True
+
+        self.state = ACTIVE
+        self._lower_since = None  # when a less demanding state was first reported
+        self.switches = 0
+        self.time_in = {state: 0.0 for state in STATES}
+        self._state_since = time.perf_counter()
+        self._cpu_mark = (time.perf_counter(), time.process_time(), self._samples())
+        self.cpu_percent = 0.0
+        self.sample_rate = 0.0
+        source.request_mode(self.modes[self.state])
+
+    def _samples(self):
+        return self.sample_counter() if self.sample_counter is not None else 0
+
+    def set_enabled(self, enabled):
+        """Off: stay in the active mode."""
+        self.enabled = enabled
+        self._lower_since = None
+        self._switch(ACTIVE, time.perf_counter())
+
+    def update(self, state, now=None):
+        """Report the current magnifier state. Returns True if the requested mode changed."""
+        now = time.perf_counter() if now is None else now
+        if not self.enabled or state == self.state:
+            self._lower_since = None
+            return False
+        if STATES.index(state) < STATES.index(self.state):
+            self._lower_since = None
+            return self._switch(state, now)
+        # less demanding: only after it lasted idle_after seconds
+        if self._lower_since is None:
+            self._lower_since = now
+        if now - self._lower_since < self.idle_after:
+            return False
+        self._lower_since = None
+        return self._switch(state, now)
+
+    def _switch(self, state, now):
+        self.time_in[self.state] += now - self._state_since
+        self._state_since = now
+        changed = self.modes[state] != self.modes[self.state]
+        self.state = state
+        if changed:
+            self.switches += 1
+            self.source.request_mode(self.modes[state])
+        return changed
+
+    def measure(self, min_interval=1.0):
+        """CPU use of the process (percent of one core) and gaze samples per second since the
+        last measurement; calls less than min_interval seconds apart return the previous values."""
+        now, cpu, samples = time.perf_counter(), time.process_time(), self._samples()
+        t0, cpu0, samples0 = self._cpu_mark
+        if now - t0 < min_interval:
+            return self.cpu_percent, self.sample_rate
+        if now - t0 > 0:
+            self.cpu_percent = (cpu - cpu0) / (now - t0) * 100
+            self.sample_rate = (samples - samples0) / (now - t0)
+        self._cpu_mark = (now, cpu, samples)
+        return self.cpu_percent, self.sample_rate
+
+    def summary(self):
+        """One line for the tray menu."""
+        mode = self.source.mode or self.modes[self.state]
+        return (f"{self.state.capitalize()}: {mode.width}x{mode.height} @ {mode.fps:.0f} fps - "
+                f"CPU {self.cpu_percent:.0f} %, {self.sample_rate:.1f} samples/s")
+
+    def stats(self):
+        time_in = dict(self.time_in)
+        time_in[self.state] += time.perf_counter() - self._state_since
+        return {"state": self.state, "switches": self.switches,
+                "time_in": {state: round(t, 1) for state, t in time_in.items()},
+                "cpu_percent": round(self.cpu_percent, 1), "sample_rate": round(self.sample_rate, 1),
+                "source": self.source.stats()}
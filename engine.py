@@ -0,0 +1,263 @@
+"""Capture, scale and compose of the lens image, without Qt.
+
+MagnificationEngine turns a gaze point, a frame provider and a LensConfig into
+a BGRA NumPy frame. Magnifier is the Qt front end over it (window, tray,
+gaze handling) and only wraps the engine's output buffer in a QImage; the
+engine itself runs headless, e.g. for offline rendering or benchmarks.
+
+Frame providers have one method, crop(region), returning the BGRA pixels of
+an mss-style region dict (a view where possible):
+
+- ScreenProvider grabs from mss (or anything with its grab() interface),
+- FrameProvider serves regions of one NumPy screen frame,
+- MultiMonitorFrameCache (monitors.py) serves the background captures.
+
+render_batch() renders many gaze points against one screen frame in one
+vectorized pass. For the rectangle lens at integer zoom, the regions are
+stacked and scaled by a single cv2.resize call. For the other shapes they are
+stacked the same way and render()'s fixed-point remap table, shifted to every
+block, is applied with one cv2.remap call (split into chunks only to bound the
+memory). The rectangle lens at other zoom factors is scaled region by region.
+"""
+from collections import namedtuple
+
+import cv2
+import numpy as np
+
+from lens_shapes import RECTANGLE, RemapCache, render_shape
+from monitors import MonitorIndex, grab_composed
+from perf_stats import PERF
+from render_quality import sharpen
+
+# sharpen: whether the text sharpening is applied (already resolved against the quality profile)
+LensConfig = namedtuple("LensConfig", ["width", "height", "scale", "shape", "interpolation", "sharpen"],
+                        defaults=(RECTANGLE, cv2.INTER_LINEAR, False))
+
+BATCH_PIXELS = 1 << 22  # output pixels per cv2.remap call in render_batch, bounds the table memory
+BATCH_PAD = 4  # rows/columns repeated around each stacked region, enough for the widest (Lanczos) kernel
+
+
+class ScreenProvider:
+    """Grabs regions from the screen, per monitor when they straddle monitors."""
+
+    def __init__(self, sct, monitor_index):
+        self.sct = sct
+        self.monitor_index = monitor_index
+        self._composed = None  # reusable buffer for regions across monitors
+
+    def crop(self, region):
+        src = grab_composed(self.sct, self.monitor_index, region, self._composed)
+        if src.flags.owndata:
+            self._composed = src
+        return src
+
+
+class FrameProvider:
+    """Serves regions of one BGRA frame whose top-left pixel is at (left, top) on the desktop."""
+
+    def __init__(self, frame, left=0, top=0):
+        self.frame = frame
+        self.left = left
+        self.top = top
+
+    @property
+    def monitors(self):
+        h, w = self.frame.shape[:2]
+        return [{"left": self.left, "top": self.top, "width": w, "height": h}]
+
+    def crop(self, region):
+        x = region["left"] - self.left
+        y = region["top"] - self.top
+        return self.frame[y:y + region["height"], x:x + region["width"]]
+
+
+class MagnificationEngine:
+    def __init__(self, monitor_index, provider=None):
+        """monitor_index: MonitorIndex of the desktop; provider: default frame provider for grab()/render()."""
+        self.monitor_index = monitor_index
+        self.provider = provider
+        self.remap_cache = RemapCache()
+        self.out = None  # persistent output buffer of render()
+        self._sharp_src = None
+
+    @classmethod
+    def for_frame(cls, frame, left=0, top=0):
+        """Engine over a single screen frame, for offline rendering."""
+        provider = FrameProvider(frame, left, top)
+        return cls(MonitorIndex(provider.monitors), provider)
+
+    def source_size(self, config):
+        """(width, height) of the screen region a lens with config shows."""
+        if config.shape == RECTANGLE:
+            return int(config.width / config.scale), int(config.height / config.scale)
+        # the other shapes keep the surroundings unmagnified, so they need a window-sized region
+        return config.width, config.height
+
+    def region_around(self, x, y, config):
+        src_w, src_h = self.source_size(config)
+        region = {"left": x - src_w // 2, "top": y - src_h // 2, "width": src_w, "height": src_h}
+        # keep it on the monitor under the gaze, or straddling into a neighbouring one
+        return self.monitor_index.clamp_region(region, x, y)
+
+    def grab(self, x, y, config, provider=None):
+        """BGRA pixels of the region around (x, y), from provider or the default one."""
+        t0 = PERF.start()
+        src = (provider or self.provider).crop(self.region_around(x, y, config))
+        PERF.stop("grab_region", t0)
+        return src
+
+    def output_buffer(self, config):
+        """The persistent output buffer, reallocated when the window size changed."""
+        shape = (config.height, config.width, 4)
+        if self.out is None or self.out.shape != shape:
+            self.out = np.empty(shape, dtype=np.uint8)
+        return self.out
+
+    def sharpened(self, src, config):
+        """src with the text sharpening applied if config asks for it, else src itself."""
+        if not config.sharpen:
+            return src
+        if self._sharp_src is None or self._sharp_src.shape != src.shape:
+            self._sharp_src = np.empty_like(src)
+        return sharpen(src, dst=self._sharp_src)
+
+    def render_source(self, src, config, out=None):
+        """Scale (or remap, for the non-rectangular shapes) src into out, by default the output buffer."""
+        if out is None:
+            out = self.output_buffer(config)
+        if config.shape != RECTANGLE and src.shape[:2] == out.shape[:2]:
+            t0 = PERF.start()
+            maps = self.remap_cache.get(config.shape, config.width, config.height, config.scale)
+            render_shape(self.sharpened(src, config), maps, config.interpolation, dst=out)
+            PERF.stop("cv2.remap", t0)
+            return out
+        t0 = PERF.start()
+        cv2.resize(self.sharpened(src, config), (config.width, config.height), dst=out,
+                   interpolation=config.interpolation)
+        PERF.stop("cv2.resize", t0)
+        return out
+
+    def render_tiles(self, src, tiles, config, out):
+        """Re-render only the output pixels of the given (y0, y1, x0, x1) source tiles of a
+        rectangular lens. Returns the updated output rects as (x, y, width, height)."""
+        fx = config.width / src.shape[1]
+        fy = config.height / src.shape[0]
+        scaled_from = self.sharpened(src, config)
+        rects = []
+        for y0, y1, x0, x1 in tiles:
+            dx0, dx1 = int(round(x0 * fx)), int(round(x1 * fx))
+            dy0, dy1 = int(round(y0 * fy)), int(round(y1 * fy))
+            if dx1 <= dx0 or dy1 <= dy0:
+                continue
+            # same pixel mapping as cv2.resize, but sampling from the whole source so
+            # neighbouring pixels across the tile border are used and no seams appear
+            m = np.array([[1 / fx, 0, (dx0 + 0.5) / fx - 0.5],
+                          [0, 1 / fy, (dy0 + 0.5) / fy - 0.5]])
+            out[dy0:dy1, dx0:dx1] = cv2.warpAffine(
+                scaled_from, m, (dx1 - dx0, dy1 - dy0),
+                flags=config.interpolation | cv2.WARP_INVERSE_MAP, borderMode=cv2.BORDER_REPLICATE)
+            rects.append((dx0, dy0, dx1 - dx0, dy1 - dy0))
+        return rects
+
+    def render(self, x, y, config, provider=None):
+        """Grab and render the lens for (x, y). Returns (out, src); out is the reused output buffer."""
+        src = self.grab(x, y, config, provider)
+        return self.render_source(src, config), src
+
+    def render_batch(self, frame, points, config, left=0, top=0):
+        """Render the lens for every (x, y) in points against one BGRA screen frame.
+
+        Returns an (N, height, width, 4) array with the lens for each point as
+        render() would produce it from this frame: pixel-identical except for the
+        rectangle lens at integer zoom without nearest neighbour, which is at most
+        one level off (cv2.resize rounds differently for the stacked image);
+        bench_engine.py checks these bounds.
+        Regions are clamped with this engine's monitor index; (left, top) is the
+        desktop position of the frame's top-left pixel.
+        """
+        regions = [self.region_around(x, y, config) for x, y in points]
+        if not regions:
+            return np.empty((0, config.height, config.width, 4), dtype=np.uint8)
+        src_w, src_h = self.source_size(config)
+        if config.shape == RECTANGLE and config.height % src_h == 0:
+            return self._batch_resize(frame, regions, config, left, top)
+        if config.shape == RECTANGLE:
+            # a remap table with the pixel mapping of cv2.resize is slower than scaling the
+            # regions one by one, and its Lanczos weights (quantized to 1/32 px) end up to
+            # 6 levels away from cv2.resize
+            out = np.empty((len(regions), config.height, config.width, 4), dtype=np.uint8)
+            provider = FrameProvider(frame, left, top)
+            for k, region in enumerate(regions):
+                self.render_source(provider.crop(region), config, out[k])
+            return out
+        return self._batch_remap(frame, regions, config, left, top)
+
+    def _stack_regions(self, frame, regions, stack, left, top, sharpened, pad_columns):
+        """Copy the regions (sharpened one by one, like render() does) into the blocks of stack,
+        with BATCH_PAD replicated rows (and columns if pad_columns) around each."""
+        p = BATCH_PAD
+        cp = p if pad_columns else 0
+        src_h, src_w = stack.shape[1] - 2 * p, stack.shape[2] - 2 * cp
+        for k, r in enumerate(regions):
+            y, x = r["top"] - top, r["left"] - left
+            region = frame[y:y + src_h, x:x + src_w]
+            stack[k, p:p + src_h, cp:cp + src_w] = sharpen(region) if sharpened else region
+        k = len(regions)
+        if cp:
+            stack[:k, p:p + src_h, :cp] = stack[:k, p:p + src_h, cp:cp + 1]
+            stack[:k, p:p + src_h, cp + src_w:] = stack[:k, p:p + src_h, cp + src_w - 1:cp + src_w]
+        stack[:k, :p] = stack[:k, p:p + 1]
+        stack[:k, p + src_h:] = stack[:k, p + src_h - 1:p + src_h]
+
+    def _batch_resize(self, frame, regions, config, left, top):
+        """Rectangle lens with an integer vertical zoom: all regions stacked on top of each
+        other and scaled by one cv2.resize call.
+
+        Each region is padded with BATCH_PAD copies of its first and last row, so
+        the interpolation at a region's top and bottom edge sees the same pixels
+        as when the region is scaled alone. With an integer zoom every padded
+        block maps to a whole number of output rows, and the lens images are
+        views into the scaled stack.
+        """
+        src_w, src_h = self.source_size(config)
+        fy = config.height // src_h
+        n = len(regions)
+        p = BATCH_PAD
+        stack = np.empty((n, src_h + 2 * p, src_w, 4), dtype=np.uint8)
+        self._stack_regions(frame, regions, stack, left, top, config.sharpen, pad_columns=False)
+        stack = stack.reshape(-1, src_w, 4)
+        t0 = PERF.start()
+        scaled = cv2.resize(stack, (config.width, stack.shape[0] * fy), interpolation=config.interpolation)
+        PERF.stop("cv2.resize", t0)
+        block = (src_h + 2 * p) * fy
+        return scaled.reshape(n, block, config.width, 4)[:, p * fy:p * fy + config.height]
+
+    def _batch_remap(self, frame, regions, config, left, top):
+        """Bubble, fisheye and reading strip: the regions stacked with BATCH_PAD replicated
+        rows and columns around each, which stands in for the replicated border render()
+        gets for a region alone, and render()'s cached fixed-point table shifted to every
+        block, applied with one cv2.remap call per chunk (bounded by BATCH_PIXELS). The
+        shift is the same for every chunk, so the shifted table is built once.
+        """
+        h, w = config.height, config.width
+        n = len(regions)
+        p = BATCH_PAD
+        bh, bw = h + 2 * p, w + 2 * p
+        # fixed-point coordinates are int16, and cv2.remap limits the output to fewer than SHRT_MAX rows
+        per_call = max(1, min(BATCH_PIXELS // (w * h), (np.iinfo(np.int16).max - 1) // bh, n))
+        map1, map2 = self.remap_cache.get(config.shape, w, h, config.scale)
+        shift = np.stack([np.full(per_call, p), np.arange(per_call) * bh + p], axis=1).astype(np.int16)
+        big1 = (map1[None] + shift[:, None, None, :]).reshape(-1, w, 2)
+        # nearest neighbour only uses the integer table, as in render_shape()
+        big2 = None if config.interpolation == cv2.INTER_NEAREST else np.tile(map2, (per_call, 1))
+        stack = np.empty((per_call, bh, bw, 4), dtype=np.uint8)
+        out = np.empty((n, h, w, 4), dtype=np.uint8)
+        for i in range(0, n, per_call):
+            chunk = regions[i:i + per_call]
+            k = len(chunk)
+            self._stack_regions(frame, chunk, stack, left, top, config.sharpen, pad_columns=True)
+            t0 = PERF.start()
+            cv2.remap(stack[:k].reshape(-1, bw, 4), big1[:k * h], None if big2 is None else big2[:k * h],
+                      config.interpolation, dst=out[i:i + k].reshape(-1, w, 4), borderMode=cv2.BORDER_REPLICATE)
+            PERF.stop("cv2.remap", t0)
+        return out
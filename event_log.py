@@ -0,0 +1,181 @@
+"""Structured event log for field sessions.
+
+Call sites look like
+
+    EVENTS.emit("blink_start", INFO)
+    EVENTS.emit("gaze", DEBUG, x=sample.x, y=sample.y)
+
+emit() returns right away while recording is off or the event is below the
+current level. Otherwise it writes the event into slots of a preallocated ring
+buffer; a background thread formats the buffered events as JSON lines and
+writes them to a file that is rotated at max_bytes. Nothing on the GUI thread
+touches the file. If the writer falls behind by more than the ring capacity,
+the oldest events are overwritten and counted as dropped.
+
+Set GAZE_EVENTS=1 to record from startup, or toggle "Record Event Log" in the tray.
+"""
+import json
+import math
+import os
+import threading
+import time
+from datetime import datetime
+
+from calibration_profiles import default_profile_dir
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+LEVEL_NAMES = {DEBUG: "debug", INFO: "info", WARNING: "warning", ERROR: "error"}
+
+# Event kinds used by the application; emit() accepts others too
+KINDS = ["gaze", "blink_start", "blink_end", "long_blink", "dwell_start", "dwell_end", "zoom", "monitors", "error"]
+
+
+def default_log_dir():
+    return os.path.join(os.path.dirname(default_profile_dir()), 'events')
+
+
+class EventLog:
+    def __init__(self, capacity=8192, level=INFO, max_bytes=5 * 1024 * 1024, backups=3, flush_interval=0.5):
+        self.capacity = capacity
+        self.level = level
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.flush_interval = flush_interval
+        self.recording = False
+        self.path = None
+
+        # one (t, kind code, level, x, y, value, text) slot per event;
+        # x, y and value are NaN when an event does not use them
+        self._slots = [None] * capacity
+        self._kinds = list(KINDS)
+        self._kind_codes = {name: i for i, name in enumerate(self._kinds)}
+        self._head = 0  # total events written into the ring
+        self._tail = 0  # total events taken by the writer (or dropped)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._writer = None
+
+        self.emitted = 0
+        self.written = 0
+        self.dropped = 0
+        self.files = 0
+
+    def emit(self, kind, level=INFO, x=math.nan, y=math.nan, value=math.nan, text=None):
+        """Record one event. Returns False if it was filtered out."""
+        if not self.recording or level < self.level:
+            return False
+        t = time.time()
+        with self._lock:
+            code = self._kind_codes.get(kind)
+            if code is None:
+                code = self._kind_codes[kind] = len(self._kinds)
+                self._kinds.append(kind)
+            self._slots[self._head % self.capacity] = (t, code, level, x, y, value, text)
+            self._head += 1
+            self.emitted += 1
+            if self._head - self._tail > self.capacity:
+                self._tail += 1
+                self.dropped += 1
+            backlog = self._head - self._tail
+        if backlog == self.capacity // 2:
+            self._wake.set()
+        return True
+
+    def error(self, text, **fields):
+        """Record an error; printed instead while not recording, so it does not get lost."""
+        if not self.emit("error", ERROR, text=text, **fields):
+            print(text)
+
+    def start(self, directory=None):
+        """Start recording into a new file in directory. Returns its path."""
+        if self.recording:
+            return self.path
+        directory = directory or default_log_dir()
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, datetime.now().strftime("events-%Y%m%d-%H%M%S.jsonl"))
+        with self._lock:
+            self._tail = self._head
+        self._wake.clear()
+        self._writer = threading.Thread(target=self._write_loop, args=(self.path,), daemon=True)
+        self.recording = True
+        self._writer.start()
+        return self.path
+
+    def stop(self):
+        """Stop recording; events already emitted are still written."""
+        if not self.recording:
+            return
+        self.recording = False
+        self._wake.set()
+        self._writer.join(timeout=2.0)
+        self._writer = None
+
+    def _take(self):
+        """Copy the buffered events out of the ring (under the lock, no formatting)."""
+        with self._lock:
+            start, end = self._tail, self._head
+            self._tail = end
+            if start == end:
+                return None
+            i, j = start % self.capacity, end % self.capacity
+            events = self._slots[i:j] if i < j else self._slots[i:] + self._slots[:j]
+            return events, list(self._kinds)
+
+    def _format(self, batch):
+        events, names = batch
+        lines = []
+        for t, kind, level, x, y, value, text in events:
+            event = {"t": round(t, 4), "kind": names[kind], "level": LEVEL_NAMES.get(level, level)}
+            if x == x:  # not NaN
+                event["x"] = round(x, 1)
+            if y == y:
+                event["y"] = round(y, 1)
+            if value == value:
+                event["value"] = round(value, 4)
+            if text is not None:
+                event["text"] = text
+            lines.append(json.dumps(event, separators=(",", ":")))
+        return "\n".join(lines) + "\n"
+
+    def _write_loop(self, path):
+        f = open(path, "a", encoding="utf-8")
+        self.files += 1
+        try:
+            while True:
+                self._wake.wait(self.flush_interval)
+                self._wake.clear()
+                done = not self.recording
+                batch = self._take()
+                if batch is not None:
+                    data = self._format(batch)
+                    if f.tell() + len(data) > self.max_bytes and f.tell() > 0:
+                        f.close()
+                        self._rotate(path)
+                        f = open(path, "a", encoding="utf-8")
+                        self.files += 1
+                    f.write(data)
+                    f.flush()
+                    self.written += len(batch[0])
+                if done:
+                    break
+        finally:
+            f.close()
+
+    def _rotate(self, path):
+        """events.jsonl -> events.jsonl.1 -> ... -> events.jsonl.<backups> (deleted after that)."""
+        for n in range(self.backups - 1, 0, -1):
+            if os.path.exists(f"{path}.{n}"):
+                os.replace(f"{path}.{n}", f"{path}.{n + 1}")
+        if self.backups > 0:
+            os.replace(path, f"{path}.1")
+        else:
+            os.remove(path)
+
+    def stats(self):
+        return {"emitted": self.emitted, "written": self.written, "dropped": self.dropped, "files": self.files}
+
+
+EVENTS = EventLog()
@@ -0,0 +1,148 @@
+"""Face region-of-interest tracking in front of GazeEstimator.extract_features.
+
+eyetrax runs MediaPipe FaceMesh on the whole webcam frame, although the face
+usually covers a small, slowly moving part of it. FaceRoiTracker crops the
+frame to a padded box around the face found in the previous frame and only
+falls back to the full frame when the face is lost or on a periodic refresh.
+
+The crop always has the aspect ratio of the full frame, and the optional
+downscale is uniform. MediaPipe returns landmarks normalised to the image, so
+cropping and scaling like this changes every landmark by the same translation
+and scale. eyetrax subtracts the nose anchor, rotates into the face frame,
+divides by the inter-eye distance and uses an eye aspect ratio for blinks,
+which removes exactly that translation and scale. The features therefore come
+out the same as on the full frame and the calibrated model keeps predicting
+screen coordinates without any remapping.
+
+That holds for the landmark geometry, but FaceMesh runs in tracking mode and
+changing crops reset its tracking, so the landmarks are not bit-identical.
+USE_FACE_ROI in main.py is therefore off by default; turn it on only after
+benchmarks/bench_face_roi.py on your recorded clips shows a gain without
+added gaze error.
+"""
+import cv2
+
+
+class _LandmarkTap:
+    """Wraps the estimator's FaceMesh to keep the last result for the ROI update."""
+
+    def __init__(self, face_mesh):
+        self.face_mesh = face_mesh
+        self.last_results = None
+
+    def process(self, image):
+        self.last_results = self.face_mesh.process(image)
+        return self.last_results
+
+    def __getattr__(self, name):
+        return getattr(self.face_mesh, name)
+
+
+class FaceRoiTracker:
+    """Drop-in for a GazeEstimator in GazeWorker: same extract_features/predict interface."""
+
+    def __init__(self, estimator, padding=0.5, refresh_interval=90, downscale_width=None, min_width=160):
+        self.estimator = estimator
+        self.padding = padding  # extra space around the face, relative to the face size
+        self.refresh_interval = refresh_interval  # frames between forced full-frame runs
+        self.downscale_width = downscale_width  # shrink crops wider than this (px), None = never
+        self.min_width = min_width
+        self.enabled = True
+
+        if not isinstance(estimator.face_mesh, _LandmarkTap):
+            estimator.face_mesh = _LandmarkTap(estimator.face_mesh)
+        self._tap = estimator.face_mesh
+
+        self.roi = None  # (x, y, w, h) in frame pixels
+        self._frame_shape = None  # the adaptive camera control may change the resolution
+        self._frames_since_full = 0
+
+        self.full_frame_runs = 0
+        self.roi_runs = 0
+        self.lost = 0
+
+    def predict(self, features):
+        return self.estimator.predict(features)
+
+    def extract_features(self, frame):
+        if not self.enabled:
+            return self.estimator.extract_features(frame)
+
+        if frame.shape != self._frame_shape:
+            self._frame_shape = frame.shape
+            self.roi = None  # in pixels of the old resolution
+        if self.roi is not None and self._frames_since_full < self.refresh_interval:
+            features, blink = self._extract_in_roi(frame)
+            if features is not None:
+                return features, blink
+            # lost the face inside the crop, look at the whole frame again right away
+            self.lost += 1
+            self.roi = None
+        return self._extract_full(frame)
+
+    def _extract_full(self, frame):
+        features, blink = self.estimator.extract_features(frame)
+        self.full_frame_runs += 1
+        self._frames_since_full = 0
+        h, w = frame.shape[:2]
+        self._update_roi((0, 0, w, h), frame.shape)
+        return features, blink
+
+    def _extract_in_roi(self, frame):
+        x, y, w, h = self.roi
+        crop = frame[y:y + h, x:x + w]
+        if self.downscale_width and w > self.downscale_width:
+            crop = cv2.resize(crop, (self.downscale_width, int(round(h * self.downscale_width / w))),
+                              interpolation=cv2.INTER_AREA)
+        features, blink = self.estimator.extract_features(crop)
+        self.roi_runs += 1
+        self._frames_since_full += 1
+        if features is not None:
+            # landmarks are normalised to the crop, whatever size it was scaled to
+            self._update_roi(self.roi, frame.shape)
+        return features, blink
+
+    def _face_box(self, source_rect):
+        """Bounding box of the last landmarks in full-frame pixels, or None."""
+        results = self._tap.last_results
+        if results is None or not results.multi_face_landmarks:
+            return None
+        sx, sy, sw, sh = source_rect
+        xs = [lm.x for lm in results.multi_face_landmarks[0].landmark]
+        ys = [lm.y for lm in results.multi_face_landmarks[0].landmark]
+        return (sx + min(xs) * sw, sy + min(ys) * sh, sx + max(xs) * sw, sy + max(ys) * sh)
+
+    def _update_roi(self, source_rect, frame_shape):
+        box = self._face_box(source_rect)
+        if box is None:
+            self.roi = None
+            return
+        frame_h, frame_w = frame_shape[:2]
+        fx0, fy0, fx1, fy1 = box
+
+        # keep the current crop while the face stays well inside it
+        if self.roi is not None:
+            x, y, w, h = self.roi
+            mx, my = w * 0.1, h * 0.1
+            if fx0 >= x + mx and fy0 >= y + my and fx1 <= x + w - mx and fy1 <= y + h - my:
+                return
+
+        face_w = fx1 - fx0
+        face_h = fy1 - fy0
+        # same aspect ratio as the frame, see module docstring
+        w = max(face_w * (1 + 2 * self.padding), face_h * (1 + 2 * self.padding) * frame_w / frame_h,
+                self.min_width)
+        h = w * frame_h / frame_w
+        if w >= frame_w * 0.9:
+            self.roi = None  # face fills the frame, cropping would not save anything
+            return
+        w, h = int(round(w)), int(round(h))
+        cx = (fx0 + fx1) / 2
+        cy = (fy0 + fy1) / 2
+        x = int(min(max(cx - w / 2, 0), frame_w - w))
+        y = int(min(max(cy - h / 2, 0), frame_h - h))
+        self.roi = (x, y, w, h)
+
+    def stats(self):
+        return {"full_frame_runs": self.full_frame_runs, "roi_runs": self.roi_runs, "lost": self.lost,
+                "roi": self.roi}
@@ -0,0 +1,207 @@
+"""Fixation (dwell) detection on the gaze sample stream.
+
+The detectors are updated once per gaze sample, in O(1), with the sample's
+own timestamp (perf_counter seconds, a monotonic clock). Whether a dwell
+starts therefore depends only on the samples, not on when a timer happens to
+fire. Listeners get a DwellEvent when a dwell starts and when it ends.
+
+- DispersionDetector (I-DT): a fixation lasts while every sample stays within
+  `radius` px of the sample that started it. This is the rule the magnifier's
+  dwell mode has always used; a sample outside the radius ends the fixation
+  and starts a new one there.
+- VelocityDetector (I-VT): a fixation lasts while the point-to-point speed
+  stays below `velocity_threshold` px/s.
+
+A fixation that lasts `hold_time` seconds starts a dwell; the dwell ends with
+the fixation.
+
+sweep_dispersion() and sweep_velocity() run the same rules over a recorded
+trace for whole grids of settings at once, to tune radius, velocity threshold
+and hold time offline.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+# kind is DWELL_START or DWELL_END; x, y, t of the sample that caused it
+DwellEvent = namedtuple("DwellEvent", ["kind", "x", "y", "t"])
+DWELL_START = "dwell_start"
+DWELL_END = "dwell_end"
+
+
+class FixationDetector:
+    name = "base"
+
+    def __init__(self, hold_time):
+        self.hold_time = hold_time
+        self._listeners = []
+        self.reset()
+
+    def reset(self):
+        self.start_time = None  # time of the first sample of the current fixation
+        self.dwelling = False
+
+    def add_listener(self, callback):
+        """callback(event) is called with every DwellEvent."""
+        self._listeners.append(callback)
+
+    def update(self, x, y, t):
+        """Feed one sample; returns the DwellEvent it caused, or None."""
+        raise NotImplementedError
+
+    def _continue(self, x, y, t):
+        if not self.dwelling and t - self.start_time >= self.hold_time:
+            self.dwelling = True
+            return self._emit(DWELL_START, x, y, t)
+        return None
+
+    def _break(self, x, y, t):
+        if self.dwelling:
+            self.dwelling = False
+            return self._emit(DWELL_END, x, y, t)
+        return None
+
+    def _emit(self, kind, x, y, t):
+        event = DwellEvent(kind, x, y, t)
+        for callback in self._listeners:
+            callback(event)
+        return event
+
+
+class DispersionDetector(FixationDetector):
+    name = "I-DT (dispersion)"
+
+    def __init__(self, radius=100, hold_time=0.5, velocity_threshold=None):
+        self.radius = radius
+        super().__init__(hold_time)
+
+    def reset(self):
+        super().reset()
+        self.anchor = None
+
+    def update(self, x, y, t):
+        if self.anchor is None:
+            self.anchor = (x, y)
+            self.start_time = t
+            return self._continue(x, y, t)
+        dx = x - self.anchor[0]
+        dy = y - self.anchor[1]
+        if dx * dx + dy * dy <= self.radius * self.radius:
+            return self._continue(x, y, t)
+        event = self._break(x, y, t)
+        self.anchor = (x, y)
+        self.start_time = t
+        return event
+
+
+class VelocityDetector(FixationDetector):
+    name = "I-VT (velocity)"
+
+    def __init__(self, radius=None, hold_time=0.5, velocity_threshold=600.0):
+        self.velocity_threshold = velocity_threshold
+        super().__init__(hold_time)
+
+    def reset(self):
+        super().reset()
+        self._last = None
+
+    def update(self, x, y, t):
+        last = self._last
+        if last is not None and t <= last[2]:
+            return None  # repeated or out-of-order timestamp, no velocity
+        self._last = (x, y, t)
+        if last is None:
+            return None
+        dx = x - last[0]
+        dy = y - last[1]
+        dt = t - last[2]
+        if dx * dx + dy * dy <= (self.velocity_threshold * dt) ** 2:
+            if self.start_time is None:
+                self.start_time = last[2]
+            return self._continue(x, y, t)
+        self.start_time = None
+        return self._break(x, y, t)
+
+
+DETECTORS = {cls.name: cls for cls in (DispersionDetector, VelocityDetector)}
+
+
+def create_detector(name, radius, hold_time, velocity_threshold):
+    return DETECTORS[name](radius=radius, hold_time=hold_time, velocity_threshold=velocity_threshold)
+
+
+def _dwell_table(durations, lengths, hold_times):
+    """Dwell count and total dwell time per hold time, from fixation durations
+    (first to last sample) and lengths (first sample to the one that ended it)."""
+    hold_times = np.asarray(hold_times, dtype=np.float64)
+    order = np.argsort(durations)
+    durations = durations[order]
+    # sum of lengths over all fixations at or above a given duration rank
+    tail = np.concatenate([np.cumsum(lengths[order][::-1])[::-1], [0.0]])
+    first = np.searchsorted(durations, hold_times, side="left")
+    counts = len(durations) - first
+    # a dwell runs from the fixation start + hold time until the fixation ends (to within one sample)
+    dwell_time = tail[first] - counts * hold_times
+    return counts, dwell_time
+
+
+def sweep_dispersion(t, x, y, radii, hold_times):
+    """I-DT over a recorded trace for every (radius, hold time) pair.
+
+    Returns (counts, dwell_time), arrays of shape (len(radii), len(hold_times)):
+    the number of dwells DispersionDetector would start and their total length
+    in seconds. The trace is walked once with all radii updated together; hold
+    times only change which fixations count, so they cost a sort per radius.
+    """
+    t = np.asarray(t, dtype=np.float64)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    radii = np.asarray(radii, dtype=np.float64)
+    r2 = radii * radii
+    ax = np.full(len(radii), x[0])
+    ay = np.full(len(radii), y[0])
+    start = np.full(len(radii), t[0])
+    ended = [[] for _ in radii]  # per radius: (duration, length) of finished fixations
+
+    for i in range(1, len(t)):
+        broken = (x[i] - ax) ** 2 + (y[i] - ay) ** 2 > r2
+        if not broken.any():
+            continue
+        for r in np.flatnonzero(broken):
+            ended[r].append((t[i - 1] - start[r], t[i] - start[r]))
+        ax[broken] = x[i]
+        ay[broken] = y[i]
+        start[broken] = t[i]
+
+    counts = np.empty((len(radii), len(hold_times)), dtype=np.int64)
+    dwell_time = np.empty((len(radii), len(hold_times)))
+    for r in range(len(radii)):
+        # the fixation still running at the end of the trace
+        fixations = np.array(ended[r] + [(t[-1] - start[r], t[-1] - start[r])])
+        counts[r], dwell_time[r] = _dwell_table(fixations[:, 0], fixations[:, 1], hold_times)
+    return counts, dwell_time
+
+
+def sweep_velocity(t, x, y, thresholds, hold_times):
+    """I-VT over a recorded trace for every (velocity threshold, hold time) pair,
+    fully vectorised per threshold. Same return values as sweep_dispersion()."""
+    t = np.asarray(t, dtype=np.float64)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    keep = np.concatenate([[True], np.diff(t) > 0])  # like the detector, skip non-increasing stamps
+    t, x, y = t[keep], x[keep], y[keep]
+    dt = np.diff(t)
+    speed2 = (np.diff(x) ** 2 + np.diff(y) ** 2) / (dt * dt)
+
+    counts = np.empty((len(thresholds), len(hold_times)), dtype=np.int64)
+    dwell_time = np.empty((len(thresholds), len(hold_times)))
+    for k, threshold in enumerate(thresholds):
+        slow = np.concatenate([[False], speed2 <= threshold * threshold, [False]])
+        edges = np.flatnonzero(np.diff(slow.astype(np.int8)))
+        # step j (sample j-1 -> j) is slow for j in [first, stop); the fixation starts at sample first-1
+        first, stop = edges[0::2] + 1, edges[1::2] + 1
+        starts = t[first - 1]
+        durations = t[stop - 1] - starts
+        ends = t[np.minimum(stop, len(t) - 1)]  # the fast sample that ended it, or the end of the trace
+        counts[k], dwell_time[k] = _dwell_table(durations, ends - starts, hold_times)
+    return counts, dwell_time
@@ -0,0 +1,103 @@
+import time
+
+from PyQt5.QtCore import QObject, Qt, QTimer
+
+from perf_stats import PERF
+
+
+class FrameScheduler(QObject):
+    """Decides when the magnifier updates, replacing the fixed 30 ms polling timer.
+
+    - Every gaze sample schedules one update as soon as the event loop is free;
+      samples arriving in the meantime are merged into that update.
+    - A poll timer covers the cursor fallback and dwell timing. It runs at the
+      camera frame rate while the magnifier asks for it (wants_fast() returns True)
+      and at idle_interval_ms otherwise.
+    - An update that starts more than one camera frame interval after the sample
+      that triggered it counts as a missed deadline.
+    - The live refresh (Live Refresh tray option) runs on its own interval.
+    """
+
+    def __init__(self, update_callback, wants_fast, parent=None):
+        super().__init__(parent)
+        self.update_callback = update_callback
+        self.wants_fast = wants_fast
+        self.idle_interval_ms = 250
+
+        # camera frame interval, estimated from gaze sample timestamps
+        self.frame_interval = 1 / 30.0
+        self._last_sample_time = None
+        self._pending_since = None
+
+        self._render_timer = QTimer(self)
+        self._render_timer.setSingleShot(True)
+        self._render_timer.timeout.connect(self._run_update)
+
+        self._poll_timer = QTimer(self)
+        self._poll_timer.setTimerType(Qt.PreciseTimer)
+        self._poll_timer.timeout.connect(self._run_update)
+
+        self.live_timer = QTimer(self)
+
+        self.updates = 0
+        self.missed_deadlines = 0
+
+    def start(self):
+        self._poll_timer.start(self._frame_interval_ms())
+
+    def stop(self):
+        self._poll_timer.stop()
+        self._render_timer.stop()
+        self.live_timer.stop()
+
+    def _frame_interval_ms(self):
+        return max(1, int(self.frame_interval * 1000))
+
+    def on_gaze_sample(self, timestamp=None):
+        """A new gaze sample arrived (timestamp: camera frame time, perf_counter seconds)."""
+        if timestamp is not None:
+            if self._last_sample_time is not None and timestamp > self._last_sample_time:
+                # smooth the estimate, single late frames should not change the pacing much
+                self.frame_interval += 0.1 * ((timestamp - self._last_sample_time) - self.frame_interval)
+            self._last_sample_time = timestamp
+        if self._pending_since is None:
+            self._pending_since = time.perf_counter()
+            self._render_timer.start(0)
+
+    def _run_update(self):
+        if self._pending_since is not None:
+            delay = time.perf_counter() - self._pending_since
+            self._pending_since = None
+            self._render_timer.stop()
+            PERF.record("render_delay", int(delay * 1e9))
+            if delay > self.frame_interval:
+                self.missed_deadlines += 1
+                PERF.count("missed_deadlines")
+        self.updates += 1
+        self.update_callback()
+        self._adjust_poll_rate()
+
+    def _adjust_poll_rate(self):
+        interval = self._frame_interval_ms() if self.wants_fast() else self.idle_interval_ms
+        if self._poll_timer.interval() != interval:
+            self._poll_timer.setInterval(interval)
+
+    def set_live_fps(self, fps, callback):
+        """Run callback fps times per second, or stop the live refresh with fps=None."""
+        try:
+            self.live_timer.timeout.disconnect()
+        except TypeError:
+            pass
+        if fps is None:
+            self.live_timer.stop()
+            return
+        self.live_timer.timeout.connect(callback)
+        self.live_timer.start(max(1, int(1000 / fps)))
+
+    def stats(self):
+        return {
+            "updates": self.updates,
+            "missed_deadlines": self.missed_deadlines,
+            "frame_interval_ms": self.frame_interval * 1000,
+            "poll_interval_ms": self._poll_timer.interval(),
+        }
@@ -0,0 +1,272 @@
+"""Gaze smoothing filters.
+
+Every filter has an O(1) (or O(N) for tiny fixed N) per-sample update() for live use
+and a filter_batch() that processes a whole recorded trace: vectorized with NumPy for
+the moving-window filters, a plain loop over update() for the recursive One Euro and
+Kalman filters.
+"""
+import copy
+import itertools
+import math
+import time
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+class RingBuffer:
+    """Fixed-size buffer of (x, y) points, overwriting the oldest point when full."""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.xs = [0.0] * capacity
+        self.ys = [0.0] * capacity
+        self.start = 0
+        self.count = 0
+
+    def push(self, x, y):
+        """Append a point. Returns the evicted (x, y) or None while not full yet."""
+        if self.count < self.capacity:
+            idx = (self.start + self.count) % self.capacity
+            self.xs[idx], self.ys[idx] = x, y
+            self.count += 1
+            return None
+        evicted = (self.xs[self.start], self.ys[self.start])
+        self.xs[self.start], self.ys[self.start] = x, y
+        self.start = (self.start + 1) % self.capacity
+        return evicted
+
+    def clear(self):
+        self.start = 0
+        self.count = 0
+
+
+class GazeFilter:
+    """Base class. Subclasses implement update(), reset() and filter_batch()."""
+    name = ""
+
+    def update(self, x, y, t=None):
+        """Feed one sample (t in seconds, monotonic) and return the filtered (x, y)."""
+        raise NotImplementedError
+
+    def reset(self):
+        raise NotImplementedError
+
+    def filter_batch(self, xs, ys, ts=None):
+        """Filter a whole trace, returns an (N, 2) float array equal to calling update() N times."""
+        raise NotImplementedError
+
+
+class LinearWeightedFilter(GazeFilter):
+    """Weighted moving average over the last `size` points, newest point has the highest weight.
+
+    Weighted and plain sums are updated incrementally: when the oldest point drops out,
+    every remaining weight goes down by one, which is the same as subtracting the plain sum.
+    """
+    name = "Linear Weighted"
+
+    def __init__(self, size=12):
+        self.size = size
+        self.buffer = RingBuffer(size)
+        self.reset()
+
+    def reset(self):
+        self.buffer.clear()
+        self._sum_x = self._sum_y = 0.0
+        self._wsum_x = self._wsum_y = 0.0
+
+    def update(self, x, y, t=None):
+        evicted = self.buffer.push(x, y)
+        n = self.buffer.count
+        if evicted is None:
+            self._wsum_x += n * x
+            self._wsum_y += n * y
+            self._sum_x += x
+            self._sum_y += y
+        else:
+            self._wsum_x += n * x - self._sum_x
+            self._wsum_y += n * y - self._sum_y
+            self._sum_x += x - evicted[0]
+            self._sum_y += y - evicted[1]
+        total_weight = n * (n + 1) / 2
+        return self._wsum_x / total_weight, self._wsum_y / total_weight
+
+    def filter_batch(self, xs, ys, ts=None):
+        pts = np.column_stack((xs, ys)).astype(np.float64)
+        out = np.empty_like(pts)
+        n = self.size
+        warm = min(n - 1, len(pts))
+        for i in range(warm):
+            w = np.arange(1, i + 2, dtype=np.float64)
+            out[i] = w @ pts[:i + 1] / w.sum()
+        if len(pts) >= n:
+            w = np.arange(1, n + 1, dtype=np.float64)
+            out[n - 1:] = sliding_window_view(pts, n, axis=0) @ w / w.sum()
+        return out
+
+
+class MedianFilter(GazeFilter):
+    """Median of the last `size` points per axis, rejects single-sample outliers."""
+    name = "Median"
+
+    def __init__(self, size=5):
+        self.size = size
+        self.buffer = RingBuffer(size)
+
+    def reset(self):
+        self.buffer.clear()
+
+    @staticmethod
+    def _median(values):
+        values = sorted(values)
+        mid = len(values) // 2
+        if len(values) % 2:
+            return values[mid]
+        return (values[mid - 1] + values[mid]) / 2
+
+    def update(self, x, y, t=None):
+        self.buffer.push(x, y)
+        n = self.buffer.count
+        # sorting a handful of Python floats is cheaper than a NumPy call
+        return self._median(self.buffer.xs[:n]), self._median(self.buffer.ys[:n])
+
+    def filter_batch(self, xs, ys, ts=None):
+        pts = np.column_stack((xs, ys)).astype(np.float64)
+        out = np.empty_like(pts)
+        n = self.size
+        for i in range(min(n - 1, len(pts))):
+            out[i] = np.median(pts[:i + 1], axis=0)
+        if len(pts) >= n:
+            out[n - 1:] = np.median(sliding_window_view(pts, n, axis=0), axis=2)
+        return out
+
+
+def _sample_times(n, ts, rate=30.0):
+    if ts is None:
+        return np.arange(n, dtype=np.float64) / rate
+    return np.asarray(ts, dtype=np.float64)
+
+
+class OneEuroFilter(GazeFilter):
+    """One Euro filter (Casiez et al. 2012): low-pass whose cutoff rises with speed,
+    so fixations get smoothed heavily and saccades pass with little lag."""
+    name = "One Euro"
+
+    def __init__(self, min_cutoff=1.0, beta=0.01, d_cutoff=1.0, default_rate=30.0):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.default_dt = 1.0 / default_rate
+        self.reset()
+
+    def reset(self):
+        self._prev = None  # (t, x_hat, y_hat, dx_hat, dy_hat)
+
+    @staticmethod
+    def _alpha(cutoff, dt):
+        tau = 1.0 / (2 * math.pi * cutoff)
+        return 1.0 / (1.0 + tau / dt)
+
+    def update(self, x, y, t=None):
+        if t is None:
+            t = time.perf_counter()
+        if self._prev is None:
+            self._prev = (t, x, y, 0.0, 0.0)
+            return x, y
+        t0, px, py, pdx, pdy = self._prev
+        dt = t - t0 if t > t0 else self.default_dt
+        a_d = self._alpha(self.d_cutoff, dt)
+        dx = a_d * (x - px) / dt + (1 - a_d) * pdx
+        dy = a_d * (y - py) / dt + (1 - a_d) * pdy
+        # one cutoff for both axes, driven by the speed of the gaze point
+        a = self._alpha(self.min_cutoff + self.beta * math.hypot(dx, dy), dt)
+        fx = a * x + (1 - a) * px
+        fy = a * y + (1 - a) * py
+        self._prev = (t, fx, fy, dx, dy)
+        return fx, fy
+
+    def filter_batch(self, xs, ys, ts=None):
+        """Not vectorized: the cutoff depends on the previous output, so this is update() in a
+        loop, over Python floats (NumPy scalars are slower in update())."""
+        xs = np.asarray(xs, dtype=np.float64)
+        ys = np.asarray(ys, dtype=np.float64)
+        ts = _sample_times(len(xs), ts, 1.0 / self.default_dt)
+        return _run_recursive(self, xs, ys, ts)
+
+
+class KalmanFilter(GazeFilter):
+    """Constant-velocity Kalman filter, one [position, velocity] state per axis.
+    Both axes share the covariance since they see the same time steps and noise model."""
+    name = "Kalman"
+
+    def __init__(self, process_noise=5000.0, measurement_noise=400.0, default_rate=30.0):
+        self.q = process_noise  # px^2/s^3, how quickly the velocity may change
+        self.r = measurement_noise  # px^2, variance of the raw gaze estimate
+        self.default_dt = 1.0 / default_rate
+        self.reset()
+
+    def reset(self):
+        self._t = None
+        self._state = None  # [x, vx, y, vy]
+        self._p = None  # covariance [p00, p01, p11]
+
+    def update(self, x, y, t=None):
+        if t is None:
+            t = time.perf_counter()
+        if self._state is None:
+            self._t = t
+            self._state = [x, 0.0, y, 0.0]
+            self._p = [self.r, 0.0, self.r * 100]
+            return x, y
+        dt = t - self._t if t > self._t else self.default_dt
+        self._t = t
+        px, vx, py, vy = self._state
+        p00, p01, p11 = self._p
+
+        # predict
+        px += vx * dt
+        py += vy * dt
+        q = self.q
+        p00 = p00 + 2 * dt * p01 + dt * dt * p11 + q * dt ** 3 / 3
+        p01 = p01 + dt * p11 + q * dt * dt / 2
+        p11 = p11 + q * dt
+
+        # update with the position measurement
+        s = p00 + self.r
+        k0 = p00 / s
+        k1 = p01 / s
+        ex = x - px
+        ey = y - py
+        px += k0 * ex
+        vx += k1 * ex
+        py += k0 * ey
+        vy += k1 * ey
+        self._p = [(1 - k0) * p00, (1 - k0) * p01, p11 - k1 * p01]
+        self._state = [px, vx, py, vy]
+        return px, py
+
+    def filter_batch(self, xs, ys, ts=None):
+        """Not vectorized: every step depends on the previous state, so this is update() in a
+        loop, like OneEuroFilter.filter_batch."""
+        xs = np.asarray(xs, dtype=np.float64)
+        ys = np.asarray(ys, dtype=np.float64)
+        ts = _sample_times(len(xs), ts, 1.0 / self.default_dt)
+        return _run_recursive(self, xs, ys, ts)
+
+
+def _run_recursive(filt, xs, ys, ts):
+    """update() of a copy of filt over the trace, as an (N, 2) array."""
+    f = copy.copy(filt)  # leave the live state alone
+    f.reset()
+    n = len(xs)
+    # Python floats in, the (x, y) tuples streamed straight into the result array
+    results = map(f.update, xs.tolist(), ys.tolist(), np.asarray(ts).tolist())
+    return np.fromiter(itertools.chain.from_iterable(results), dtype=np.float64, count=2 * n).reshape(n, 2)
+
+
+# Filters selectable from the tray menu, first one is the default
+FILTERS = {cls.name: cls for cls in (LinearWeightedFilter, OneEuroFilter, KalmanFilter, MedianFilter)}
+
+
+def create_filter(name):
+    return FILTERS[name]()
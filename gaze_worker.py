@@ -0,0 +1,218 @@
+import threading
+import time
+from collections import namedtuple
+
+import cv2
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from perf_stats import PERF
+
+# One result of the capture -> extract_features -> predict chain.
+# has_gaze is False when no face was found or the user is blinking.
+GazeSample = namedtuple("GazeSample", ["x", "y", "has_gaze", "timestamp"])
+
+
+class _FrameGrabber(threading.Thread):
+    """Reads the camera as fast as it delivers and keeps only the newest frame.
+    Frames that get replaced before the inference loop picks them up are counted as dropped."""
+
+    def __init__(self, cap):
+        super().__init__(daemon=True)
+        self.cap = cap
+        self._cond = threading.Condition()
+        self._frame = None
+        self._frame_time = None
+        self._running = True
+
+        self.frames_captured = 0
+        self.frames_dropped = 0
+
+    def run(self):
+        while self._running:
+            t0 = PERF.start()
+            ret, frame = self.cap.read()
+            now = time.perf_counter()
+            PERF.stop("cap.read", t0)
+            if not ret:
+                # camera not ready yet or unplugged, don't spin
+                time.sleep(0.01)
+                continue
+            with self._cond:
+                if self._frame is not None:
+                    self.frames_dropped += 1
+                self._frame = frame
+                self._frame_time = now
+                self.frames_captured += 1
+                self._cond.notify()
+
+    def take(self, timeout=0.1):
+        """Return (frame, timestamp) of the newest unseen frame, or (None, None) on timeout."""
+        with self._cond:
+            if self._frame is None:
+                self._cond.wait(timeout)
+            frame, ts = self._frame, self._frame_time
+            self._frame = None
+            self._frame_time = None
+            return frame, ts
+
+    def stop(self):
+        self._running = False
+        with self._cond:
+            self._cond.notify_all()
+
+
+class GazeWorker(QThread):
+    """Runs webcam capture and gaze inference off the GUI thread.
+
+    The GUI is notified through the queued sample_ready signal and fetches the
+    newest result with take_latest(). While a notification is still pending,
+    newer samples simply overwrite the older one, so the GUI never works
+    through a backlog of stale gaze points.
+    """
+    sample_ready = pyqtSignal()
+
+    def __init__(self, cap, estimator, parent=None):
+        super().__init__(parent)
+        self.cap = cap
+        self.estimator = estimator
+        # keep the driver queue short so read() returns recent frames
+        try:
+            self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        except Exception:
+            pass
+        self._grabber = _FrameGrabber(cap)
+        self._running = False
+
+        self._lock = threading.Lock()
+        self._latest = None
+        self._notify_pending = False
+
+        self.frames_processed = 0
+        self.samples_delivered = 0
+        self.samples_dropped = 0
+
+    def run(self):
+        self._running = True
+        self._grabber.start()
+        while self._running:
+            frame, frame_time = self._grabber.take()
+            if frame is None:
+                continue
+            self._publish(self.process_frame(frame, frame_time))
+
+    def process_frame(self, frame, frame_time):
+        """Turn one camera frame into a GazeSample. Runs on the worker thread."""
+        t0 = PERF.start()
+        features, blink = self.estimator.extract_features(frame)
+        PERF.stop("extract_features", t0)
+        with self._lock:  # also counted by ParallelGazeWorker's collector thread
+            self.frames_processed += 1
+        PERF.tick("camera_frames")
+        if features is not None and not blink:
+            t0 = PERF.start()
+            x, y = self.estimator.predict([features])[0]
+            PERF.stop("predict", t0)
+            PERF.tick("gaze_samples")
+            return GazeSample(float(x), float(y), True, frame_time)
+        return GazeSample(None, None, False, frame_time)
+
+    def _publish(self, sample):
+        with self._lock:
+            if self._latest is not None:
+                self.samples_dropped += 1
+            self._latest = sample
+            if self._notify_pending:
+                return
+            self._notify_pending = True
+        self.sample_ready.emit()
+
+    def take_latest(self):
+        """Return the newest GazeSample (or None). Called from the GUI thread."""
+        with self._lock:
+            sample = self._latest
+            self._latest = None
+            self._notify_pending = False
+        if sample is not None:
+            self.samples_delivered += 1
+        return sample
+
+    def stop(self):
+        self._running = False
+        self._grabber.stop()
+        self.wait()
+        if self._grabber.is_alive():
+            self._grabber.join(timeout=1.0)
+
+    def stats(self):
+        """Counters showing how much work was skipped to stay on the newest frame."""
+        return {
+            "frames_captured": self._grabber.frames_captured,
+            "frames_dropped": self._grabber.frames_dropped,
+            "frames_processed": self.frames_processed,
+            "samples_delivered": self.samples_delivered,
+            "samples_dropped": self.samples_dropped,
+        }
+
+
+class ParallelGazeWorker(GazeWorker):
+    """GazeWorker that runs inference in an InferencePool of worker processes.
+
+    For cameras that deliver frames faster than one extract_features call per
+    frame can keep up with. Each process loads its own estimator through
+    estimator_factory(*factory_args); the pool is created on the first frame,
+    whose shape all later frames must share. Samples are published in capture
+    order. The in-process estimator is only used for frames of another shape
+    and as a fallback when the worker processes are gone.
+    """
+
+    def __init__(self, cap, estimator, processes, estimator_factory=None, factory_args=(), parent=None):
+        super().__init__(cap, estimator, parent)
+        self.processes = processes
+        self.estimator_factory = estimator_factory
+        self.factory_args = factory_args
+        self.pool = None
+        self._collector = None
+
+    def run(self):
+        from inference_pool import InferencePool, load_gaze_estimator
+
+        self._running = True
+        self._grabber.start()
+        while self._running:
+            frame, frame_time = self._grabber.take()
+            if frame is None:
+                continue
+            if self.pool is None:
+                self.pool = InferencePool(self.processes, frame.shape,
+                                          self.estimator_factory or load_gaze_estimator, self.factory_args)
+                self._collector = threading.Thread(target=self._collect, daemon=True)
+                self._collector.start()
+            if frame.shape != self.pool.ring.shape or not self.pool.alive():
+                self._publish(self.process_frame(frame, frame_time))
+            else:
+                self.pool.submit(frame, frame_time)
+
+    def _collect(self):
+        while self._running:
+            for result in self.pool.collect(timeout=0.1):
+                with self._lock:
+                    self.frames_processed += 1
+                PERF.record("extract_features", int(result.extract_s * 1e9))
+                PERF.tick("camera_frames")
+                if result.has_gaze:
+                    PERF.record("predict", int(result.predict_s * 1e9))
+                    PERF.tick("gaze_samples")
+                self._publish(GazeSample(result.x, result.y, result.has_gaze, result.frame_time))
+
+    def stop(self):
+        super().stop()
+        if self._collector is not None:
+            self._collector.join(timeout=1.0)
+        if self.pool is not None:
+            self.pool.close()
+
+    def stats(self):
+        stats = super().stats()
+        if self.pool is not None:
+            stats.update(self.pool.stats())
+        return stats
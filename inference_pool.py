@@ -0,0 +1,274 @@
+"""Multi-process gaze inference over a shared-memory frame ring.
+
+At 60-120 FPS a single extract_features call per frame on one core falls
+behind. InferencePool spreads frames over worker processes, each holding its
+own GazeEstimator loaded from the calibrated model file. Every frame is copied
+once into a slot of a shared-memory ring and only (sequence, slot, timestamp)
+goes through the task queue, so frames are never pickled. Results come back
+tagged with their sequence number and are handed out in capture order.
+"""
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+from collections import namedtuple
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# extract_s / predict_s: time spent in the worker process (seconds)
+InferenceResult = namedtuple("InferenceResult",
+                             ["seq", "frame_time", "x", "y", "has_gaze", "extract_s", "predict_s"])
+
+
+class SharedFrameRing:
+    """A fixed number of equally shaped frame slots in one shared-memory block."""
+
+    def __init__(self, slots, shape, dtype=np.uint8, name=None):
+        self.slots = slots
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        frame_bytes = int(np.prod(self.shape)) * self.dtype.itemsize
+        self._owner = name is None
+        if self._owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=frame_bytes * slots)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.frames = np.ndarray((slots,) + self.shape, dtype=self.dtype, buffer=self.shm.buf)
+
+    def spec(self):
+        """Everything another process needs to attach to the ring."""
+        return (self.shm.name, self.slots, self.shape, self.dtype.str)
+
+    @classmethod
+    def attach(cls, spec):
+        name, slots, shape, dtype = spec
+        return cls(slots, shape, dtype, name=name)
+
+    def write(self, slot, frame):
+        np.copyto(self.frames[slot], frame)
+
+    def close(self):
+        self.frames = None  # drop the view first, the buffer cannot close while exported
+        self.shm.close()
+        if self._owner:
+            self.shm.unlink()
+
+
+def load_gaze_estimator(model_path, use_face_roi=False):
+    """Default estimator factory for the worker processes."""
+    from eyetrax import GazeEstimator
+    estimator = GazeEstimator()
+    estimator.load_model(model_path)
+    if use_face_roi:
+        from face_roi import FaceRoiTracker
+        return FaceRoiTracker(estimator)
+    return estimator
+
+
+def _worker_main(index, ring_spec, tasks, results, ready, taken, estimator_factory, factory_args):
+    ring = SharedFrameRing.attach(ring_spec)
+    try:
+        estimator = estimator_factory(*factory_args)
+    except Exception as e:
+        print(f"Inference process {os.getpid()} could not load the estimator: {e}")
+        ring.close()
+        return
+    taken[2 * index] = -2  # ready and idle; stays -1 if the estimator did not load
+    ready.release()
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        seq, slot, frame_time = task
+        # so the pool can skip this frame and reuse the slot if the process dies on it
+        taken[2 * index + 1] = slot
+        taken[2 * index] = seq
+        x = y = None
+        t0 = time.perf_counter()
+        try:
+            features, blink = estimator.extract_features(ring.frames[slot])
+            t1 = time.perf_counter()
+            if features is not None and not blink:
+                x, y = estimator.predict([features])[0]
+                x, y = float(x), float(y)
+        except Exception as e:
+            # one bad frame must not stall the ordered output
+            print(f"Inference process {os.getpid()} failed on frame {seq}: {e}")
+            t1 = time.perf_counter()
+        t2 = time.perf_counter()
+        results.put((slot, InferenceResult(seq, frame_time, x, y, x is not None, t1 - t0, t2 - t1)))
+        taken[2 * index] = -2
+    ring.close()
+
+
+class InferencePool:
+    """Worker processes running extract_features/predict on frames from a SharedFrameRing.
+
+    submit() copies a frame into a free slot and returns False when every slot
+    is still in use (the caller drops the frame, like the single-thread worker
+    does when it falls behind). collect() returns finished results in the
+    order the frames were submitted. All frames must have frame_shape.
+
+    If a process dies on a frame, that frame is skipped and its slot reused;
+    processes that could not load their estimator do not affect the order.
+    """
+
+    def __init__(self, processes, frame_shape, estimator_factory=load_gaze_estimator, factory_args=(),
+                 slots_per_process=2, start_method="spawn"):
+        # spawn everywhere: forking a process that runs Qt and camera threads is not safe
+        ctx = mp.get_context(start_method)
+        self.processes = processes
+        self.ring = SharedFrameRing(processes * slots_per_process, frame_shape)
+        self._free = list(range(self.ring.slots))
+        self._lock = threading.Lock()
+        self._tasks = ctx.Queue()
+        self._results = ctx.Queue()
+        self._ready = ctx.Semaphore(0)
+        # (seq, slot) of the frame each process is working on; seq -2 when idle, -1 before it is ready
+        self._taken = ctx.Array('q', [-1] * (2 * processes), lock=False)
+        self._workers = [
+            ctx.Process(target=_worker_main, daemon=True,
+                        args=(i, self.ring.spec(), self._tasks, self._results, self._ready, self._taken,
+                              estimator_factory, factory_args))
+            for i in range(processes)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+        self._next_seq = 0
+        self._next_delivery = 0
+        self._finished = {}  # seq -> InferenceResult, waiting for earlier frames
+        self._slot_of = {}  # seq -> slot of every frame submitted and not yet returned or skipped
+        self._lost = set()  # seqs of frames a process died on, skipped in the output
+        self._dead = set()  # indices of processes already checked for a lost frame
+        self._crashed = False  # a process died after it was ready
+        self._missing_since = None  # when the next frame in order was first seen missing after a crash
+        # after a crash, how long the next frame may be missing while later ones are done before it
+        # is skipped: results the process had queued but not yet sent die with it
+        self.lost_after = 1.0
+
+        self.frames_submitted = 0
+        self.frames_rejected = 0
+        self.results_delivered = 0
+        self.frames_lost = 0
+
+    def wait_ready(self, timeout=None):
+        """Block until every process has loaded its estimator. Returns False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for _ in self._workers:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if not self._ready.acquire(timeout=remaining):
+                return False
+        return True
+
+    def alive(self):
+        return any(worker.is_alive() for worker in self._workers)
+
+    @property
+    def in_flight(self):
+        return self._next_seq - self._next_delivery
+
+    def submit(self, frame, frame_time):
+        with self._lock:
+            if not self._free:
+                self.frames_rejected += 1
+                return False
+            slot = self._free.pop()
+            seq = self._next_seq
+            self._next_seq += 1
+            self._slot_of[seq] = slot
+        self.ring.write(slot, frame)
+        self._tasks.put((seq, slot, frame_time))
+        self.frames_submitted += 1
+        return True
+
+    def collect(self, timeout=None):
+        """Wait up to timeout for results; return those that are next in capture order (maybe [])."""
+        try:
+            item = self._results.get(timeout=timeout)
+        except queue.Empty:
+            item = None
+        while item is not None:
+            _, result = item
+            # a result that made it out of a process after its frame was skipped
+            # is dropped, its slot is already back in use
+            if self._release(result.seq):
+                self._finished[result.seq] = result
+            try:
+                item = self._results.get_nowait()
+            except queue.Empty:
+                item = None
+
+        self._check_dead()
+        ready = []
+        while True:
+            seq = self._next_delivery
+            if seq in self._finished:
+                ready.append(self._finished.pop(seq))
+            elif seq in self._lost:
+                self._lost.discard(seq)
+            elif self._overdue(seq):
+                self._release(seq)
+                self.frames_lost += 1
+            else:
+                break
+            self._next_delivery += 1
+            self._missing_since = None
+        self.results_delivered += len(ready)
+        return ready
+
+    def _release(self, seq):
+        """Return the slot of frame seq to the free list. False if it was already returned."""
+        with self._lock:
+            slot = self._slot_of.pop(seq, None)
+            if slot is None:
+                return False
+            self._free.append(slot)
+            return True
+
+    def _overdue(self, seq):
+        """Whether frame seq, missing while later frames are done, is given up after a crash."""
+        if not self._crashed or not self._finished or seq >= self._next_seq:
+            return False
+        now = time.monotonic()
+        if self._missing_since is None:
+            self._missing_since = now
+        return now - self._missing_since >= self.lost_after
+
+    def _check_dead(self):
+        """Skip the frame of every process that died while working on it and reuse its slot.
+        Processes that failed to load the estimator never took a frame, nothing is skipped for them."""
+        for i, worker in enumerate(self._workers):
+            if i in self._dead or worker.is_alive():
+                continue
+            self._dead.add(i)
+            seq = self._taken[2 * i]
+            if seq == -1:
+                continue  # never ready
+            self._crashed = True
+            if seq >= self._next_delivery and seq not in self._finished and self._release(seq):
+                self._lost.add(seq)
+                self.frames_lost += 1
+
+    def close(self, timeout=2.0):
+        for _ in self._workers:
+            self._tasks.put(None)
+        for worker in self._workers:
+            worker.join(timeout)
+            if worker.is_alive():
+                worker.terminate()
+        self._tasks.close()
+        self._results.close()
+        self.ring.close()
+
+    def stats(self):
+        return {
+            "processes": self.processes,
+            "slots": self.ring.slots,
+            "frames_submitted": self.frames_submitted,
+            "frames_rejected": self.frames_rejected,
+            "results_delivered": self.results_delivered,
+            "frames_lost": self.frames_lost,
+        }
@@ -0,0 +1,99 @@
+"""Non-linear lens shapes rendered with cv2.remap lookup tables.
+
+The rectangular lens scales a small region up to the whole window. The shapes
+here instead take a window-sized region around the gaze point and magnify
+only part of it, so the surroundings stay visible at their normal size:
+
+- Bubble: a circular disc magnified by the zoom factor, everything around it
+  unmagnified.
+- Fisheye: the zoom is largest in the centre and falls off smoothly to 1 at the
+  edge of the circle, so there is no visible seam.
+- Reading Strip: a horizontal band through the middle is magnified, the rows
+  above and below are not.
+
+For every output pixel a table holds the source pixel to sample. The tables
+only depend on (shape, window size, zoom), so they are built once and kept in
+a small LRU cache; changing the zoom back and forth or resizing the window
+reuses them.
+"""
+import time
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+RECTANGLE = "Rectangle"
+BUBBLE = "Bubble"
+FISHEYE = "Fisheye"
+STRIP = "Reading Strip"
+LENS_SHAPES = [RECTANGLE, BUBBLE, FISHEYE, STRIP]
+
+LENS_RADIUS = 0.48  # circle radius relative to the smaller window side
+STRIP_HEIGHT = 0.35  # band height relative to the window height
+
+
+def build_remap(shape, width, height, scale):
+    """Float32 (map_x, map_y) of shape (height, width) for a width x height source region."""
+    u, v = np.meshgrid(np.arange(width, dtype=np.float32), np.arange(height, dtype=np.float32))
+    cx = (width - 1) / 2.0
+    cy = (height - 1) / 2.0
+    dx = u - cx
+    dy = v - cy
+
+    if shape == STRIP:
+        inside = np.abs(dy) <= STRIP_HEIGHT * height / 2
+        factor = np.where(inside, 1.0 / scale, 1.0).astype(np.float32)
+    else:
+        radius = LENS_RADIUS * min(width, height)
+        t = np.sqrt(dx * dx + dy * dy) / radius
+        if shape == BUBBLE:
+            factor = np.where(t <= 1.0, 1.0 / scale, 1.0).astype(np.float32)
+        elif shape == FISHEYE:
+            # source distance = output distance * factor; factor goes from 1/scale at the
+            # centre to 1 at the rim with zero slope at both ends (smoothstep)
+            s = np.clip(t, 0.0, 1.0)
+            factor = (1.0 / scale + (1.0 - 1.0 / scale) * s * s * (3.0 - 2.0 * s)).astype(np.float32)
+        else:
+            raise ValueError(f"No remap table for lens shape {shape!r}")
+    return cx + dx * factor, cy + dy * factor
+
+
+class RemapCache:
+    """Bounded LRU cache of remap tables keyed by (shape, width, height, scale)."""
+
+    def __init__(self, maxsize=8):
+        self.maxsize = maxsize
+        self._tables = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.build_ms = 0.0  # total time spent building tables
+
+    def get(self, shape, width, height, scale):
+        key = (shape, width, height, float(scale))
+        maps = self._tables.get(key)
+        if maps is not None:
+            self._tables.move_to_end(key)
+            self.hits += 1
+            return maps
+        self.misses += 1
+        t0 = time.perf_counter()
+        map_x, map_y = build_remap(shape, width, height, scale)
+        # fixed-point tables are smaller and faster to apply than float ones
+        maps = cv2.convertMaps(map_x, map_y, cv2.CV_16SC2)
+        self.build_ms += (time.perf_counter() - t0) * 1000
+        self._tables[key] = maps
+        if len(self._tables) > self.maxsize:
+            self._tables.popitem(last=False)
+        return maps
+
+    def stats(self):
+        return {"tables": len(self._tables), "hits": self.hits, "misses": self.misses,
+                "build_ms": round(self.build_ms, 1)}
+
+
+def render_shape(src, maps, interpolation=cv2.INTER_LINEAR, dst=None):
+    """Apply cached remap tables to a window-sized source region."""
+    # nearest neighbour only needs the integer table; given the fraction table too,
+    # cv2.remap samples up to a pixel off
+    fractions = None if interpolation == cv2.INTER_NEAREST else maps[1]
+    return cv2.remap(src, maps[0], fractions, interpolation, dst=dst, borderMode=cv2.BORDER_REPLICATE)
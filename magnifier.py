@@ -1,13 +1,25 @@
 import sys
 import os
-import cv2
+import math
 import mss
 import numpy as np
-import pyautogui
 import time
-from PyQt5.QtCore import pyqtSignal, Qt, QTimer
-from PyQt5.QtGui import QIcon, QImage, QPixmap
-from PyQt5.QtWidgets import QApplication, QLabel, QWidget, QMenu, QAction, QSystemTrayIcon, QInputDialog
+from event_log import DEBUG, ERROR, EVENTS, INFO, LEVEL_NAMES, WARNING
+from fixation import DETECTORS, DWELL_END, DWELL_START, create_detector
+from frame_scheduler import FrameScheduler
+from gaze_filters import FILTERS, create_filter
+from camera import ACTIVE, HIDDEN, WAITING
+from engine import LensConfig, MagnificationEngine, ScreenProvider
+from lens_shapes import LENS_SHAPES, RECTANGLE
+from monitors import MonitorIndex, MultiMonitorFrameCache
+from perf_dialog import PerfStatsDialog
+from perf_stats import PERF
+from prefetch import MotionPredictor, RegionPrefetcher
+from render_quality import PROFILE_NAMES, QualityGovernor
+from tile_refresh import TileChangeDetector
+from PyQt5.QtCore import pyqtSignal, Qt
+from PyQt5.QtGui import QIcon, QImage, QPainter
+from PyQt5.QtWidgets import QApplication, QWidget, QMenu, QAction, QActionGroup, QSystemTrayIcon, QInputDialog
 
 def resource_path(relative_path: str) -> str:
     """Return absolute path to resource, works for dev and PyInstaller onefile.
@@ -19,10 +31,48 @@ def resource_path(relative_path: str) -> str:
         base = os.path.abspath(os.path.dirname(__file__))
     return os.path.join(base, relative_path)
 
+def cursor_position():
+    """Mouse position, used while there is no gaze yet.
+    pyautogui is imported on first use because it needs a real display, which
+    headless runs (replay.py under the offscreen platform) do not have."""
+    import pyautogui
+    return pyautogui.position()
+
+
+class LensView(QWidget):
+    """Paints the magnified frame straight from a QImage that wraps a NumPy buffer.
+    Unlike QLabel.setPixmap this needs no QPixmap per frame."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.image = None
+        self._frame_time = None  # camera timestamp of the gaze sample behind the pending image
+
+    def set_image(self, image, frame_time=None):
+        self.image = image
+        self._frame_time = frame_time
+        self.update()
+
+    def paintEvent(self, event):
+        if self.image is None:
+            return
+        t0 = PERF.start()
+        painter = QPainter(self)
+        painter.drawImage(event.rect(), self.image, event.rect())
+        painter.end()
+        PERF.stop("paint", t0)
+        if self._frame_time is not None:
+            PERF.record("frame_to_screen", time.perf_counter_ns() - int(self._frame_time * 1e9))
+            PERF.tick("frames_presented")
+            self._frame_time = None
+
+
 class Magnifier(QWidget):
     exit_signal = pyqtSignal()
+    recalibrate_signal = pyqtSignal()
 
-    def __init__(self):
+    def __init__(self, screen_source=None):
+        """screen_source: object with mss' monitors/grab() interface, defaults to a real mss instance."""
         super().__init__()
         self.last_window_pos = None
         # Default values
@@ -30,6 +80,13 @@ class Magnifier(QWidget):
         self.default_window_height = 600
         self.default_dwell_radius = 100
         self.default_dwell_hold_time = 0.5
+        self.default_dwell_velocity = 600.0
+        self.default_dwell_detector = next(iter(DETECTORS))
+        self.default_dead_zone = 20
+        self.default_max_speed = 50
+        self.default_gaze_filter = next(iter(FILTERS))
+        self.default_quality_profile = "Balanced"
+        self.default_lens_shape = RECTANGLE
 
         self.window_width = self.default_window_width
         self.window_height = self.default_window_height
@@ -49,35 +106,90 @@ class Magnifier(QWidget):
         self.setWindowTitle("Magnifier")
         self.setFixedSize(self.window_width, self.window_height)
 
-        self.label = QLabel(self)
-        self.label.setFixedSize(self.window_width, self.window_height)
+        # On Windows 10 2004+ the OS can leave this window out of screen grabs
+        self.capture_excludes_window = self._exclude_window_from_capture()
+
+        self.view = LensView(self)
+        self.view.setFixedSize(self.window_width, self.window_height)
+
+        # The engine's output buffer and the QImage wrapping it
+        self._out_bgra = None
+        self._out_image = None
+        self._lens_point = None  # screen point the current output was rendered for
+        self._pending_frame_time = None  # camera timestamp of the newest gaze sample not shown yet
+        self.perf_dialog = None
+
+        # Scaling quality, stepped down automatically when renders exceed the budget (see render_quality.py)
+        self.quality = QualityGovernor(self.default_quality_profile)
+        self.sharpen_text = False
+
+        # Lens shape; the non-rectangular ones are drawn with cached remap tables (see lens_shapes.py)
+        self.lens_shape = self.default_lens_shape
 
         self.create_tray_icon()
 
         # Smoothed gaze data
         self.gaze_x = None
         self.gaze_y = None
-        self.gaze_history = []
-        self.gaze_history_size = 12  # more smoothing
+        self.gaze_filter = create_filter(self.default_gaze_filter)
 
         # Jitter control
-        self.dead_zone = 20  # px, ignore small movements
-        self.max_speed = 50  # px/frame, clamp movement
+        self.dead_zone = self.default_dead_zone  # px, ignore small movements
+        self.max_speed = self.default_max_speed  # px/frame, clamp movement
         self.window_move_dead_zone = 100
 
-        self.sct = mss.mss()
-
-        # Dwell feature state
+        self.sct = screen_source if screen_source is not None else mss.mss()
+        self._screen_source_factory = (lambda: screen_source) if screen_source is not None else mss.mss
+        self._owns_sct = screen_source is None
+
+        # Which monitor the gaze is on, rebuilt only when Qt reports a screen change (see monitors.py)
+        self.monitor_index = MonitorIndex(self.sct.monitors[1:])
+        # Capture, scale and compose happen in the engine, this widget only shows its output (see engine.py)
+        self.engine = MagnificationEngine(self.monitor_index, ScreenProvider(self.sct, self.monitor_index))
+        app = QApplication.instance()
+        app.screenAdded.connect(self._on_screen_added)
+        app.screenRemoved.connect(self._on_screens_changed)
+        app.primaryScreenChanged.connect(self._on_screens_changed)
+        for screen in app.screens():
+            screen.geometryChanged.connect(self._on_screens_changed)
+
+        # Optional background capture of the whole monitor (see screen_cache.py)
+        self.frame_cache = None
+        self.frame_cache_fps = 20.0
+
+        # Live refresh of the lens content while the window stands still
+        self.live_fps = 15.0
+        self.tile_detector = TileChangeDetector()
+        self._live_stats_time = 0.0
+
+        # Predictive prefetch of the next lens region (see prefetch.py). Without capture
+        # exclusion or the frame cache, most predicted regions overlap the lens and are
+        # skipped, so it is only on by default when one of them is available
+        self.prefetch_enabled = self._prefetch_useful()
+        self._prefetch_chosen = False  # set once the user toggles it in the tray
+        self.prefetch_margin = 48  # source px around the predicted region
+        self.prefetch_max_age = 0.1  # seconds a prefetched frame stays usable
+        self.predictor = MotionPredictor()
+        self.prefetcher = RegionPrefetcher(self._screen_source_factory, self.monitor_index)
+        self.prefetcher.start()
+
+        # Set by main.py once the camera is open (see camera.py)
+        self.camera_controller = None
+
+        # Dwell feature state, fixations are detected per gaze sample (see fixation.py)
         self.dwell_enabled = True  # Dwell is now the default mode
-        self.dwell_center = None  # (x, y) - dynamically tracks current gaze position
         self.dwell_radius = self.default_dwell_radius  # pixels - smaller radius for detecting stillness
         self.dwell_hold_time = self.default_dwell_hold_time  # seconds required to dwell
-        self.dwell_start_time = None
+        self.dwell_velocity = self.default_dwell_velocity  # px/s, for the velocity detector
         self.dwell_active = False
+        self._dwell_pending_show = None  # (x, y) to show the lens at on the next update
+        self.set_dwell_detector(self.default_dwell_detector)
 
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.update_magnifier)
-        self.timer.start(30)
+        # Updates are driven by gaze samples, with slow polling while nothing happens
+        self._last_cursor_pos = None
+        self._cursor_moved = False
+        self.scheduler = FrameScheduler(self.update_magnifier, self._wants_fast_update, self)
+        self.scheduler.start()
 
     def create_tray_icon(self):
         self.create_context_menu()
@@ -102,6 +214,10 @@ class Magnifier(QWidget):
         self.exit_action.triggered.connect(QApplication.quit)
         self.tray_menu.addAction(self.exit_action)
 
+        self.recalibrate_action = QAction("Recalibrate...", self)
+        self.recalibrate_action.triggered.connect(self.recalibrate_signal.emit)
+        self.tray_menu.addAction(self.recalibrate_action)
+
         self.hide_action = QAction("Hide", self)
         self.hide_action.triggered.connect(self.toggle_visibility)
         self.tray_menu.addAction(self.hide_action)
@@ -139,6 +255,42 @@ class Magnifier(QWidget):
         self.set_dwell_time_action.triggered.connect(self.set_dwell_hold_time)
         self.tray_menu.addAction(self.set_dwell_time_action)
 
+        self.set_dead_zone_action = QAction("Set Gaze Dead Zone...", self)
+        self.set_dead_zone_action.triggered.connect(self.set_dead_zone)
+        self.tray_menu.addAction(self.set_dead_zone_action)
+
+        self.set_max_speed_action = QAction("Set Max Lens Speed...", self)
+        self.set_max_speed_action.triggered.connect(self.set_max_speed)
+        self.tray_menu.addAction(self.set_max_speed_action)
+
+        # Fixation detector for dwell mode, one checked entry per detector in fixation.DETECTORS
+        self.detector_menu = self.tray_menu.addMenu("Dwell Detector")
+        self.detector_action_group = QActionGroup(self)
+        self.detector_actions = {}
+        for name in DETECTORS:
+            action = QAction(name, self, checkable=True)
+            action.triggered.connect(lambda checked, n=name: self.set_dwell_detector(n))
+            self.detector_action_group.addAction(action)
+            self.detector_menu.addAction(action)
+            self.detector_actions[name] = action
+        self.detector_actions[self.default_dwell_detector].setChecked(True)
+
+        self.set_dwell_velocity_action = QAction("Set Dwell Velocity Threshold...", self)
+        self.set_dwell_velocity_action.triggered.connect(self.set_dwell_velocity)
+        self.detector_menu.addAction(self.set_dwell_velocity_action)
+
+        # Smoothing filter selection, one checked entry per filter in gaze_filters.FILTERS
+        self.filter_menu = self.tray_menu.addMenu("Gaze Filter")
+        self.filter_action_group = QActionGroup(self)
+        self.filter_actions = {}
+        for name in FILTERS:
+            action = QAction(name, self, checkable=True)
+            action.triggered.connect(lambda checked, n=name: self.set_gaze_filter(n))
+            self.filter_action_group.addAction(action)
+            self.filter_menu.addAction(action)
+            self.filter_actions[name] = action
+        self.filter_actions[self.default_gaze_filter].setChecked(True)
+
         # Reset to defaults option
         self.reset_defaults_action = QAction("Reset to Defaults", self)
         self.reset_defaults_action.triggered.connect(self.reset_to_defaults)
@@ -146,6 +298,112 @@ class Magnifier(QWidget):
 
         self.tray_menu.addSeparator()
 
+        # Background capture of the monitors, see screen_cache.py
+        self.frame_cache_action = QAction("Background Capture", self)
+        self.frame_cache_action.setCheckable(True)
+        self.frame_cache_action.triggered.connect(self.toggle_frame_cache)
+        self.tray_menu.addAction(self.frame_cache_action)
+
+        self.set_capture_rate_action = QAction("Set Capture Rate...", self)
+        self.set_capture_rate_action.triggered.connect(self.set_capture_rate)
+        self.tray_menu.addAction(self.set_capture_rate_action)
+
+        # Live refresh grabs the area under the lens, which only works while the OS
+        # leaves the window out of captures; hiding the window per refresh would strobe it
+        self.live_refresh_action = QAction("Live Refresh", self)
+        self.live_refresh_action.setCheckable(True)
+        self.live_refresh_action.setEnabled(self.capture_excludes_window)
+        self.live_refresh_action.triggered.connect(self.toggle_live_refresh)
+        self.tray_menu.addAction(self.live_refresh_action)
+
+        self.set_live_fps_action = QAction("Set Live Refresh Rate...", self)
+        self.set_live_fps_action.setEnabled(self.capture_excludes_window)
+        self.set_live_fps_action.triggered.connect(self.set_live_fps)
+        self.tray_menu.addAction(self.set_live_fps_action)
+
+        # Lens shape selection, one checked entry per shape in lens_shapes.LENS_SHAPES
+        self.shape_menu = self.tray_menu.addMenu("Lens Shape")
+        self.shape_action_group = QActionGroup(self)
+        self.shape_actions = {}
+        for name in LENS_SHAPES:
+            action = QAction(name, self, checkable=True)
+            action.triggered.connect(lambda checked, n=name: self.set_lens_shape(n))
+            self.shape_action_group.addAction(action)
+            self.shape_menu.addAction(action)
+            self.shape_actions[name] = action
+        self.shape_actions[self.default_lens_shape].setChecked(True)
+
+        # Scaling quality: profile selection (the ceiling for the automatic downgrade) and status
+        self.quality_menu = self.tray_menu.addMenu("Rendering Quality")
+        self.quality_status_action = QAction(self.quality.summary(), self)
+        self.quality_status_action.setEnabled(False)
+        self.quality_menu.addAction(self.quality_status_action)
+        self.quality_menu.addSeparator()
+        self.quality_action_group = QActionGroup(self)
+        self.quality_actions = {}
+        for name in PROFILE_NAMES:
+            action = QAction(name, self, checkable=True)
+            action.triggered.connect(lambda checked, n=name: self.set_quality_profile(n))
+            self.quality_action_group.addAction(action)
+            self.quality_menu.addAction(action)
+            self.quality_actions[name] = action
+        self.quality_actions[self.default_quality_profile].setChecked(True)
+        self.quality_menu.addSeparator()
+        self.auto_quality_action = QAction("Automatic Downgrade", self)
+        self.auto_quality_action.setCheckable(True)
+        self.auto_quality_action.setChecked(True)
+        self.auto_quality_action.triggered.connect(self.toggle_auto_quality)
+        self.quality_menu.addAction(self.auto_quality_action)
+        self.sharpen_action = QAction("Sharpen Text (High/Best)", self)
+        self.sharpen_action.setCheckable(True)
+        self.sharpen_action.triggered.connect(self.toggle_sharpen_text)
+        self.quality_menu.addAction(self.sharpen_action)
+        self.set_frame_budget_action = QAction("Set Frame Budget...", self)
+        self.set_frame_budget_action.triggered.connect(self.set_frame_budget)
+        self.quality_menu.addAction(self.set_frame_budget_action)
+        self.quality_menu.aboutToShow.connect(self._update_quality_status)
+
+        self.prefetch_action = QAction("Predictive Prefetch", self)
+        self.prefetch_action.setCheckable(True)
+        self.prefetch_action.setChecked(self.capture_excludes_window)  # matches prefetch_enabled, no frame cache yet
+        self.prefetch_action.triggered.connect(self.toggle_prefetch)
+        self.tray_menu.addAction(self.prefetch_action)
+
+        # Structured event log for field sessions (see event_log.py)
+        self.event_log_menu = self.tray_menu.addMenu("Event Log")
+        self.record_events_action = QAction("Record Event Log", self)
+        self.record_events_action.setCheckable(True)
+        self.record_events_action.setChecked(EVENTS.recording)
+        self.record_events_action.triggered.connect(self.toggle_event_log)
+        self.event_log_menu.addAction(self.record_events_action)
+        self.event_log_menu.addSeparator()
+        self.event_level_action_group = QActionGroup(self)
+        self.event_level_actions = {}
+        for level in (DEBUG, INFO, WARNING, ERROR):
+            action = QAction(f"Level: {LEVEL_NAMES[level].capitalize()}", self, checkable=True)
+            action.triggered.connect(lambda checked, lv=level: self.set_event_level(lv))
+            self.event_level_action_group.addAction(action)
+            self.event_log_menu.addAction(action)
+            self.event_level_actions[level] = action
+        self.event_level_actions[EVENTS.level].setChecked(True)
+
+        # Camera mode per magnifier state, status line refreshed when the menu opens
+        self.camera_menu = self.tray_menu.addMenu("Camera")
+        self.camera_status_action = QAction("Camera not started", self)
+        self.camera_status_action.setEnabled(False)
+        self.camera_menu.addAction(self.camera_status_action)
+        self.camera_menu.addSeparator()
+        self.adaptive_camera_action = QAction("Adaptive Frame Rate", self)
+        self.adaptive_camera_action.setCheckable(True)
+        self.adaptive_camera_action.setChecked(True)  # matches CameraController.enabled
+        self.adaptive_camera_action.triggered.connect(self.toggle_adaptive_camera)
+        self.camera_menu.addAction(self.adaptive_camera_action)
+        self.camera_menu.aboutToShow.connect(self._update_camera_status)
+
+        self.perf_stats_action = QAction("Performance Stats…", self)
+        self.perf_stats_action.triggered.connect(self.show_perf_stats)
+        self.tray_menu.addAction(self.perf_stats_action)
+
         # Dwell option: Dwell mode is now the default, so the action allows disabling it
         # to switch to always-on mode. The action is checkable and starts unchecked.
         self.dwell_action = QAction("Enable Always On", self)
@@ -169,17 +427,17 @@ class Magnifier(QWidget):
         When checked, magnifier is always visible and follows gaze continuously."""
         if checked:
             self.dwell_enabled = False
-            self.dwell_center = None
-            self.dwell_start_time = None
+            self.dwell_detector.reset()
             self.dwell_active = False
+            self._dwell_pending_show = None
             self.show()
             self.dwell_action.setText("Disable Always On")
             self.hide_action.setText("Hide")
         else:
             self.dwell_enabled = True
-            self.dwell_center = None
-            self.dwell_start_time = None
+            self.dwell_detector.reset()
             self.dwell_active = False
+            self._dwell_pending_show = None
             try:
                 self.hide()
                 self.hide_action.setText("Unhide")
@@ -187,6 +445,209 @@ class Magnifier(QWidget):
                 pass
             self.dwell_action.setText("Enable Always On")
 
+    def toggle_frame_cache(self, checked: bool):
+        """Switch between grabbing on every move and reading from a background monitor copy."""
+        if checked and self.frame_cache is None:
+            self.frame_cache = MultiMonitorFrameCache(self.monitor_index, self.frame_cache_fps)
+            self._sync_capture_exclusion()
+            # the very first frame has no earlier frame to fill the window area from,
+            # so take it once with the window faded out
+            self.setWindowOpacity(0)
+            self.frame_cache.start()
+            self.frame_cache.wait_first_frame()
+            self.setWindowOpacity(0.9)
+        elif not checked and self.frame_cache is not None:
+            self.frame_cache.stop()
+            self.frame_cache = None
+        self._update_prefetch_default()
+
+    def set_lens_shape(self, name):
+        self.lens_shape = name
+        self.shape_actions[name].setChecked(True)
+        self.tile_detector.reset()  # the source region size depends on the shape
+        if self._lens_point is not None and self.isVisible():
+            self.render_at(*self._lens_point)
+
+    def set_quality_profile(self, name):
+        """Select the scaling profile; the automatic downgrade never goes above it."""
+        self.quality.set_ceiling(name)
+        self.quality_actions[name].setChecked(True)
+
+    def toggle_auto_quality(self, checked: bool):
+        self.quality.auto = checked
+        if not checked:
+            self.quality.set_ceiling(PROFILE_NAMES[self.quality.ceiling])
+
+    def toggle_sharpen_text(self, checked: bool):
+        self.sharpen_text = checked
+
+    def set_frame_budget(self):
+        value, ok = QInputDialog.getDouble(self, 'Frame Budget',
+                                           'Step quality down when scaling the lens takes longer than (ms):',
+                                           self.quality.budget_ms, 1.0, 200.0, decimals=1)
+        if ok:
+            self.quality.budget_ms = float(value)
+
+    def _update_quality_status(self):
+        self.quality_status_action.setText(self.quality.summary())
+
+    def _record_render_time(self, t0):
+        """Feed the governor the time since t0; only the scaling, grabs do not depend on the profile."""
+        if self.quality.record((time.perf_counter() - t0) * 1000):
+            PERF.count("quality_changes")
+
+    def toggle_prefetch(self, checked: bool):
+        """Render the predicted next lens region in the background before the lens moves there."""
+        self._prefetch_chosen = True
+        self.prefetch_enabled = checked
+        self.predictor.reset()
+
+    def _prefetch_useful(self):
+        """Whether the background grab can never contain the lens itself."""
+        return self.capture_excludes_window or self.frame_cache is not None
+
+    def _update_prefetch_default(self):
+        """Follow _prefetch_useful() until the user picks a setting."""
+        if self._prefetch_chosen or self.prefetch_enabled == self._prefetch_useful():
+            return
+        self.prefetch_enabled = self._prefetch_useful()
+        self.prefetch_action.setChecked(self.prefetch_enabled)
+        self.predictor.reset()
+
+    def toggle_adaptive_camera(self, checked: bool):
+        """Lower the camera rate while the lens is not shown; off keeps the full rate."""
+        if self.camera_controller is not None:
+            self.camera_controller.set_enabled(checked)
+
+    def _update_camera_status(self):
+        if self.camera_controller is not None:
+            self.camera_status_action.setText(self.camera_controller.summary())
+
+    def camera_state(self):
+        """The magnifier state the camera controller picks the camera mode from."""
+        if self.isVisible():
+            return ACTIVE
+        if self.dwell_enabled:
+            return WAITING
+        return HIDDEN
+
+    def toggle_event_log(self, checked: bool):
+        if checked:
+            path = EVENTS.start()
+            try:
+                self.tray_icon.showMessage('Magnifier', f'Recording events to {path}', QSystemTrayIcon.Information, 2000)
+            except Exception:
+                pass
+        else:
+            # joins the writer, which only has the last flush interval of events left
+            EVENTS.stop()
+
+    def set_event_level(self, level):
+        """Events below this level are dropped in EVENTS.emit (Debug includes every gaze sample)."""
+        EVENTS.level = level
+
+    def _on_screen_added(self, screen):
+        screen.geometryChanged.connect(self._on_screens_changed)
+        self._on_screens_changed()
+
+    def _on_screens_changed(self, *args):
+        """Monitor added, removed or rearranged: re-read the layout and rebuild the index."""
+        if self._owns_sct:
+            # mss reads the monitor list once per instance
+            self.sct.close()
+            self.sct = mss.mss()
+            self.engine.provider.sct = self.sct
+        self.monitor_index.refresh(self.sct.monitors[1:])
+        EVENTS.emit("monitors", INFO, value=len(self.monitor_index.monitors))
+        if self.frame_cache is not None:
+            # one background capture per monitor, restart them for the new layout
+            self.toggle_frame_cache(False)
+            self.toggle_frame_cache(True)
+
+    def set_capture_rate(self):
+        value, ok = QInputDialog.getDouble(self, 'Capture Rate',
+                                           'Background captures per second:',
+                                           self.frame_cache_fps, 1.0, 120.0, decimals=1)
+        if ok:
+            self.frame_cache_fps = float(value)
+            if self.frame_cache is not None:
+                self.frame_cache.set_fps(self.frame_cache_fps)
+
+    def show_perf_stats(self):
+        if self.perf_dialog is None:
+            self.perf_dialog = PerfStatsDialog(PERF)
+        self.perf_dialog.show()
+        self.perf_dialog.raise_()
+
+    def toggle_live_refresh(self, checked: bool):
+        """Keep repainting changed parts of the lens while it stands still."""
+        if checked and not self.capture_excludes_window:
+            print("Live refresh needs a window the OS leaves out of screen captures")
+            self.live_refresh_action.setChecked(False)
+            return
+        if checked:
+            self.tile_detector.reset()
+            self.scheduler.set_live_fps(self.live_fps, self.refresh_live_content)
+        else:
+            self.scheduler.set_live_fps(None, None)
+            self.tray_icon.setToolTip('Magnifier')
+
+    def set_live_fps(self):
+        value, ok = QInputDialog.getDouble(self, 'Live Refresh Rate',
+                                           'Lens refreshes per second:',
+                                           self.live_fps, 1.0, 60.0, decimals=1)
+        if ok:
+            self.live_fps = float(value)
+            if self.live_refresh_action.isChecked():
+                self.scheduler.set_live_fps(self.live_fps, self.refresh_live_content)
+
+    def _exclude_window_from_capture(self):
+        """Ask the OS to keep this window out of screen captures. Returns True on success."""
+        if sys.platform != 'win32':
+            return False
+        # before Windows 10 2004 (build 19041) the call succeeds but acts like WDA_MONITOR:
+        # the window is captured as a black rectangle instead of being left out
+        if sys.getwindowsversion().build < 19041:
+            return False
+        try:
+            import ctypes
+            WDA_EXCLUDEFROMCAPTURE = 0x11
+            return bool(ctypes.windll.user32.SetWindowDisplayAffinity(int(self.winId()), WDA_EXCLUDEFROMCAPTURE))
+        except Exception:
+            return False
+
+    def _physical_geometry(self):
+        """The window frame as (x, y, width, height) in mss (physical) pixels."""
+        # Qt geometry is in logical pixels
+        g = self.frameGeometry()
+        r = self.devicePixelRatioF()
+        return int(g.x() * r), int(g.y() * r), int(math.ceil(g.width() * r)), int(math.ceil(g.height() * r))
+
+    def _sync_capture_exclusion(self):
+        """Tell the frame cache where the magnifier window currently is."""
+        if self.frame_cache is None:
+            return
+        if self.isVisible() and not self.capture_excludes_window:
+            self.frame_cache.set_excluded_rect(self._physical_geometry())
+        else:
+            self.frame_cache.set_excluded_rect(None)
+
+    def showEvent(self, event):
+        self._sync_capture_exclusion()
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self._sync_capture_exclusion()
+        super().hideEvent(event)
+
+    def moveEvent(self, event):
+        self._sync_capture_exclusion()
+        super().moveEvent(event)
+
+    def resizeEvent(self, event):
+        self._sync_capture_exclusion()
+        super().resizeEvent(event)
+
     # User-adjustable parameter handlers
     def set_window_width(self):
         value, ok = QInputDialog.getInt(self, 'Window Width',
@@ -206,11 +667,11 @@ class Magnifier(QWidget):
 
     def update_window_size_after_change(self):
         self.setFixedSize(self.window_width, self.window_height)
-        self.label.setFixedSize(self.window_width, self.window_height)
+        self.view.setFixedSize(self.window_width, self.window_height)
         # Reposition window if it's visible
         if self.isVisible() and self.last_window_pos:
-            mx = self.gaze_x if self.gaze_x is not None else pyautogui.position()[0]
-            my = self.gaze_y if self.gaze_y is not None else pyautogui.position()[1]
+            mx = self.gaze_x if self.gaze_x is not None else cursor_position()[0]
+            my = self.gaze_y if self.gaze_y is not None else cursor_position()[1]
             target_x = int(mx - self.window_width // 2)
             target_y = int(my - self.window_height // 2)
             self.move(target_x, target_y)
@@ -222,6 +683,7 @@ class Magnifier(QWidget):
                                         self.dwell_radius, 5, 2000)
         if ok:
             self.dwell_radius = int(value)
+            self.set_dwell_detector(self.dwell_detector.name)
 
     def set_dwell_hold_time(self):
         value, ok = QInputDialog.getDouble(self, 'Dwell Hold Time',
@@ -229,6 +691,62 @@ class Magnifier(QWidget):
                                            self.dwell_hold_time, 0.1, 60.0, decimals=2)
         if ok:
             self.dwell_hold_time = float(value)
+            self.set_dwell_detector(self.dwell_detector.name)
+
+    def set_dwell_velocity(self):
+        value, ok = QInputDialog.getDouble(self, 'Dwell Velocity Threshold',
+                                           'Gaze slower than this is a fixation (px/s):',
+                                           self.dwell_velocity, 10.0, 20000.0, decimals=0)
+        if ok:
+            self.dwell_velocity = float(value)
+            self.set_dwell_detector(self.dwell_detector.name)
+
+    def set_dead_zone(self):
+        value, ok = QInputDialog.getInt(self, 'Gaze Dead Zone',
+                                        'Ignore gaze movements smaller than (px):',
+                                        self.dead_zone, 0, 500)
+        if ok:
+            self.dead_zone = int(value)
+
+    def set_max_speed(self):
+        value, ok = QInputDialog.getInt(self, 'Max Lens Speed',
+                                        'Maximum lens movement per gaze sample (px):',
+                                        self.max_speed, 1, 5000)
+        if ok:
+            self.max_speed = int(value)
+
+    def set_gaze_filter(self, name):
+        """Switch the smoothing filter, starting it from an empty history."""
+        self.gaze_filter = create_filter(name)
+        self.filter_actions[name].setChecked(True)
+
+    def set_dwell_detector(self, name):
+        """Switch the fixation detector (or apply changed dwell settings), starting from no fixation."""
+        if self.dwell_active:
+            # the new detector never reports the end of the old one's fixation
+            EVENTS.emit(DWELL_END, INFO, x=self.gaze_x if self.gaze_x is not None else math.nan,
+                        y=self.gaze_y if self.gaze_y is not None else math.nan)
+            self._end_dwell()
+        self.dwell_detector = create_detector(name, self.dwell_radius, self.dwell_hold_time, self.dwell_velocity)
+        self.dwell_detector.add_listener(self._on_dwell_event)
+        if hasattr(self, 'detector_actions'):
+            self.detector_actions[name].setChecked(True)
+
+    def _on_dwell_event(self, event):
+        if not self.dwell_enabled:
+            return
+        EVENTS.emit(event.kind, INFO, x=event.x, y=event.y)
+        if event.kind == DWELL_START:
+            # shown by the next update, which the scheduler runs right after this sample
+            self.dwell_active = True
+            self._dwell_pending_show = (event.x, event.y)
+        elif self.dwell_active:
+            self._end_dwell()
+
+    def _end_dwell(self):
+        self.dwell_active = False
+        self._dwell_pending_show = None
+        self.hide()
 
     def reset_to_defaults(self):
         """Reset all adjustable parameters to their default values."""
@@ -236,29 +754,45 @@ class Magnifier(QWidget):
         self.window_height = self.default_window_height
         self.dwell_radius = self.default_dwell_radius
         self.dwell_hold_time = self.default_dwell_hold_time
-
-        # Update the label size
+        self.dwell_velocity = self.default_dwell_velocity
+        self.set_dwell_detector(self.default_dwell_detector)
+        self.set_quality_profile(self.default_quality_profile)
+        self.set_lens_shape(self.default_lens_shape)
+        self.dead_zone = self.default_dead_zone
+        self.max_speed = self.default_max_speed
+        self.set_gaze_filter(self.default_gaze_filter)
+
+        # Update the view size
         self.update_window_size_after_change()
 
         print(f"Reset to defaults: Width={self.window_width}px, Height={self.window_height}px, "
-              f"Dwell Radius={self.dwell_radius}px, Dwell Time={self.dwell_hold_time}s")
+              f"Dwell Radius={self.dwell_radius}px, Dwell Time={self.dwell_hold_time}s, "
+              f"Dead Zone={self.dead_zone}px, Max Speed={self.max_speed}px, Filter={self.gaze_filter.name}")
 
-    def set_coordinates(self, x, y):
+    def set_coordinates(self, x, y, timestamp=None):
+        """Feed one raw gaze sample. timestamp is the camera frame time (perf_counter seconds)."""
+        t0 = PERF.start()
+        self._update_gaze(x, y, timestamp)
+        if self.dwell_enabled:
+            self.dwell_detector.update(self.gaze_x, self.gaze_y,
+                                       timestamp if timestamp is not None else time.perf_counter())
+        if self.prefetch_enabled and self.lens_shape == RECTANGLE:
+            self._prefetch_next(timestamp if timestamp is not None else time.perf_counter())
+        PERF.stop("set_coordinates", t0)
+        # nothing to update while always-on mode is hidden by the user
+        if self.dwell_enabled or self.isVisible():
+            self.scheduler.on_gaze_sample(timestamp)
+
+    def _update_gaze(self, x, y, timestamp):
         if self.gaze_x is not None and self.gaze_y is not None:
             # Dead zone: ignore tiny movements
             if abs(x - self.gaze_x) < self.dead_zone and abs(y - self.gaze_y) < self.dead_zone:
                 return
 
-        self.gaze_history.append((int(x), int(y)))
-        if len(self.gaze_history) > self.gaze_history_size:
-            self.gaze_history.pop(0)
-
-        # Weighted smoothing: newer points have more weight
-        total_weight = sum(range(1, len(self.gaze_history) + 1))
-        xs = [pt[0] * (i + 1) for i, pt in enumerate(self.gaze_history)]
-        ys = [pt[1] * (i + 1) for i, pt in enumerate(self.gaze_history)]
-        smoothed_x = int(sum(xs) / total_weight)
-        smoothed_y = int(sum(ys) / total_weight)
+        # Smoothing, see gaze_filters.py (default: linear weights, newer points count more)
+        fx, fy = self.gaze_filter.update(int(x), int(y), timestamp)
+        smoothed_x = int(fx)
+        smoothed_y = int(fy)
 
         # Velocity limit: move max_speed px per frame
         if self.gaze_x is not None and self.gaze_y is not None:
@@ -271,83 +805,193 @@ class Magnifier(QWidget):
                 smoothed_y = self.gaze_y + int(dy * scale)
 
         self.gaze_x, self.gaze_y = smoothed_x, smoothed_y
-
-    def _primary_monitor_bounds(self):
-        mon = self.sct.monitors[1]
-        return mon["left"], mon["top"], mon["width"], mon["height"]
+        self._pending_frame_time = timestamp
+
+    def _prefetch_next(self, timestamp):
+        """Ask the prefetcher for the region the lens will probably move to with the next sample."""
+        self.predictor.add(self.gaze_x, self.gaze_y, timestamp)
+        if not self.isVisible() or self.last_window_pos is None:
+            return
+        predicted = self.predictor.predict(self.scheduler.frame_interval)
+        if predicted is None:
+            return
+        px, py = int(predicted[0]), int(predicted[1])
+        dx = abs(px - self.window_width // 2 - self.last_window_pos[0])
+        dy = abs(py - self.window_height // 2 - self.last_window_pos[1])
+        if dx <= self.window_move_dead_zone and dy <= self.window_move_dead_zone:
+            return  # the lens is not expected to move
+        region = self._region_around_point(px, py)
+        bounds = self.monitor_index.bounds
+        m = self.prefetch_margin
+        left = max(bounds["left"], region["left"] - m)
+        top = max(bounds["top"], region["top"] - m)
+        padded = {"left": left, "top": top,
+                  "width": min(bounds["left"] + bounds["width"], region["left"] + region["width"] + m) - left,
+                  "height": min(bounds["top"] + bounds["height"], region["top"] + region["height"] + m) - top}
+        if not self.capture_excludes_window and self.frame_cache is None:
+            gx, gy, gw, gh = self._physical_geometry()
+            if (padded["left"] < gx + gw and gx < padded["left"] + padded["width"]
+                    and padded["top"] < gy + gh and gy < padded["top"] + padded["height"]):
+                self.prefetcher.skipped_overlap += 1  # the background grab would capture the lens itself
+                PERF.count("prefetch_skipped_overlap")
+                return
+        self.prefetcher.request(padded, self.window_width / region["width"],
+                                self.window_height / region["height"], self.frame_cache,
+                                self._quality_key())
+
+    def _render_relocated(self, x, y):
+        """Show the region around (x, y) for a lens move, from the prefetched frame if it covers it."""
+        hit = None
+        if self.prefetch_enabled and self.lens_shape == RECTANGLE:
+            hit = self.prefetcher.take(self._region_around_point(x, y), self.window_width,
+                                       self.window_height, self.prefetch_max_age, self._quality_key())
+            PERF.count("prefetch_hits" if hit is not None else "prefetch_misses")
+        if hit is None:
+            self.render_at(x, y)
+            return
+        src, scaled = hit
+        self._ensure_output_buffers()
+        np.copyto(self._out_bgra, scaled)
+        self.present()
+        self._lens_point = (x, y)
+        self.tile_detector.remember(src)
+
+    def lens_config(self):
+        """The engine configuration for the current window size, zoom, shape and quality profile."""
+        profile = self.quality.profile
+        return LensConfig(self.window_width, self.window_height, self.scale_factor, self.lens_shape,
+                          profile.interpolation, self.sharpen_text and profile.sharpen)
 
     def _region_around_point(self, x, y):
-        mon_left, mon_top, mon_w, mon_h = self._primary_monitor_bounds()
-        src_w = int(self.window_width / self.scale_factor)
-        src_h = int(self.window_height / self.scale_factor)
-
-        left = x - src_w // 2
-        top = y - src_h // 2
-
-        left = max(mon_left, min(left, mon_left + mon_w - src_w))
-        top = max(mon_top, min(top, mon_top + mon_h - src_h))
-
-        return {"left": left, "top": top, "width": src_w, "height": src_h}
-
-    def grab_region(self, x, y):
-        region = self._region_around_point(x, y)
-        shot = self.sct.grab(region)
-        return np.array(shot)[:, :, :3]
+        return self.engine.region_around(x, y, self.lens_config())
+
+    def grab_region(self, x, y, use_cache=True):
+        """Return the BGRA pixels around (x, y) as a view on the mss buffer or the frame cache (no copy)."""
+        provider = self.frame_cache if use_cache and self.frame_cache is not None else None
+        return self.engine.grab(x, y, self.lens_config(), provider)
+
+    def _ensure_output_buffers(self):
+        """Wrap the engine's output buffer in a QImage again when the engine reallocated it."""
+        out = self.engine.output_buffer(self.lens_config())
+        if out is self._out_bgra:
+            return
+        self._out_bgra = out
+        # BGRA in memory is what Qt calls RGB32 on little-endian machines, the alpha byte is ignored
+        self._out_image = QImage(out.data, out.shape[1], out.shape[0], 4 * out.shape[1], QImage.Format_RGB32)
+
+    def _quality_key(self):
+        """(interpolation, sharpen) of the active quality profile."""
+        config = self.lens_config()
+        return config.interpolation, config.sharpen
+
+    def scale_into_buffer(self, src):
+        """Resize src into the persistent output buffer with the active quality profile."""
+        self._ensure_output_buffers()
+        t0 = time.perf_counter()
+        self.engine.render_source(src, self.lens_config(), self._out_bgra)
+        self._record_render_time(t0)
+
+    def present(self):
+        """Show the current contents of the output buffer."""
+        self.view.set_image(self._out_image, self._pending_frame_time)
+        self._pending_frame_time = None
+
+    def _grab_without_window(self, x, y, use_cache=True):
+        """Grab the region around (x, y), fading the window out if it would end up in the grab."""
+        if self.capture_excludes_window or not self.isVisible() or (use_cache and self.frame_cache is not None):
+            return self.grab_region(x, y, use_cache)
+        self.setWindowOpacity(0)
+        src = self.grab_region(x, y, use_cache)
+        self.setWindowOpacity(0.9)
+        return src
+
+    def render_at(self, x, y):
+        """Grab, scale and show the region around (x, y)."""
+        src = self._grab_without_window(x, y)
+        self.scale_into_buffer(src)
+        self.present()
+        self._lens_point = (x, y)
+        self.tile_detector.remember(src)
+
+    def refresh_live_content(self):
+        """Re-grab the current lens region and repaint only the tiles that changed."""
+        if self._lens_point is None or not self.isVisible():
+            return
+        if self.dwell_enabled and not self.dwell_active:
+            return
+        if not self.capture_excludes_window:
+            return  # the grab would contain the lens itself, see toggle_live_refresh
+        x, y = self._lens_point
+        src = self.grab_region(x, y)
+        dirty = self.tile_detector.dirty_tiles(src)
+        self._report_live_stats()
+        if not dirty:
+            return
+        if (self.view.image is not self._out_image or self.lens_shape != RECTANGLE
+                or len(dirty) * 2 > self.tile_detector.last_total):
+            # most of the lens changed, buffers were rebuilt or the shape is not a plain
+            # resize: render the whole lens again
+            self.scale_into_buffer(src)
+            self.present()
+            return
+        for dx0, dy0, w, h in self.engine.render_tiles(src, dirty, self.lens_config(), self._out_bgra):
+            self.view.update(dx0, dy0, w, h)
+
+    def _report_live_stats(self):
+        now = time.time()
+        if now - self._live_stats_time < 1.0:
+            return
+        self._live_stats_time = now
+        self.tray_icon.setToolTip(f"Magnifier - live refresh skipped {self.tile_detector.last_skipped}"
+                                  f" of {self.tile_detector.last_total} tiles")
+
+    def _wants_fast_update(self):
+        """Whether the scheduler should poll at camera rate. Gaze samples trigger updates
+        on their own, so this is only needed for the cursor fallback while the cursor moves
+        or a dwell hold time is running out."""
+        if self.gaze_x is not None and self.gaze_y is not None:
+            return False
+        if not self.dwell_enabled and not self.isVisible():
+            return False  # always-on mode, hidden by the user
+        if self._cursor_moved:
+            return True
+        start = self.dwell_detector.start_time
+        return (self.dwell_enabled and not self.dwell_active and start is not None
+                and time.perf_counter() - start <= self.dwell_hold_time)
 
     def update_magnifier(self):
         if self.gaze_x is not None and self.gaze_y is not None:
             mx, my = self.gaze_x, self.gaze_y
         else:
-            mx, my = pyautogui.position()
+            mx, my = cursor_position()
+            self._cursor_moved = (mx, my) != self._last_cursor_pos
+            self._last_cursor_pos = (mx, my)
 
-        # Dwell logic: when enabled, the magnifier should remain hidden until the user
-        # dwells (stays still) at any point for the configured time.
+        # Dwell mode: the magnifier stays hidden until the fixation detector reports a
+        # dwell (see _on_dwell_event). Gaze samples reach the detector in set_coordinates,
+        # the cursor fallback is sampled here.
         if self.dwell_enabled:
-            # If no dwell center is set yet, initialize it to current position
-            if self.dwell_center is None:
-                # Start tracking at current gaze position
-                self.dwell_center = (mx, my)
-                self.dwell_start_time = time.time()
-                print(f"Initial dwell center set to: {self.dwell_center}")
-            else:
-                dx = mx - self.dwell_center[0]
-                dy = my - self.dwell_center[1]
-                dist = (dx * dx + dy * dy) ** 0.5
-
-                if dist <= self.dwell_radius:
-                    # gaze is staying still within the radius
-                  if (time.time() - self.dwell_start_time) >= self.dwell_hold_time:
-                    # dwell satisfied -> show the window if not already visible
-                    if not self.dwell_active:
-                        self.dwell_active = True
-                        # Update magnifier contents and position before showing
-                        target_x = int(mx - self.window_width // 2)
-                        target_y = int(my - self.window_height // 2)
-                        try:
-                            src = self.grab_region(mx, my)
-                            magnified = cv2.resize(src, (self.window_width, self.window_height), interpolation=cv2.INTER_LINEAR)
-                            h, w, _ = magnified.shape
-                            qImg = QImage(magnified.data, w, h, 3 * w, QImage.Format_BGR888)
-                            self.label.setPixmap(QPixmap.fromImage(qImg))
-                            self.move(target_x, target_y)
-                            self.last_window_pos = (target_x, target_y)
-                        except Exception as e:
-                            print(f"Error updating magnifier: {e}")
-                        # Now show the window
-                        self.show()
-                        self.raise_()
-                        self.activateWindow()
-                else:
-                    # gaze moved too far: reset dwell center to new position
-                    self.dwell_center = (mx, my)
-                    self.dwell_start_time = time.time()
-                    if self.dwell_active:
-                        self.hide()
-                        self.dwell_active = False
-
-            # If dwell is enabled but not yet active, do not update magnifier contents
+            if self.gaze_x is None or self.gaze_y is None:
+                self.dwell_detector.update(mx, my, time.perf_counter())
             if not self.dwell_active:
                 return
+            if self._dwell_pending_show is not None:
+                mx, my = self._dwell_pending_show
+                self._dwell_pending_show = None
+                # Update magnifier contents and position before showing
+                target_x = int(mx - self.window_width // 2)
+                target_y = int(my - self.window_height // 2)
+                try:
+                    self.render_at(mx, my)
+                    self.move(target_x, target_y)
+                    self.last_window_pos = (target_x, target_y)
+                except Exception as e:
+                    EVENTS.error(f"Error updating magnifier: {e}")
+                # Now show the window
+                self.show()
+                self.raise_()
+                self.activateWindow()
+                return
 
         target_x = int(mx - self.window_width // 2)
         target_y = int(my - self.window_height // 2)
@@ -360,14 +1004,7 @@ class Magnifier(QWidget):
                 dy = abs(target_y - self.last_window_pos[1])
                 if dx > self.window_move_dead_zone or dy > self.window_move_dead_zone:
                     # Capture before moving window
-                    self.setWindowOpacity(0)
-                    src = self.grab_region(mx, my)
-                    self.setWindowOpacity(0.9)
-                    magnified = cv2.resize(src, (self.window_width, self.window_height), interpolation=cv2.INTER_LINEAR)
-
-                    h, w, _ = magnified.shape
-                    qImg = QImage(magnified.data, w, h, 3 * w, QImage.Format_BGR888)
-                    self.label.setPixmap(QPixmap.fromImage(qImg))
+                    self._render_relocated(mx, my)
                     self.move(target_x, target_y)
                     self.last_window_pos = (target_x, target_y)
         else:
@@ -375,6 +1012,8 @@ class Magnifier(QWidget):
 
     def double_magnification(self):
         self.scale_factor = min(self.max_scale, self.scale_factor * 2.0)
+        EVENTS.emit("zoom", INFO, value=self.scale_factor)
 
     def decrease_magnification(self):
         self.scale_factor = max(self.min_scale, self.scale_factor / 2.0)
+        EVENTS.emit("zoom", INFO, value=self.scale_factor)
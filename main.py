@@ -1,88 +1,256 @@
+from startup_timing import STARTUP  # first, so the startup report covers all imports
+
 import sys
 import time
 import os
+import multiprocessing
+
+# The magnifier window owns the tray icon and needs these before it can show,
+# so they are imported eagerly, but timed one by one; eyetrax loads in the background.
+# Plain import statements, so PyInstaller finds them.
+with STARTUP.timed("numpy"):
+    import numpy  # noqa: F401
+with STARTUP.timed("cv2"):
+    import cv2  # noqa: F401
+with STARTUP.timed("PyQt5.QtWidgets"):
+    from PyQt5.QtCore import QThread, QTimer, Qt
+    from PyQt5.QtWidgets import QApplication
+with STARTUP.timed("mss"):
+    import mss  # noqa: F401
+
+from camera import GESTURE, CameraController, OpenCVSource
+from calibration_profiles import CalibrationProfileStore, profile_key, run_calibration
+from event_log import DEBUG, EVENTS, INFO
+from face_roi import FaceRoiTracker
+from gaze_worker import GazeWorker, ParallelGazeWorker
+
+with STARTUP.timed("magnifier"):  # the app's own modules on top of the above
+    from magnifier import Magnifier
+
+STARTUP.mark("imports done")
+
+CAMERA_INDEX = 0
 
-import cv2
-from PyQt5.QtCore import QTimer, Qt
-from PyQt5.QtWidgets import QApplication
-from eyetrax import GazeEstimator, run_9_point_calibration
+def primary_screen_geometry(app):
+    screen = app.primaryScreen()
+    g = screen.geometry()
+    return (g.x(), g.y(), g.width(), g.height(), screen.devicePixelRatio())
 
-from magnifier import Magnifier
+def describe_setup(cap, screen_geometry):
+    """Profile key and metadata for the current camera and primary screen."""
+    try:
+        backend = cap.getBackendName()
+    except cv2.error:
+        backend = 'unknown'
+    camera_id = f"{CAMERA_INDEX}:{backend}"
+    camera_size = (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+    info = {'camera_id': camera_id, 'camera_size': camera_size, 'screen_geometry': screen_geometry}
+    return profile_key(camera_id, camera_size, screen_geometry), info
 
-def resource_path(filename):
-    """Return path to resource, works for dev and when bundled by PyInstaller."""
-    if getattr(sys, 'frozen', False):
-        base = sys._MEIPASS
+def calibrate(estimator, key, info):
+    """Run the 9-point calibration and store the result as the profile for key."""
+    from eyetrax import run_9_point_calibration
+    samples, error = run_calibration(estimator, run_9_point_calibration, CAMERA_INDEX)
+    if samples:
+        profile_store.save(key, estimator, samples=samples, validation_error_px=error, **info)
     else:
-        base = os.path.dirname(__file__)
-    return os.path.join(base, filename)
+        print("Calibration cancelled, no profile saved")
+
+class StartupLoader(QThread):
+    """Loads eyetrax (MediaPipe, scikit-learn), opens the camera and the stored
+    calibration while the tray icon and magnifier are already up. If cap is
+    given, the camera was already opened on the GUI thread."""
+
+    def __init__(self, profile_store, screen_geometry, cap=None, parent=None):
+        super().__init__(parent)
+        self.profile_store = profile_store
+        self.screen_geometry = screen_geometry
+        self.cap = cap
+        self.estimator = None
+        self.profile = None
+        self.profile_info = None
+        self.profile_loaded = False
+        self.error = None
+
+    def run(self):
+        try:
+            eyetrax = STARTUP.timed_import("eyetrax")
+            if self.cap is None:
+                self.cap = OpenCVSource(CAMERA_INDEX)
+                STARTUP.mark("camera opened")
+            self.profile, self.profile_info = describe_setup(self.cap, self.screen_geometry)
+            self.estimator = eyetrax.GazeEstimator()
+            STARTUP.mark("estimator created")
+            self.profile_loaded = self.profile_store.load(self.profile, self.estimator) is not None
+            STARTUP.mark("profile loaded" if self.profile_loaded else "no profile")
+        except Exception as e:
+            self.error = e
 
 if __name__ == '__main__':
+    multiprocessing.freeze_support()  # inference processes in the PyInstaller build
     print('Start program...')
     app = QApplication(sys.argv)
     # keep the application running when the window is closed so the tray icon remains
     app.setQuitOnLastWindowClosed(False)
+    if os.environ.get("GAZE_EVENTS") == "1":
+        print("Recording events to", EVENTS.start())
 
-    # Create estimator and calibrate
-    estimator = GazeEstimator()
-    run_9_point_calibration(estimator)
-
-    # Save model
-
-    estimator.save_model(resource_path("gaze_model.pkl"))
-
-    # Load model
-    estimator = GazeEstimator()
-    estimator.load_model(resource_path("gaze_model.pkl"))
-
-    cap = cv2.VideoCapture(0)
+    # Tray icon and window first, the gaze tracker is set up in the background
     magnifier = Magnifier()
     magnifier.show()
-
     magnifier.exit_signal.connect(app.quit)
+    magnifier.tray_icon.setToolTip('Magnifier - loading gaze tracker...')
+    STARTUP.mark("window shown")
+
+    profile_store = CalibrationProfileStore()
+    cap = None
+    estimator = None
+    gaze_worker = None
+    camera_controller = None
+    profile = profile_info = None
+    first_sample_seen = False
 
     # Blink tracking configuration
     blink_start = None
     scaled_for_blink = False
     BLINK_THRESHOLD_SECONDS = 5
+    # Eyes closed this long may become the long-blink gesture, the camera goes to full rate
+    GESTURE_AFTER_SECONDS = 1.0
+    # Crop webcam frames to the face before feature extraction (see face_roi.py).
+    # Off until benchmarks/bench_face_roi.py on recorded clips shows a gain without
+    # added gaze error: FaceMesh tracks the face itself and crops shift its landmarks.
+    USE_FACE_ROI = False
+    # Run feature extraction in this many processes (0 = on the gaze worker thread).
+    # Worth it for 60-120 FPS cameras where one core cannot keep up, see inference_pool.py
+    INFERENCE_PROCESSES = 0
 
     def update_gaze():
-        # print("Updating gaze...")
-        global blink_start, scaled_for_blink
-        ret, frame = cap.read()
-        if not ret:
+        # Runs on the GUI thread; capture and inference happen in the GazeWorker.
+        global blink_start, scaled_for_blink, first_sample_seen
+        sample = gaze_worker.take_latest()
+        if sample is None:
             return
-        features, blink = estimator.extract_features(frame)
+        if not first_sample_seen:
+            first_sample_seen = True
+            STARTUP.mark("first gaze sample")
+            STARTUP.finish()
 
         # Gaze detected and not blinking
-        if features is not None and not blink:
-            x, y = estimator.predict([features])[0]
-            magnifier.set_coordinates(x, y)
-            # print(f"Gaze: ({x:.0f}, {y:.0f})")
+        if sample.has_gaze:
+            magnifier.set_coordinates(sample.x, sample.y, sample.timestamp)
+            EVENTS.emit("gaze", DEBUG, x=sample.x, y=sample.y)
+            if blink_start is not None:
+                EVENTS.emit("blink_end", INFO, value=time.time() - blink_start)
             blink_start = None
             scaled_for_blink = False
         else:
             now = time.time()
-            print(now)
             if blink_start is None:
                 blink_start = now
+                EVENTS.emit("blink_start", INFO)
             else:
-                # print("Blink ongoing...", now - blink_start)
                 if now - blink_start > BLINK_THRESHOLD_SECONDS and not scaled_for_blink:
                     mods = QApplication.keyboardModifiers()
                     shift_down = bool(mods & Qt.ShiftModifier)
+                    EVENTS.emit("long_blink", INFO, value=now - blink_start, text="shift" if shift_down else None)
                     if shift_down:
-                        # print("Long blink detected with Shift, halving magnification.")
                         magnifier.decrease_magnification()
                     else:
-                        # print("Long blink detected, doubling magnification.")
                         magnifier.double_magnification()
                     scaled_for_blink = True
 
+    def camera_state():
+        # a blink long enough to become the zoom gesture, but not past it: either
+        # way the face may also just be gone, so fall back to the magnifier state after it
+        if blink_start is not None and not scaled_for_blink:
+            if GESTURE_AFTER_SECONDS <= time.time() - blink_start <= BLINK_THRESHOLD_SECONDS + 1:
+                return GESTURE
+        return magnifier.camera_state()
+
+    def update_camera():
+        if camera_controller is not None:
+            camera_controller.update(camera_state())
+            camera_controller.measure()
+
+    def start_gaze_worker():
+        # Capture + inference thread, results arrive through a queued signal
+        global gaze_worker, camera_controller
+        tracker = FaceRoiTracker(estimator) if USE_FACE_ROI else estimator
+        if INFERENCE_PROCESSES > 0:
+            # the processes load the stored model, the local estimator is the fallback
+            gaze_worker = ParallelGazeWorker(cap, tracker, INFERENCE_PROCESSES,
+                                             factory_args=(profile_store.model_path(profile), USE_FACE_ROI))
+        else:
+            gaze_worker = GazeWorker(cap, tracker)
+        gaze_worker.sample_ready.connect(update_gaze, Qt.QueuedConnection)
+        # Camera resolution and rate follow the magnifier state (see camera.py)
+        worker = gaze_worker
+        camera_controller = CameraController(cap, sample_counter=lambda: worker.samples_delivered)
+        camera_controller.set_enabled(magnifier.adaptive_camera_action.isChecked())
+        magnifier.camera_controller = camera_controller
+        gaze_worker.start()
+
+    def on_loaded():
+        # Back on the GUI thread: calibrate if no stored profile fits, then start tracking
+        global cap, estimator, profile, profile_info
+        if loader.error is not None:
+            EVENTS.error(f"Gaze tracker could not be started: {loader.error}")
+            magnifier.tray_icon.setToolTip('Magnifier - gaze tracker unavailable')
+            return
+        cap, estimator = loader.cap, loader.estimator
+        profile, profile_info = loader.profile, loader.profile_info
+        if not loader.profile_loaded:
+            cap.release()  # the calibration opens the camera itself
+            calibrate(estimator, profile, profile_info)
+            cap = OpenCVSource(CAMERA_INDEX)
+        magnifier.tray_icon.setToolTip('Magnifier')
+        start_gaze_worker()
+
+    def recalibrate():
+        # The calibration needs the camera and the screen for itself
+        global cap
+        if gaze_worker is None:
+            return  # still loading, the calibration will run then if needed
+        gaze_worker.stop()
+        cap.release()
+        was_visible = magnifier.isVisible()
+        magnifier.hide()
+        calibrate(estimator, profile, profile_info)
+        cap = OpenCVSource(CAMERA_INDEX)
+        if was_visible:
+            magnifier.show()
+        start_gaze_worker()
+
+    def shutdown():
+        camera_timer.stop()
+        if gaze_worker is not None:
+            gaze_worker.stop()
+            print("Gaze worker stats:", gaze_worker.stats())
+        if camera_controller is not None:
+            print("Camera stats:", camera_controller.stats())
+        if cap is not None:
+            cap.release()
+        print("Frame scheduler stats:", magnifier.scheduler.stats())
+        magnifier.prefetcher.stop()
+        print("Prefetch stats:", magnifier.prefetcher.stats())
+        if EVENTS.recording:
+            EVENTS.stop()
+            print("Event log stats:", EVENTS.stats())
+
+    camera_timer = QTimer()
+    camera_timer.timeout.connect(update_camera)
+    camera_timer.start(250)
+
+    magnifier.recalibrate_signal.connect(recalibrate)
+    app.aboutToQuit.connect(shutdown)
 
-    # Timer für Gaze-Update
-    gaze_timer = QTimer()
-    gaze_timer.timeout.connect(update_gaze)
-    gaze_timer.start(30)  # 30 ms
+    # AVFoundation can fail the camera authorization for a capture opened off the
+    # main thread, so on macOS the camera is opened here and only eyetrax loads in the background
+    if sys.platform == 'darwin':
+        cap = OpenCVSource(CAMERA_INDEX)
+        STARTUP.mark("camera opened")
+    loader = StartupLoader(profile_store, primary_screen_geometry(app), cap)
+    loader.finished.connect(on_loaded)
+    loader.start()
 
     sys.exit(app.exec_())
@@ -0,0 +1,194 @@
+"""Monitor layout lookup and capture across several monitors.
+
+MonitorIndex splits the virtual desktop into a grid at every monitor edge and
+stores, per grid cell, the monitor covering it (and the nearest monitor for
+cells in gaps between monitors). Finding the monitor under a point is then two
+binary searches and a table lookup, however many monitors there are. The index
+is rebuilt only when the layout changes (Magnifier listens to QApplication's
+screen events for that).
+
+Lens regions may straddle monitors. grab_composed() grabs each monitor's part
+separately and pastes them into one buffer. Parts of the region not covered by
+any monitor stay black. MultiMonitorFrameCache does the same with one
+background ScreenFrameCache per monitor.
+"""
+from bisect import bisect_right
+
+import numpy as np
+
+from screen_cache import ScreenFrameCache
+
+
+def _overlap(a, b):
+    """Intersection of two mss-style region dicts, or None."""
+    left = max(a["left"], b["left"])
+    top = max(a["top"], b["top"])
+    right = min(a["left"] + a["width"], b["left"] + b["width"])
+    bottom = min(a["top"] + a["height"], b["top"] + b["height"])
+    if right <= left or bottom <= top:
+        return None
+    return {"left": left, "top": top, "width": right - left, "height": bottom - top}
+
+
+class MonitorIndex:
+    """Grid index over a list of mss-style monitor dicts (without mss' combined entry 0)."""
+
+    def __init__(self, monitors):
+        self.refresh(monitors)
+
+    def refresh(self, monitors):
+        self.monitors = [{k: m[k] for k in ("left", "top", "width", "height")} for m in monitors]
+        if not self.monitors:
+            raise ValueError("MonitorIndex needs at least one monitor")
+        self.xs = sorted({m["left"] for m in self.monitors} | {m["left"] + m["width"] for m in self.monitors})
+        self.ys = sorted({m["top"] for m in self.monitors} | {m["top"] + m["height"] for m in self.monitors})
+        self.cover = []  # per row of cells: monitor index covering the cell, or -1
+        self.nearest = []  # per row of cells: nearest monitor index
+        for j in range(len(self.ys) - 1):
+            cy = (self.ys[j] + self.ys[j + 1]) / 2
+            cover_row, nearest_row = [], []
+            for i in range(len(self.xs) - 1):
+                cx = (self.xs[i] + self.xs[i + 1]) / 2
+                best, best_d = -1, None
+                for k, m in enumerate(self.monitors):
+                    dx = max(m["left"] - cx, 0, cx - (m["left"] + m["width"]))
+                    dy = max(m["top"] - cy, 0, cy - (m["top"] + m["height"]))
+                    d = dx * dx + dy * dy
+                    if best_d is None or d < best_d:
+                        best, best_d = k, d
+                cover_row.append(best if best_d == 0 else -1)
+                nearest_row.append(best)
+            self.cover.append(cover_row)
+            self.nearest.append(nearest_row)
+        self.bounds = {"left": self.xs[0], "top": self.ys[0],
+                       "width": self.xs[-1] - self.xs[0], "height": self.ys[-1] - self.ys[0]}
+
+    def _cell(self, x, y):
+        i = min(max(bisect_right(self.xs, x) - 1, 0), len(self.xs) - 2)
+        j = min(max(bisect_right(self.ys, y) - 1, 0), len(self.ys) - 2)
+        return i, j
+
+    def monitor_at(self, x, y):
+        """Index of the monitor containing (x, y), or of the nearest one for points in gaps or outside."""
+        i, j = self._cell(x, y)
+        return self.nearest[j][i]
+
+    def monitors_in(self, region):
+        """Indices of the monitors overlapping an mss-style region."""
+        i0, j0 = self._cell(region["left"], region["top"])
+        i1, j1 = self._cell(region["left"] + region["width"] - 1, region["top"] + region["height"] - 1)
+        found = []
+        for row in self.cover[j0:j1 + 1]:
+            for k in row[i0:i1 + 1]:
+                if k >= 0 and k not in found:
+                    found.append(k)
+        # cells are clamped to the desktop, so a region (partly) outside it still needs the overlap check
+        return [k for k in found if _overlap(self.monitors[k], region) is not None]
+
+    def clamp_region(self, region, x, y):
+        """Move region onto the monitor under (x, y). It may extend into neighbouring
+        monitors along an axis as long as monitors cover all of it (no black gaps)."""
+        m = self.monitors[self.monitor_at(x, y)]
+        w, h = region["width"], region["height"]
+        left = max(m["left"], min(region["left"], m["left"] + m["width"] - w))
+        top = max(m["top"], min(region["top"], m["top"] + m["height"] - h))
+        for candidate in ((region["left"], region["top"]), (region["left"], top), (left, region["top"])):
+            r = {"left": candidate[0], "top": candidate[1], "width": w, "height": h}
+            if self._covered(r):
+                return r
+        return {"left": left, "top": top, "width": w, "height": h}
+
+    def _covered(self, region):
+        area = 0
+        for k in self.monitors_in(region):
+            part = _overlap(self.monitors[k], region)
+            area += part["width"] * part["height"]
+        return area == region["width"] * region["height"]
+
+    def single_monitor(self, region):
+        """Index of the one monitor fully containing region, or None."""
+        found = self.monitors_in(region)
+        if len(found) == 1 and _overlap(self.monitors[found[0]], region) == region:
+            return found[0]
+        return None
+
+
+def compose(region, parts, out=None):
+    """Paste (sub_region, pixels) parts into one BGRA buffer for region, black where nothing lands."""
+    shape = (region["height"], region["width"], 4)
+    if out is None or out.shape != shape:
+        out = np.zeros(shape, dtype=np.uint8)
+    else:
+        out.fill(0)
+    for sub, pixels in parts:
+        x = sub["left"] - region["left"]
+        y = sub["top"] - region["top"]
+        out[y:y + sub["height"], x:x + sub["width"]] = pixels
+    return out
+
+
+def grab_composed(sct, index, region, out=None):
+    """BGRA pixels of region. One grab (a view, no copy) inside a single monitor; per-monitor
+    grabs combined into out (reused when it has the right shape) when region straddles monitors."""
+    if index.single_monitor(region) is not None:
+        shot = sct.grab(region)
+        return np.frombuffer(shot.raw, dtype=np.uint8).reshape(shot.height, shot.width, 4)
+    parts = []
+    for k in index.monitors_in(region):
+        sub = _overlap(index.monitors[k], region)
+        shot = sct.grab(sub)
+        parts.append((sub, np.frombuffer(shot.raw, dtype=np.uint8).reshape(shot.height, shot.width, 4)))
+    return compose(region, parts, out)
+
+
+class MultiMonitorFrameCache:
+    """One ScreenFrameCache per monitor behind the single-cache interface Magnifier uses."""
+
+    def __init__(self, index, fps=20.0):
+        self.index = index
+        self.caches = [ScreenFrameCache((m["left"], m["top"], m["width"], m["height"]), fps)
+                       for m in index.monitors]
+
+    def start(self):
+        for cache in self.caches:
+            cache.start()
+
+    def wait_first_frame(self, timeout=1.0):
+        return all(cache.wait_first_frame(timeout) for cache in self.caches)
+
+    def set_fps(self, fps):
+        for cache in self.caches:
+            cache.set_fps(fps)
+
+    def set_excluded_rect(self, rect):
+        for cache in self.caches:
+            cache.set_excluded_rect(rect)
+
+    def crop(self, region, out=None):
+        """A view into one monitor's cache, or for regions across monitors a composed copy in
+        out (the caller's own buffer, reused when it has the right shape) or a new array.
+        The GUI and the prefetcher both crop, so there is no buffer shared between callers."""
+        k = self.index.single_monitor(region)
+        if k is not None:
+            return self.caches[k].crop(region)
+        parts = [(sub, self.caches[i].crop(sub)) for i in self.index.monitors_in(region)
+                 for sub in [_overlap(self.index.monitors[i], region)]]
+        return compose(region, parts, out)
+
+    def copy_region(self, region):
+        """A copy of region that never mixes two frames, for callers that keep it or run
+        on another thread than the one that scales (see ScreenFrameCache.copy_region)."""
+        k = self.index.single_monitor(region)
+        if k is not None:
+            return self.caches[k].copy_region(region)
+        parts = [(sub, self.caches[i].copy_region(sub)) for i in self.index.monitors_in(region)
+                 for sub in [_overlap(self.index.monitors[i], region)]]
+        return compose(region, parts)
+
+    @property
+    def frames_captured(self):
+        return sum(cache.frames_captured for cache in self.caches)
+
+    def stop(self):
+        for cache in self.caches:
+            cache.stop()
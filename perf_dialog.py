@@ -0,0 +1,77 @@
+from PyQt5.QtCore import QTimer
+from PyQt5.QtGui import QFont
+from PyQt5.QtWidgets import (QCheckBox, QDialog, QFileDialog, QHBoxLayout, QPlainTextEdit,
+                             QPushButton, QVBoxLayout)
+
+
+class PerfStatsDialog(QDialog):
+    """Live view of a PerfRecorder: rolling p50/p95/p99 per stage, effective rates, export."""
+
+    def __init__(self, recorder, parent=None):
+        super().__init__(parent)
+        self.recorder = recorder
+        self.setWindowTitle("Performance Stats")
+        self.resize(520, 340)
+
+        self.text = QPlainTextEdit(self)
+        self.text.setReadOnly(True)
+        self.text.setFont(QFont("Courier New", 9))
+
+        self.record_box = QCheckBox("Recording", self)
+        self.record_box.setChecked(recorder.enabled)
+        self.record_box.toggled.connect(self.set_recording)
+
+        reset_button = QPushButton("Reset", self)
+        reset_button.clicked.connect(self.reset)
+        csv_button = QPushButton("Export CSV…", self)
+        csv_button.clicked.connect(self.export_csv)
+        json_button = QPushButton("Export JSON…", self)
+        json_button.clicked.connect(self.export_json)
+
+        buttons = QHBoxLayout()
+        buttons.addWidget(self.record_box)
+        buttons.addStretch()
+        buttons.addWidget(reset_button)
+        buttons.addWidget(csv_button)
+        buttons.addWidget(json_button)
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(self.text)
+        layout.addLayout(buttons)
+
+        # only refresh while the dialog is open
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+
+    def showEvent(self, event):
+        self.refresh()
+        self.timer.start(500)
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.timer.stop()
+        super().hideEvent(event)
+
+    def refresh(self):
+        if self.recorder.enabled or self.recorder.snapshot()["stages"]:
+            self.text.setPlainText(self.recorder.format_table())
+        else:
+            self.text.setPlainText("Recording is off. Tick 'Recording' to start measuring.")
+
+    def set_recording(self, checked: bool):
+        self.recorder.enabled = checked
+        self.refresh()
+
+    def reset(self):
+        self.recorder.reset()
+        self.refresh()
+
+    def export_csv(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Export CSV", "perf_stats.csv", "CSV files (*.csv)")
+        if path:
+            self.recorder.export_csv(path)
+
+    def export_json(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Export JSON", "perf_stats.json", "JSON files (*.json)")
+        if path:
+            self.recorder.export_json(path)
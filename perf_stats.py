@@ -0,0 +1,218 @@
+"""Per-stage latency instrumentation.
+
+Call sites look like
+
+    t0 = PERF.start()
+    ...
+    PERF.stop("grab_region", t0)
+
+start() returns 0 while recording is off and stop() then returns right away, so
+disabled instrumentation costs one attribute lookup and a call per stage.
+Set GAZE_PERF=1 to record from startup, or toggle it in the "Performance Stats..." dialog.
+"""
+import csv
+import json
+import math
+import os
+import threading
+import time
+
+import numpy as np
+
+# Stage names in pipeline order, used for display and export
+STAGES = [
+    "cap.read",
+    "extract_features",
+    "predict",
+    "set_coordinates",
+    "grab_region",
+    "cv2.resize",
+    "cv2.remap",
+    "paint",
+    "frame_to_screen",
+    "render_delay",
+]
+
+# Log-linear buckets: SUB_BUCKETS per power of two from 1 us up to ~1 min
+SUB_BUCKETS = 8
+MIN_NS = 1000
+OCTAVES = 26
+
+
+class LatencyHistogram:
+    """Fixed-size histogram of durations (ns) plus a ring of the most recent values.
+
+    The histogram accumulates everything since the last reset (~9 % bucket resolution),
+    the ring gives exact rolling percentiles over the last `window` samples.
+    """
+
+    def __init__(self, window=512):
+        # bucket 0: below MIN_NS, last bucket: everything above the top octave
+        self.counts = np.zeros(OCTAVES * SUB_BUCKETS + 2, dtype=np.int64)
+        self.recent = np.zeros(window, dtype=np.int64)
+        self.recent_pos = 0
+        self.total = 0
+        self.sum_ns = 0
+
+    def add(self, ns):
+        if ns < MIN_NS:
+            bucket = 0
+        else:
+            octave = int(math.log2(ns / MIN_NS))
+            if octave >= OCTAVES:
+                bucket = len(self.counts) - 1
+            else:
+                sub = min(int((ns / (MIN_NS << octave) - 1) * SUB_BUCKETS), SUB_BUCKETS - 1)
+                bucket = 1 + octave * SUB_BUCKETS + sub
+        self.counts[bucket] += 1
+        self.recent[self.recent_pos % len(self.recent)] = ns
+        self.recent_pos += 1
+        self.total += 1
+        self.sum_ns += ns
+
+    def bucket_upper_ns(self):
+        """Upper bound (ns) of every histogram bucket."""
+        bounds = [MIN_NS]
+        for octave in range(OCTAVES):
+            base = MIN_NS << octave
+            bounds += [base + base * (sub + 1) // SUB_BUCKETS for sub in range(SUB_BUCKETS)]
+        bounds.append(np.iinfo(np.int64).max)
+        return np.array(bounds, dtype=np.int64)
+
+    def rolling_percentiles(self, qs=(50, 95, 99)):
+        n = min(self.recent_pos, len(self.recent))
+        if n == 0:
+            return None
+        return np.percentile(self.recent[:n], qs) / 1e6
+
+    def histogram_percentiles(self, qs=(50, 95, 99)):
+        if self.total == 0:
+            return None
+        cum = np.cumsum(self.counts)
+        idx = np.searchsorted(cum, np.asarray(qs) / 100.0 * self.total)
+        return self.bucket_upper_ns()[np.minimum(idx, len(self.counts) - 1)] / 1e6
+
+
+class RateCounter:
+    """Events per second over the last `window` events."""
+
+    def __init__(self, window=64):
+        self.times = np.zeros(window, dtype=np.int64)
+        self.pos = 0
+
+    def tick(self, ns):
+        self.times[self.pos % len(self.times)] = ns
+        self.pos += 1
+
+    def rate(self):
+        n = min(self.pos, len(self.times))
+        if n < 2:
+            return 0.0
+        newest = self.times[(self.pos - 1) % len(self.times)]
+        oldest = self.times[self.pos % len(self.times)] if self.pos >= len(self.times) else self.times[0]
+        return (n - 1) * 1e9 / (newest - oldest) if newest > oldest else 0.0
+
+
+class PerfRecorder:
+    def __init__(self, window=512):
+        self.enabled = os.environ.get("GAZE_PERF") == "1"
+        self.window = window
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self, window=None):
+        if window is not None:
+            self.window = window
+        with self._lock:
+            self.stages = {name: LatencyHistogram(self.window) for name in STAGES}
+            self.rates = {}
+            self.counters = {}
+
+    def start(self):
+        return time.perf_counter_ns() if self.enabled else 0
+
+    def stop(self, stage, t0):
+        if not t0:
+            return
+        self.record(stage, time.perf_counter_ns() - t0)
+
+    def record(self, stage, ns):
+        if not self.enabled:
+            return
+        with self._lock:
+            hist = self.stages.get(stage)
+            if hist is None:
+                hist = self.stages[stage] = LatencyHistogram(self.window)
+            hist.add(ns)
+
+    def tick(self, name):
+        """Count one event (presented frame, gaze sample, ...) for rate reporting."""
+        if not self.enabled:
+            return
+        with self._lock:
+            counter = self.rates.get(name)
+            if counter is None:
+                counter = self.rates[name] = RateCounter()
+            counter.tick(time.perf_counter_ns())
+
+    def count(self, name, n=1):
+        """Increment an event counter (missed deadlines, ...)."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def snapshot(self):
+        """Summary per stage: rolling p50/p95/p99 and totals, in milliseconds."""
+        with self._lock:
+            result = {"stages": {}, "rates": {name: c.rate() for name, c in self.rates.items()},
+                      "counters": dict(self.counters)}
+            for name, hist in self.stages.items():
+                if hist.total == 0:
+                    continue
+                p50, p95, p99 = hist.rolling_percentiles()
+                result["stages"][name] = {
+                    "count": int(hist.total),
+                    "mean_ms": hist.sum_ns / hist.total / 1e6,
+                    "p50_ms": float(p50),
+                    "p95_ms": float(p95),
+                    "p99_ms": float(p99),
+                }
+            return result
+
+    def format_table(self):
+        snap = self.snapshot()
+        lines = [f"{'stage':<17} {'count':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"]
+        for name, s in snap["stages"].items():
+            lines.append(f"{name:<17} {s['count']:>7} {s['p50_ms']:8.2f} {s['p95_ms']:8.2f} {s['p99_ms']:8.2f}")
+        lines.append("")
+        for name, rate in snap["rates"].items():
+            lines.append(f"{name:<17} {rate:7.1f} /s")
+        for name, value in snap["counters"].items():
+            lines.append(f"{name:<17} {value:7d}")
+        return "\n".join(lines)
+
+    def export_json(self, path):
+        snap = self.snapshot()
+        with self._lock:
+            snap["histograms"] = {
+                name: {"bucket_upper_ns": hist.bucket_upper_ns()[hist.counts > 0].tolist(),
+                       "counts": hist.counts[hist.counts > 0].tolist()}
+                for name, hist in self.stages.items() if hist.total
+            }
+        with open(path, "w") as fh:
+            json.dump(snap, fh, indent=2)
+
+    def export_csv(self, path):
+        """One row per stage and histogram bucket: stage, bucket_upper_ns, count."""
+        with self._lock, open(path, "w", newline="") as fh:
+            writer = csv.writer(fh)
+            writer.writerow(["stage", "bucket_upper_ns", "count"])
+            for name, hist in self.stages.items():
+                bounds = hist.bucket_upper_ns()
+                for bucket in np.nonzero(hist.counts)[0]:
+                    writer.writerow([name, int(bounds[bucket]), int(hist.counts[bucket])])
+
+
+# Shared by the gaze worker, the magnifier and replay.py
+PERF = PerfRecorder()
@@ -0,0 +1,194 @@
+"""Predictive lens placement: guess where the lens goes next and render it early.
+
+MotionPredictor extrapolates the smoothed gaze from its velocity and
+acceleration. When the predicted point would move the lens, the magnifier
+asks RegionPrefetcher to grab and scale a padded region around it on a
+background thread. If the lens really moves there before the prefetched frame
+gets old, the relocation only copies the matching part of the scaled frame
+into the output buffer (a hit); otherwise it grabs synchronously as before
+(a miss).
+
+The padding makes hits tolerant to prediction error: any lens region that
+lies inside the padded region can be cut out of it. With the usual integer
+zoom factors the cut-out is pixel-identical to scaling the region itself.
+"""
+import threading
+import time
+from collections import namedtuple
+
+import cv2
+import numpy as np
+
+from monitors import grab_composed
+from render_quality import sharpen
+
+# region: padded mss-style region dict; src: its BGRA pixels; scaled: src resized by (fx, fy)
+# with quality = (interpolation, sharpen)
+PrefetchedRegion = namedtuple("PrefetchedRegion", ["region", "fx", "fy", "quality", "src", "scaled", "done_time"])
+
+
+class MotionPredictor:
+    """Constant-acceleration extrapolation from the last three gaze samples."""
+
+    def __init__(self, max_accel_share=0.5):
+        # the acceleration term may add at most this share of the velocity step,
+        # so the noisy second difference cannot throw the prediction far off
+        self.max_accel_share = max_accel_share
+        self.reset()
+
+    def reset(self):
+        self._samples = []  # up to three (x, y, t)
+        self.vx = self.vy = 0.0
+        self.ax = self.ay = 0.0
+
+    def add(self, x, y, t):
+        if self._samples and t <= self._samples[-1][2]:
+            return
+        self._samples.append((x, y, t))
+        if len(self._samples) > 3:
+            del self._samples[0]
+        if len(self._samples) < 2:
+            return
+        (x1, y1, t1), (x2, y2, t2) = self._samples[-2:]
+        vx, vy = (x2 - x1) / (t2 - t1), (y2 - y1) / (t2 - t1)
+        if len(self._samples) == 3:
+            x0, y0, t0 = self._samples[0]
+            pvx, pvy = (x1 - x0) / (t1 - t0), (y1 - y0) / (t1 - t0)
+            dt = (t2 - t0) / 2
+            self.ax, self.ay = (vx - pvx) / dt, (vy - pvy) / dt
+        self.vx, self.vy = vx, vy
+
+    def predict(self, ahead):
+        """Predicted (x, y) `ahead` seconds after the newest sample, or None without history."""
+        if len(self._samples) < 2:
+            return None
+        x, y, _ = self._samples[-1]
+        step_x, step_y = self.vx * ahead, self.vy * ahead
+        acc_x, acc_y = 0.5 * self.ax * ahead * ahead, 0.5 * self.ay * ahead * ahead
+        limit = self.max_accel_share * max(abs(step_x), abs(step_y))
+        acc_x = max(-limit, min(acc_x, limit))
+        acc_y = max(-limit, min(acc_y, limit))
+        return x + step_x + acc_x, y + step_y + acc_y
+
+
+class RegionPrefetcher(threading.Thread):
+    """Grabs and scales requested regions in the background, keeping only the newest result.
+
+    source_factory() is called on the thread to create its own mss instance
+    (mss handles must not be shared between threads); with a MonitorIndex,
+    regions across monitors are grabbed per monitor. Requests that arrive
+    while one is being rendered replace each other, so the thread always works
+    on the newest prediction.
+    """
+
+    def __init__(self, source_factory, monitor_index=None):
+        super().__init__(daemon=True)
+        self.source_factory = source_factory
+        self.monitor_index = monitor_index
+        self._cond = threading.Condition()
+        self._request = None
+        self._result = None
+        self._running = True
+
+        self.requests = 0
+        self.completed = 0
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0  # misses because the prefetched frame was too old
+        self.skipped_overlap = 0  # not requested by the magnifier, the region overlapped the lens
+
+    def request(self, region, fx, fy, frame_cache=None, quality=(cv2.INTER_LINEAR, False)):
+        """Prefetch the mss-style region, scaled by (fx, fy) with quality = (interpolation, sharpen).
+        With a frame cache, crop from it."""
+        with self._cond:
+            self._request = (dict(region), fx, fy, frame_cache, quality)
+            self.requests += 1
+            self._cond.notify()
+
+    def run(self):
+        sct = self.source_factory()
+        try:
+            while self._running:
+                with self._cond:
+                    while self._running and self._request is None:
+                        self._cond.wait()
+                    if not self._running:
+                        break
+                    region, fx, fy, frame_cache, quality = self._request
+                    self._request = None
+                if frame_cache is not None:
+                    # own copy, the cache reuses its buffers while this thread still scales
+                    src = frame_cache.copy_region(region)
+                elif self.monitor_index is not None:
+                    src = grab_composed(sct, self.monitor_index, region)
+                else:
+                    shot = sct.grab(region)
+                    src = np.frombuffer(shot.raw, dtype=np.uint8).reshape(shot.height, shot.width, 4)
+                size = (int(round(src.shape[1] * fx)), int(round(src.shape[0] * fy)))
+                interpolation, sharpened = quality
+                scaled = cv2.resize(sharpen(src) if sharpened else src, size, interpolation=interpolation)
+                result = PrefetchedRegion(region, fx, fy, quality, src, scaled, time.perf_counter())
+                with self._cond:
+                    self._result = result
+                    self.completed += 1
+        finally:
+            close = getattr(sct, "close", None)
+            if close is not None:
+                close()
+
+    def take(self, region, out_width, out_height, max_age, quality=(cv2.INTER_LINEAR, False)):
+        """Return (src, scaled) views for region from the newest prefetched frame, or None on a miss.
+
+        scaled has exactly (out_height, out_width). It is a hit only if region
+        lies inside the prefetched region, zoom and quality match and the frame
+        is at most max_age seconds old.
+        """
+        with self._cond:
+            result = self._result
+        hit = None
+        if result is None or result.quality == quality:
+            hit = self._cut(result, region, out_width, out_height, max_age)
+        if hit is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return hit
+
+    def _cut(self, result, region, out_width, out_height, max_age):
+        if result is None:
+            return None
+        if time.perf_counter() - result.done_time > max_age:
+            self.stale += 1
+            return None
+        fx = out_width / region["width"]
+        fy = out_height / region["height"]
+        if abs(fx - result.fx) > 1e-6 or abs(fy - result.fy) > 1e-6:
+            return None
+        outer = result.region
+        dx = region["left"] - outer["left"]
+        dy = region["top"] - outer["top"]
+        if dx < 0 or dy < 0 or dx + region["width"] > outer["width"] or dy + region["height"] > outer["height"]:
+            return None
+        ox, oy = int(round(dx * fx)), int(round(dy * fy))
+        scaled = result.scaled[oy:oy + out_height, ox:ox + out_width]
+        if scaled.shape[:2] != (out_height, out_width):
+            return None
+        src = result.src[dy:dy + region["height"], dx:dx + region["width"]]
+        return src, scaled
+
+    def stop(self):
+        self._running = False
+        with self._cond:
+            self._cond.notify_all()
+        if self.is_alive():
+            self.join(timeout=1.0)
+
+    def stats(self):
+        return {
+            "requests": self.requests,
+            "completed": self.completed,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale": self.stale,
+            "skipped_overlap": self.skipped_overlap,
+        }
@@ -0,0 +1,92 @@
+"""Rendering quality profiles and the governor that switches between them.
+
+Scaling the captured region up to the window is the only step whose cost
+depends on the chosen quality: nearest neighbour is cheapest, bicubic and
+Lanczos cost more but keep text edges smoother. At high zoom factors and
+large window sizes the difference is several milliseconds per frame.
+
+QualityGovernor watches the scaling time of every lens render (grabs and
+presenting are left out, the profile does not change them). When renders keep
+exceeding the frame budget it steps down one profile; when there has been
+plenty of headroom for a while it steps back up, never above the profile the
+user selected.
+"""
+from collections import deque, namedtuple
+
+import cv2
+
+# sharpen: whether "Sharpen Text" applies in this profile
+QualityProfile = namedtuple("QualityProfile", ["name", "interpolation", "sharpen"])
+
+# cheapest first, the governor moves along this list
+PROFILES = [
+    QualityProfile("Fast", cv2.INTER_NEAREST, False),
+    QualityProfile("Balanced", cv2.INTER_LINEAR, False),
+    QualityProfile("High", cv2.INTER_CUBIC, True),
+    QualityProfile("Best", cv2.INTER_LANCZOS4, True),
+]
+PROFILE_NAMES = [p.name for p in PROFILES]
+
+SHARPEN_AMOUNT = 0.6
+
+
+def sharpen(src, amount=SHARPEN_AMOUNT, dst=None):
+    """Unsharp mask. Applied to the captured region before scaling, which is
+    zoom^2 times fewer pixels than the output."""
+    blurred = cv2.GaussianBlur(src, (0, 0), 1.0)
+    return cv2.addWeighted(src, 1 + amount, blurred, -amount, 0, dst=dst)
+
+
+class QualityGovernor:
+    def __init__(self, ceiling="Balanced", budget_ms=16.0, window=30):
+        self.budget_ms = budget_ms
+        self.auto = True
+        self.down_after = 3  # consecutive renders over budget before stepping down
+        self.up_after = 60  # consecutive renders under headroom * budget before stepping up
+        self.headroom = 0.5
+        self.recent = deque(maxlen=window)  # (profile name, ms) of the latest renders
+        self.changes = 0
+        self.set_ceiling(ceiling)
+
+    @property
+    def profile(self):
+        return PROFILES[self.level]
+
+    def set_ceiling(self, name):
+        """The profile selected by the user; the governor only ever goes below it."""
+        self.ceiling = PROFILE_NAMES.index(name)
+        self.level = self.ceiling
+        self._over = 0
+        self._under = 0
+
+    def record(self, ms):
+        """Add the duration of one render. Returns True if the active profile changed."""
+        self.recent.append((self.profile.name, ms))
+        if not self.auto:
+            return False
+        if ms > self.budget_ms:
+            self._over += 1
+            self._under = 0
+        elif ms < self.budget_ms * self.headroom:
+            self._under += 1
+            self._over = 0
+        else:
+            self._over = self._under = 0
+
+        if self._over >= self.down_after and self.level > 0:
+            self.level -= 1
+        elif self._under >= self.up_after and self.level < self.ceiling:
+            self.level += 1
+        else:
+            return False
+        self._over = self._under = 0
+        self.changes += 1
+        return True
+
+    def summary(self):
+        """One line for the tray menu: active profile and recent render times."""
+        if not self.recent:
+            return f"Active: {self.profile.name} (no frames yet)"
+        times = [ms for _, ms in self.recent]
+        return (f"Active: {self.profile.name} - last {times[-1]:.1f} ms, avg {sum(times) / len(times):.1f} ms, "
+                f"max {max(times):.1f} ms (budget {self.budget_ms:.0f} ms)")
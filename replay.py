@@ -0,0 +1,209 @@
+"""Headless replay of the gaze-to-pixels pipeline for profiling.
+
+Feeds a recorded video (or synthetic frames) through GazeWorker.process_frame,
+the same code the live app runs, and renders every sample with Magnifier under
+the Qt offscreen platform. The screen comes from a static image or a generated
+image sequence instead of mss, and the gaze estimator is a stub that replays
+scripted coordinates unless --model is given.
+
+Run:  python replay.py --frames 600 --json results.json
+      python replay.py --video clip.mp4 --screen screenshot.png --gaze trace.csv
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import cv2
+import numpy as np
+from mss.screenshot import ScreenShot
+from PyQt5.QtWidgets import QApplication
+
+from camera import CameraMode, FileSource, SyntheticSource
+from gaze_worker import GazeWorker
+from magnifier import Magnifier
+from perf_stats import PERF
+
+
+class ScriptedEstimator:
+    """GazeEstimator stand-in: returns the next scripted (x, y) per frame.
+    Rows with NaN coordinates are reported as a blink."""
+
+    def __init__(self, script):
+        self.script = script
+        self._index = -1
+
+    def extract_features(self, frame):
+        self._index = (self._index + 1) % len(self.script)
+        x, y = self.script[self._index]
+        if np.isnan(x) or np.isnan(y):
+            return None, True
+        return np.array([self._index], dtype=np.float32), False
+
+    def predict(self, features):
+        return [self.script[int(f[0])] for f in features]
+
+
+class StaticScreenSource:
+    """mss replacement that serves regions of fixed BGRA images, cycling through them per grab."""
+
+    def __init__(self, images):
+        self.images = images
+        h, w = images[0].shape[:2]
+        self.monitors = [{"left": 0, "top": 0, "width": w, "height": h}] * 2
+        self._index = 0
+
+    def grab(self, region):
+        img = self.images[self._index % len(self.images)]
+        self._index += 1
+        top, left = region["top"], region["left"]
+        crop = img[top:top + region["height"], left:left + region["width"]]
+        return ScreenShot(bytearray(crop.tobytes()), dict(region))
+
+    def close(self):
+        pass
+
+
+def synthetic_screens(width, height, count, seed=0):
+    """Text-like blocks on a light background, shifted a little per image to mimic scrolling."""
+    rng = np.random.default_rng(seed)
+    base = np.full((height + count * 4, width, 4), 235, dtype=np.uint8)
+    for _ in range(width * height // 4000):
+        x, y = rng.integers(0, width - 60), rng.integers(0, base.shape[0] - 12)
+        base[y:y + 8, x:x + rng.integers(10, 60), :3] = rng.integers(0, 90)
+    return [np.ascontiguousarray(base[i * 4:i * 4 + height]) for i in range(count)]
+
+
+def load_screens(path):
+    img = cv2.imread(path, cv2.IMREAD_COLOR)
+    if img is None:
+        raise SystemExit(f"Cannot read screen image {path}")
+    return [cv2.cvtColor(img, cv2.COLOR_BGR2BGRA)]
+
+
+def scripted_gaze(count, width, height):
+    """Deterministic gaze path: fixations of ~0.5 s joined by jumps, plus jitter and a blink now and then."""
+    rng = np.random.default_rng(1)
+    script = np.empty((count, 2))
+    target = np.array([width / 2, height / 2])
+    for i in range(count):
+        if i % 15 == 0:
+            target = rng.uniform([0, 0], [width, height])
+        script[i] = target + rng.normal(0, 15, 2)
+    script[::97] = np.nan
+    return script
+
+
+def load_gaze(path):
+    """CSV with one 'x,y' row per frame, empty or NaN fields mark blinks."""
+    return np.genfromtxt(path, delimiter=",", dtype=np.float64, filling_values=np.nan).reshape(-1, 2)
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"],
+                                       cwd=os.path.dirname(os.path.abspath(__file__)),
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+
+def replay(cap, estimator, magnifier, max_frames):
+    """Run frames through the live code path, the stages are timed by the built-in PERF recorder."""
+    PERF.reset(window=max_frames)
+    PERF.enabled = True
+    worker = GazeWorker(cap, estimator)
+    frames = 0
+    start = time.perf_counter()
+    while frames < max_frames:
+        t0 = PERF.start()
+        ret, frame = cap.read()
+        frame_time = time.perf_counter()
+        if not ret:
+            break
+        PERF.stop("cap.read", t0)
+        frames += 1
+
+        sample = worker.process_frame(frame, frame_time)
+        if not sample.has_gaze:
+            continue
+        magnifier.set_coordinates(sample.x, sample.y, sample.timestamp)
+        magnifier.render_at(magnifier.gaze_x, magnifier.gaze_y)
+        magnifier.view.repaint()  # paint now instead of on the next event loop pass
+    return frames, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--video", help="recorded webcam video, default: synthetic frames")
+    parser.add_argument("--frames", type=int, default=600, help="maximum number of frames to replay")
+    parser.add_argument("--screen", help="screenshot to magnify, default: generated image sequence")
+    parser.add_argument("--screen-size", default="1920x1080", help="size of the generated screen")
+    parser.add_argument("--gaze", help="CSV of scripted gaze points, default: generated path")
+    parser.add_argument("--model", help="use the real GazeEstimator with this model instead of the script")
+    parser.add_argument("--window", default="800x600", help="magnifier window size")
+    parser.add_argument("--scale", type=float, default=2.0, help="magnification factor")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+
+    if args.screen:
+        screens = load_screens(args.screen)
+    else:
+        sw, sh = (int(v) for v in args.screen_size.split("x"))
+        screens = synthetic_screens(sw, sh, 8)
+    screen_h, screen_w = screens[0].shape[:2]
+
+    # fps 0: frames as fast as the pipeline takes them
+    if args.video:
+        cap = FileSource(args.video, loop=False)
+        cap.mode = cap.native._replace(fps=0)
+    else:
+        cap = SyntheticSource(CameraMode(640, 480, 0), frames=args.frames)
+    if args.model:
+        from eyetrax import GazeEstimator
+        estimator = GazeEstimator()
+        estimator.load_model(args.model)
+    else:
+        script = load_gaze(args.gaze) if args.gaze else scripted_gaze(args.frames, screen_w, screen_h)
+        estimator = ScriptedEstimator(script)
+
+    magnifier = Magnifier(screen_source=StaticScreenSource(screens))
+    # the window is never part of the static screens, no need to hide it for grabs
+    magnifier.capture_excludes_window = True
+    magnifier._update_prefetch_default()
+    magnifier.window_width, magnifier.window_height = (int(v) for v in args.window.split("x"))
+    magnifier.scale_factor = args.scale
+    magnifier.update_window_size_after_change()
+    # always-on mode: every sample renders, the dwell detector would hide the lens at each fixation end
+    magnifier.toggle_dwell(True)
+    app.processEvents()  # let the offscreen platform expose the window so repaint() paints
+
+    frames, elapsed = replay(cap, estimator, magnifier, args.frames)
+    cap.release()
+
+    results = {
+        "revision": git_revision(),
+        "config": vars(args),
+        "frames": frames,
+        "elapsed_s": elapsed,
+        "fps": frames / elapsed if elapsed > 0 else 0.0,
+        "stages": PERF.snapshot()["stages"],
+    }
+
+    print(f"{frames} frames in {elapsed:.2f} s -> {results['fps']:.1f} fps")
+    print(PERF.format_table())
+
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump(results, fh, indent=2)
+        print("Results written to", args.json)
+
+
+if __name__ == "__main__":
+    main()
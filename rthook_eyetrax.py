@@ -1,8 +1,27 @@
 # Runtime hook to ensure eyetrax/models exists inside PyInstaller's _MEIPASS
-# This runs before normal imports when the frozen app starts.
+# This runs before normal imports when the frozen app starts, so it must stay cheap:
+# nothing is copied when the models are already in place (myapp.spec puts them at
+# eyetrax/models), and missing entries are linked rather than copied where possible.
 import sys
 import os
-import shutil
+
+def _link_or_copy(src, dest):
+    try:
+        os.symlink(src, dest, target_is_directory=os.path.isdir(src))
+        return
+    except (OSError, NotImplementedError):
+        pass  # e.g. Windows without symlink rights
+    if not os.path.isdir(src):
+        try:
+            os.link(src, dest)
+            return
+        except OSError:
+            pass
+    import shutil  # only needed on this slow path
+    if os.path.isdir(src):
+        shutil.copytree(src, dest)
+    else:
+        shutil.copy2(src, dest)
 
 def _ensure_eyetrax_models():
     if not getattr(sys, 'frozen', False):
@@ -12,33 +31,27 @@ def _ensure_eyetrax_models():
         return
 
     dest = os.path.join(meipass, 'eyetrax', 'models')
+    # the directory must exist even when there is nothing to link into it
     try:
         os.makedirs(dest, exist_ok=True)
     except Exception:
         return
 
-    # candidate source locations inside the bundle where datas may have been placed
-    src_alts = [
-        os.path.join(meipass, 'eyetrax', 'models'),  # ideal
-        os.path.join(meipass, 'models'),              # if placed at top-level
-    ]
+    # older specs placed the models at the top level of the bundle
+    src = os.path.join(meipass, 'models')
+    if not os.path.isdir(src):
+        return  # models are already where eyetrax looks for them
+    if os.path.realpath(src) == os.path.realpath(dest):
+        return
 
-    for src in src_alts:
-        if not os.path.isdir(src):
-            continue
-        for name in os.listdir(src):
-            s = os.path.join(src, name)
-            d = os.path.join(dest, name)
-            if os.path.exists(d):
-                continue
-            try:
-                if os.path.isdir(s):
-                    shutil.copytree(s, d)
-                else:
-                    shutil.copy2(s, d)
-            except Exception:
-                # ignore copy errors; the presence of dest dir is the main requirement
-                pass
+    # manifest check: only entries missing from dest need any work
+    present = set(os.listdir(dest))
+    missing = [name for name in os.listdir(src) if name not in present]
+    for name in missing:
+        try:
+            _link_or_copy(os.path.join(src, name), os.path.join(dest, name))
+        except Exception:
+            # ignore errors; eyetrax reports a missing model itself
+            pass
 
 _ensure_eyetrax_models()
-
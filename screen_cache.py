@@ -0,0 +1,140 @@
+import threading
+import time
+
+import mss
+import numpy as np
+
+
+def _intersect(a, b):
+    """Intersection of two (left, top, width, height) rects, or None."""
+    left = max(a[0], b[0])
+    top = max(a[1], b[1])
+    right = min(a[0] + a[2], b[0] + b[2])
+    bottom = min(a[1] + a[3], b[1] + b[3])
+    if right <= left or bottom <= top:
+        return None
+    return left, top, right - left, bottom - top
+
+
+class ScreenFrameCache(threading.Thread):
+    """Keeps a double-buffered copy of one monitor, refreshed in the background.
+
+    crop() returns a NumPy view into the newest full frame, so reading a region
+    costs a slice instead of a screen grab. The buffer behind a view is written
+    again by the refresh after next, which can start one refresh interval after
+    crop() at the earliest: use a view right away on the calling thread (as the
+    lens scaling does) and take copy_region() for anything kept longer or read
+    on another thread.
+
+    Areas registered with set_excluded_rect() (the magnifier window) are not taken
+    from the new grab but carried over from the previous frame, so they keep showing
+    what was on screen before the window appeared there.
+    """
+
+    # number of refreshes a rect stays excluded after the window left it,
+    # covers the delay until the compositor shows the window at its new place
+    STALE_RECT_FRAMES = 2
+
+    def __init__(self, bounds, fps=20.0):
+        super().__init__(daemon=True)
+        self.left, self.top, self.width, self.height = bounds
+        self.fps = fps
+
+        self._buffers = [np.zeros((self.height, self.width, 4), dtype=np.uint8) for _ in range(2)]
+        self._front = 0
+        self._writes = 0  # refreshes started, copy_region() retries when it changed while copying
+        self._lock = threading.Lock()
+        self._first_frame = threading.Event()
+        self._running = True
+
+        self._excluded = None
+        self._stale = []  # [rect, remaining_frames]
+
+        self.frames_captured = 0
+
+    def set_excluded_rect(self, rect):
+        """Set the screen rect (left, top, width, height) to keep out of the cache, or None.
+        In mss (physical pixel) coordinates, like the monitor bounds."""
+        with self._lock:
+            if self._excluded is not None and self._excluded != rect:
+                self._stale.append([self._excluded, self.STALE_RECT_FRAMES])
+            self._excluded = rect
+
+    def set_fps(self, fps):
+        self.fps = max(1.0, float(fps))
+
+    def wait_first_frame(self, timeout=1.0):
+        return self._first_frame.wait(timeout)
+
+    def run(self):
+        monitor = {"left": self.left, "top": self.top, "width": self.width, "height": self.height}
+        # mss handles are not shareable between threads, so this thread owns its own
+        with mss.mss() as sct:
+            while self._running:
+                start = time.perf_counter()
+                shot = sct.grab(monitor)
+                self._store(np.frombuffer(shot.raw, dtype=np.uint8).reshape(self.height, self.width, 4))
+                delay = 1.0 / self.fps - (time.perf_counter() - start)
+                if delay > 0:
+                    time.sleep(delay)
+
+    def _store(self, frame):
+        with self._lock:
+            self._writes += 1
+        back = self._buffers[1 - self._front]
+        front = self._buffers[self._front]
+        back[:] = frame
+        with self._lock:
+            rects = [r for r, _ in self._stale]
+            if self._excluded is not None:
+                rects.append(self._excluded)
+            for entry in self._stale:
+                entry[1] -= 1
+            self._stale = [e for e in self._stale if e[1] > 0]
+        if self.frames_captured:
+            for rect in rects:
+                self._copy_rect(front, back, rect)
+        with self._lock:
+            self._front = 1 - self._front
+        self.frames_captured += 1
+        self._first_frame.set()
+
+    def _copy_rect(self, src, dst, rect):
+        clipped = _intersect(rect, (self.left, self.top, self.width, self.height))
+        if clipped is None:
+            return
+        x = clipped[0] - self.left
+        y = clipped[1] - self.top
+        dst[y:y + clipped[3], x:x + clipped[2]] = src[y:y + clipped[3], x:x + clipped[2]]
+
+    def crop(self, region):
+        """Return a BGRA view for an mss-style region dict in screen coordinates (see the class
+        docstring for how long it stays valid)."""
+        x = region["left"] - self.left
+        y = region["top"] - self.top
+        with self._lock:
+            frame = self._buffers[self._front]
+        return frame[y:y + region["height"], x:x + region["width"]]
+
+    def copy_region(self, region, out=None):
+        """Return a copy of region, in out if it has the right shape. The copy is retried
+        if a refresh started while copying, so it never mixes two frames."""
+        x = region["left"] - self.left
+        y = region["top"] - self.top
+        while True:
+            with self._lock:
+                frame = self._buffers[self._front]
+                writes = self._writes
+            view = frame[y:y + region["height"], x:x + region["width"]]
+            if out is None or out.shape != view.shape:
+                out = np.empty_like(view)
+            np.copyto(out, view)
+            with self._lock:
+                # a refresh that started meanwhile may have been writing into this buffer
+                if self._writes == writes:
+                    return out
+
+    def stop(self):
+        self._running = False
+        if self.is_alive():
+            self.join(timeout=1.0)
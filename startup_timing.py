@@ -0,0 +1,72 @@
+"""Cold-start timing report.
+
+Import this module first in main.py. It records the time of named startup
+milestones and of imports done through timed_import(). Set GAZE_STARTUP_REPORT=1
+to print the report once the first gaze sample arrives, or set it to a file
+path to also write the report there as JSON. For a per-module breakdown of
+every import, run python -X importtime main.py.
+"""
+import importlib
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+_T0 = time.perf_counter()
+
+
+class StartupTimer:
+    def __init__(self):
+        self.marks = []  # (name, seconds since start)
+        self.imports = []  # (module, seconds spent importing)
+        self.reported = False
+        self._lock = threading.Lock()
+
+    def mark(self, name):
+        with self._lock:
+            self.marks.append((name, time.perf_counter() - _T0))
+
+    def timed_import(self, name):
+        """Import name and record how long it took. PyInstaller does not see these imports,
+        so modules loaded this way must be collected in myapp.spec."""
+        with self.timed(name):
+            return importlib.import_module(name)
+
+    @contextmanager
+    def timed(self, name):
+        """Record the time of the import statements in the block under name."""
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.imports.append((name, time.perf_counter() - t0))
+
+    def report(self):
+        return {
+            "frozen": bool(getattr(sys, 'frozen', False)),
+            "marks_ms": {name: t * 1000 for name, t in self.marks},
+            "imports_ms": {name: t * 1000 for name, t in self.imports},
+        }
+
+    def finish(self):
+        """Print (and maybe save) the report once, if GAZE_STARTUP_REPORT is set."""
+        target = os.environ.get("GAZE_STARTUP_REPORT")
+        if self.reported or not target:
+            return
+        self.reported = True
+        report = self.report()
+        print("Startup timing (ms since start):")
+        for name, ms in report["marks_ms"].items():
+            print(f"  {name:<28} {ms:8.1f}")
+        print("Imports (ms):")
+        for name, ms in report["imports_ms"].items():
+            print(f"  {name:<28} {ms:8.1f}")
+        if target != "1":
+            with open(target, "w") as fh:
+                json.dump(report, fh, indent=2)
+
+
+STARTUP = StartupTimer()
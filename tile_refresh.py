@@ -0,0 +1,71 @@
+import cv2
+import numpy as np
+
+
+class TileChangeDetector:
+    """Finds the tiles of a source region that changed since the previous frame.
+
+    Change detection works on a downsampled copy holding the sum of every
+    sample_step x sample_step block, so a change of a single pixel by one level
+    (a caret, the mouse cursor, a thin underline) still changes its block, while
+    a static screen costs one small absdiff plus a per-tile sum.
+    """
+
+    def __init__(self, tile_size=32, sample_step=4):
+        # block sums are kept in uint16, 16 x 16 blocks of 255 still fit
+        if not 1 <= sample_step <= 16:
+            raise ValueError("sample_step must be between 1 and 16")
+        self.tile_size = tile_size
+        self.sample_step = sample_step
+        self._prev_small = None
+
+        self.last_total = 0
+        self.last_skipped = 0
+
+    def reset(self):
+        """Forget the previous frame, the next call reports every tile as dirty."""
+        self._prev_small = None
+
+    def remember(self, src):
+        """Use src as the reference frame for the next comparison."""
+        self._prev_small = self._block_sums(src)
+
+    def _block_sums(self, src):
+        """Per-channel sums of sample_step x sample_step blocks, edge blocks padded by replication."""
+        step = self.sample_step
+        if step == 1:
+            return np.ascontiguousarray(src[..., :3])
+        h, w = src.shape[:2]
+        # the area average of the values times step**2 is exactly the block sum
+        scaled = np.multiply(src[..., :3], step * step, dtype=np.uint16)
+        if h % step or w % step:
+            scaled = cv2.copyMakeBorder(scaled, 0, -h % step, 0, -w % step, cv2.BORDER_REPLICATE)
+        return cv2.resize(scaled, (scaled.shape[1] // step, scaled.shape[0] // step), interpolation=cv2.INTER_AREA)
+
+    def _tile_edges(self, length):
+        return list(range(0, length, self.tile_size)) + [length]
+
+    def dirty_tiles(self, src):
+        """Return the changed tiles of src as (y0, y1, x0, x1) in source pixels."""
+        h, w = src.shape[:2]
+        ys = self._tile_edges(h)
+        xs = self._tile_edges(w)
+        self.last_total = (len(ys) - 1) * (len(xs) - 1)
+
+        small = self._block_sums(src)
+        prev = self._prev_small
+        self._prev_small = small
+        if prev is None or prev.shape != small.shape:
+            self.last_skipped = 0
+            return [(ys[r], ys[r + 1], xs[c], xs[c + 1])
+                    for r in range(len(ys) - 1) for c in range(len(xs) - 1)]
+
+        diff = cv2.absdiff(small, prev).max(axis=2)
+        # tile boundaries in the downsampled grid
+        sy = [(y + self.sample_step - 1) // self.sample_step for y in ys[:-1]]
+        sx = [(x + self.sample_step - 1) // self.sample_step for x in xs[:-1]]
+        changed = np.add.reduceat(np.add.reduceat(diff, sy, axis=0, dtype=np.uint32), sx, axis=1) > 0
+
+        rows, cols = np.nonzero(changed)
+        self.last_skipped = self.last_total - len(rows)
+        return [(ys[r], ys[r + 1], xs[c], xs[c + 1]) for r, c in zip(rows, cols)]